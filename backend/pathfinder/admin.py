@@ -1,9 +1,14 @@
 from django.contrib import admin
-from .models import CustomUser, Assessment, TestResponse, ChatMessage
+from .models import CustomUser, Assessment, TestResponse, Question, QuestionAnswer, AssessmentResults, ProcessingJob, ChatMessage, AccountDeletion
 
 admin.site.register(CustomUser)
 admin.site.register(Assessment)
 admin.site.register(TestResponse)
+admin.site.register(Question)
+admin.site.register(QuestionAnswer)
+admin.site.register(AssessmentResults)
+admin.site.register(ProcessingJob)
 admin.site.register(ChatMessage)
+admin.site.register(AccountDeletion)
 
 
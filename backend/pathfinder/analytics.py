@@ -0,0 +1,227 @@
+"""
+Cohort analytics served from the CohortRollup table instead of scanning TestResponse blobs. Starts and
+submits append CohortRollupDelta rows, which never contend on a shared row; `compact_rollups` folds them into
+the rollups before stats are read. `rebuild_rollups` recomputes everything from scratch nightly to correct
+any drift (deleted accounts, edits made outside the API).
+"""
+import uuid
+from collections import defaultdict
+from datetime import datetime, time
+
+from django.db import transaction
+from django.db.models import F, Sum
+from django.db.models.functions import TruncMonth, TruncWeek
+from django.utils import timezone
+
+from .answers import LIKERT_INDEX, SUBJECT_INDEX, YES_NO_INDEX
+from .models import CustomUser, Assessment, TestResponse, CohortRollup, CohortRollupDelta
+
+ASSESSMENT = 'assessment'
+BUCKETS = {
+    'day': None,
+    'week': TruncWeek,
+    'month': TruncMonth,
+}
+
+
+def answer_keys(value):
+    """
+    Distribution keys for one raw answer: the option index for known option texts, so the same choice in
+    different languages lands in the same bin, otherwise the answer text. Multi-select answers count each option.
+    """
+    if isinstance(value, list):
+        return [str(SUBJECT_INDEX.get(item, item)) for item in value]
+    if isinstance(value, str):
+        index = LIKERT_INDEX.get(value, YES_NO_INDEX.get(value))
+        return [value if index is None else str(index)]
+    return [str(value)]
+
+
+def merge_answers(counts, responses):
+    for question_id, value in responses.items():
+        question = counts.setdefault(str(question_id), {})
+        for key in answer_keys(value):
+            question[key] = question.get(key, 0) + 1
+    return counts
+
+
+def add_counts(counts, other):
+    """Add one {question_id: {answer key: count}} distribution into another."""
+    for question_id, answers in other.items():
+        question = counts.setdefault(question_id, {})
+        for key, count in answers.items():
+            question[key] = question.get(key, 0) + count
+    return counts
+
+
+def bucket_for(started_at):
+    return timezone.localdate(started_at)
+
+
+def _user_grade(user_id):
+    return CustomUser.objects.filter(pk=user_id).values_list('grade', flat=True).first()
+
+
+def bump(grade, bucket, test_type, started=0, completed=0, duration=0.0, responses=None):
+    """Append one increment for a rollup row; a single insert with no lock on the shared rollup."""
+    CohortRollupDelta.objects.create(
+        grade=grade, bucket=bucket, test_type=test_type, started_count=started, completed_count=completed,
+        duration_seconds_total=duration, answer_counts=merge_answers({}, responses) if responses else {})
+
+
+def compact_rollups():
+    """Fold pending increments into CohortRollup; returns how many were folded. Safe to run concurrently."""
+    token = uuid.uuid4().hex
+    with transaction.atomic():
+        # Claiming by update gives each increment to exactly one compaction.
+        claimed = CohortRollupDelta.objects.filter(claimed_by='').update(claimed_by=token)
+        if not claimed:
+            return 0
+        totals = {}
+        for delta in CohortRollupDelta.objects.filter(claimed_by=token).values(
+                'grade', 'bucket', 'test_type', 'started_count', 'completed_count', 'duration_seconds_total',
+                'answer_counts').iterator(chunk_size=2000):
+            key = (delta['grade'], delta['bucket'], delta['test_type'])
+            total = totals.setdefault(key, {'started': 0, 'completed': 0, 'duration': 0.0, 'answers': {}})
+            total['started'] += delta['started_count']
+            total['completed'] += delta['completed_count']
+            total['duration'] += delta['duration_seconds_total']
+            add_counts(total['answers'], delta['answer_counts'])
+        for (grade, bucket, test_type), total in totals.items():
+            rollup, _ = CohortRollup.objects.select_for_update().get_or_create(
+                grade=grade, bucket=bucket, test_type=test_type)
+            rollup.started_count += total['started']
+            rollup.completed_count += total['completed']
+            rollup.duration_seconds_total += total['duration']
+            add_counts(rollup.answer_counts, total['answers'])
+            rollup.save()
+        CohortRollupDelta.objects.filter(claimed_by=token).delete()
+    return claimed
+
+
+def record_assessment_started(assessment):
+    user = assessment.user if Assessment.user.is_cached(assessment) else None
+    grade = user.grade if user else _user_grade(assessment.user_id)
+    if grade is not None:
+        bump(grade, bucket_for(assessment.started_at), ASSESSMENT, started=1)
+
+
+def record_test_started(test_response):
+    assessment = test_response.assessment if TestResponse.assessment.is_cached(test_response) else None
+    if assessment is not None and Assessment.user.is_cached(assessment):
+        grade = assessment.user.grade
+    else:
+        grade = CustomUser.objects.filter(
+            assessments__pk=test_response.assessment_id).values_list('grade', flat=True).first()
+    if grade is not None:
+        bump(grade, bucket_for(test_response.started_at), test_response.test_type, started=1)
+
+
+def record_test_completed(test_response, grade):
+    """Call once, when a test first becomes completed; counted in the bucket the test was started in."""
+    duration = (test_response.submitted_at - test_response.started_at).total_seconds()
+    bump(grade, bucket_for(test_response.started_at), test_response.test_type,
+         completed=1, duration=duration, responses=test_response.responses)
+
+
+def record_assessment_completed(assessment, grade):
+    duration = (assessment.completed_at - assessment.started_at).total_seconds()
+    bump(grade, bucket_for(assessment.started_at), ASSESSMENT, completed=1, duration=duration)
+
+
+def compute_rollups(since=None):
+    """Rollup rows recomputed from the source tables for buckets on or after `since` (a date)."""
+    rows = {}
+
+    def row(grade, started_at, test_type):
+        key = (grade, bucket_for(started_at), test_type)
+        if key not in rows:
+            rows[key] = CohortRollup(grade=key[0], bucket=key[1], test_type=test_type)
+        return rows[key]
+
+    start = None
+    if since is not None:
+        start = timezone.make_aware(datetime.combine(since, time.min))
+    assessments = Assessment.objects.order_by()
+    test_responses = TestResponse.objects.order_by()
+    if start is not None:
+        assessments = assessments.filter(started_at__gte=start)
+        test_responses = test_responses.filter(started_at__gte=start)
+
+    for grade, started_at, status, completed_at in assessments.values_list(
+            'user__grade', 'started_at', 'status', 'completed_at').iterator(chunk_size=2000):
+        rollup = row(grade, started_at, ASSESSMENT)
+        rollup.started_count += 1
+        if status == 'completed' and completed_at:
+            rollup.completed_count += 1
+            rollup.duration_seconds_total += (completed_at - started_at).total_seconds()
+
+    for grade, test_type, started_at, submitted_at, is_completed, responses in test_responses.values_list(
+            'assessment__user__grade', 'test_type', 'started_at', 'submitted_at', 'is_completed',
+            'responses').iterator(chunk_size=2000):
+        rollup = row(grade, started_at, test_type)
+        rollup.started_count += 1
+        if is_completed and submitted_at:
+            rollup.completed_count += 1
+            rollup.duration_seconds_total += (submitted_at - started_at).total_seconds()
+            merge_answers(rollup.answer_counts, responses)
+    return list(rows.values())
+
+
+def rebuild_rollups(since=None):
+    """
+    Replace rollups for buckets on or after `since` (everything if None) with freshly computed ones.
+    Submits landing while the source tables are read are picked up by the next rebuild.
+    """
+    rollups = compute_rollups(since)
+    with transaction.atomic():
+        stale = CohortRollup.objects.all()
+        pending = CohortRollupDelta.objects.all()
+        if since is not None:
+            stale = stale.filter(bucket__gte=since)
+            pending = pending.filter(bucket__gte=since)
+        stale.delete()
+        pending.delete()  # already counted by the recompute
+        CohortRollup.objects.bulk_create(rollups, batch_size=1000)
+    return len(rollups)
+
+
+def cohort_stats(bucket='day', since=None, until=None, grade=None, test_type=None, answers=False):
+    """Aggregated rollups grouped by (grade, period, test_type), newest period first."""
+    compact_rollups()
+    rollups = CohortRollup.objects.all()
+    if since is not None:
+        rollups = rollups.filter(bucket__gte=since)
+    if until is not None:
+        rollups = rollups.filter(bucket__lte=until)
+    if grade:
+        rollups = rollups.filter(grade=grade)
+    if test_type:
+        rollups = rollups.filter(test_type=test_type)
+    trunc = BUCKETS[bucket]
+    rollups = rollups.annotate(period=trunc('bucket') if trunc else F('bucket'))
+
+    distributions = defaultdict(dict)
+    if answers:
+        for key in rollups.values_list('grade', 'period', 'test_type', 'answer_counts').iterator():
+            add_counts(distributions[key[:3]], key[3])
+
+    stats = []
+    for group in rollups.values('grade', 'period', 'test_type').annotate(
+            started=Sum('started_count'), completed=Sum('completed_count'),
+            duration=Sum('duration_seconds_total')).order_by('-period', 'grade', 'test_type'):
+        started, completed = group['started'], group['completed']
+        entry = {
+            'grade': group['grade'],
+            'period': group['period'].isoformat(),
+            'test_type': group['test_type'],
+            'started': started,
+            'completed': completed,
+            'completion_rate': round(completed / started * 100, 1) if started else None,
+            'avg_duration_seconds': round(group['duration'] / completed, 1) if completed else None,
+        }
+        if answers:
+            entry['answer_distribution'] = distributions.get(
+                (group['grade'], group['period'], group['test_type']), {})
+        stats.append(entry)
+    return stats
@@ -0,0 +1,96 @@
+import json
+
+# Rating scale shared by the aptitude and values tests, mirrored from the frontend's commonOptions.
+LIKERT_OPTIONS = {
+    'en': ['Strongly Disagree', 'Disagree', 'Neutral', 'Agree', 'Strongly Agree'],
+    'hi': ['बिल्कुल असहमत', 'असहमत', 'तटस्थ', 'सहमत', 'पूर्णतः सहमत'],
+    'te': ['పూర్తిగా అంగీకరించను', 'అంగీకరించను', 'తటస్థ', 'అంగీకరిస్తున్నాను', 'పూర్తిగా అంగీకరిస్తున్నాను'],
+    'ta': ['முற்றிலும் மறுக்கிறேன்', 'மறுக்கிறேன்', 'நடுநிலை', 'ஒப்புக்கொள்கிறேன்', 'முற்றிலும் ஒப்புக்கொள்கிறேன்'],
+    'bn': ['সম্পূর্ণ অসম্মত', 'অসম্মত', 'নিরপেক্ষ', 'সম্মত', 'সম্পূর্ণ সম্মত'],
+    'gu': ['સંપૂર્ણ અસહમત', 'અસહમત', 'તટસ્થ', 'સહમત', 'સંપૂર્ણ સહમત'],
+}
+
+LIKERT_INDEX = {option: index for options in LIKERT_OPTIONS.values() for index, option in enumerate(options)}
+
+# Subjects offered by the personal test's multi-select question, in option order.
+SUBJECT_OPTIONS = {
+    'en': [
+        'Math',
+        'Science (Physics/Chemistry/Biology)',
+        'Social Studies (History/Geography/Civics)',
+        'English / Other Languages',
+        'Computer Science / Coding',
+        'Art / Design',
+        'Music',
+        'Drama',
+        'Economics',
+        'Physical Education / Sports',
+    ],
+    'hi': [
+        'गणित',
+        'विज्ञान (भौतिकी / रसायन / जीवविज्ञान)',
+        'सामाजिक अध्ययन (इतिहास / भूगोल / नागरिक शास्त्र)',
+        'अंग्रेजी / अन्य भाषाएँ',
+        'कंप्यूटर विज्ञान / कोडिंग',
+        'कला / डिज़ाइन',
+        'संगीत',
+        'नाटक',
+        'अर्थशास्त्र',
+        'शारीरिक शिक्षा / खेल',
+    ],
+    'te': [
+        'గణితం',
+        'సైన్స్ (భౌతిక శాస్త్రం / రసాయన శాస్త్రం / జీవశాస్త్రం)',
+        'సామాజిక అధ్యయనాలు (చరిత్ర / భూగోళ శాస్త్రం / పౌర శాస్త్రం)',
+        'ఇంగ్లీష్ / ఇతర భాషలు',
+        'కంప్యూటర్ సైన్స్ / కోడింగ్',
+        'కళ / డిజైన్',
+        'సంగీతం',
+        'నాటకం',
+        'అర్థశాస్త్రం',
+        'శారీరక విద్య / క్రీడలు',
+    ],
+    'ta': [
+        'கணிதம்',
+        'அறிவியல் (இயற்பியல் / இரசாயனவியல் / உயிரியல்)',
+        'சமூக அறிவியல் (வரலாறு / புவியியல் / குடியியல்)',
+        'ஆங்கிலம் / பிற மொழிகள்',
+        'கணினி அறிவியல் / குறியீட்டல்',
+        'கலை / வடிவமைப்பு',
+        'இசை',
+        'நாடகம்',
+        'பொருளாதாரம்',
+        'உடற்கல்வி / விளையாட்டு',
+    ],
+    'bn': [
+        'গণিত',
+        'বিজ্ঞান (পদার্থ / রসায়ন / জীববিজ্ঞান)',
+        'সমাজবিজ্ঞান (ইতিহাস / ভূগোল / নাগরিক)',
+        'ইংরেজি / অন্যান্য ভাষা',
+        'কম্পিউটার বিজ্ঞান / কোডিং',
+        'শিল্প / ডিজাইন',
+        'সঙ্গীত',
+        'নাটক',
+        'অর্থনীতি',
+        'শারীরিক শিক্ষা / খেলাধুলা',
+    ],
+}
+
+SUBJECT_INDEX = {option: index for options in SUBJECT_OPTIONS.values() for index, option in enumerate(options)}
+
+YES_NO_OPTIONS = {
+    'en': ['Yes', 'No'],
+    'hi': ['हाँ', 'नहीं'],
+    'te': ['అవును', 'కాదు'],
+    'ta': ['ஆம்', 'இல்லை'],
+    'bn': ['হ্যাঁ', 'না'],
+}
+
+YES_NO_INDEX = {option: index for options in YES_NO_OPTIONS.values() for index, option in enumerate(options)}
+
+
+def encode_answer(value):
+    """Return (answer_value, answer_index) for a raw answer from TestResponse.responses."""
+    if isinstance(value, str):
+        return value, LIKERT_INDEX.get(value)
+    return json.dumps(value, ensure_ascii=False), None
@@ -4,3 +4,9 @@ from django.apps import AppConfig
 class PathfinderConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'pathfinder'
+
+    def ready(self):
+        from django.db.backends.signals import connection_created
+        from . import signals  # noqa: F401
+        from .metrics import install_query_hook
+        connection_created.connect(install_query_hook, dispatch_uid='pathfinder-query-metrics')
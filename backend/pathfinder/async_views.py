@@ -0,0 +1,238 @@
+"""
+Async variants of the hot pathfinder endpoints, for serving under an ASGI server.
+They use Django's async ORM directly and hand only lock-bound or transactional work to threads.
+"""
+import json
+from datetime import timedelta
+from functools import wraps
+
+from asgiref.sync import sync_to_async
+from django.core.serializers.json import DjangoJSONEncoder
+from django.http import Http404, JsonResponse, HttpResponse, StreamingHttpResponse
+from django.utils import timezone
+from django.views.decorators.csrf import csrf_exempt
+from rest_framework_simplejwt.exceptions import InvalidToken, TokenError
+from rest_framework_simplejwt.settings import api_settings
+
+from .authentication import CachedJWTAuthentication, aget_token_user
+from .cache import PAYLOAD_TIMEOUT, etag_matches, get_cache, get_user_version, make_etag, payload_key
+from .chatbot import astream_bot_response
+from .events import (
+    TICKET_MAX_AGE, format_sse, get_broker, issue_ticket, publish_event, results_ready_data, ticket_user_id,
+)
+from .idempotency import HEADER as IDEMPOTENCY_HEADER, REPLAYED_HEADER, run_idempotent
+from .models import Assessment, AssessmentResults, ChatMessage
+from .pagination import (
+    MAX_WAIT_SECONDS, InvalidCursor, await_new, encode_cursor, finish_page, keyset_queryset, parse_limit, parse_wait,
+)
+from .projections import CHAT_MESSAGE, aassessment_data
+from .serializers import ChatMessageSerializer
+from .views import HomeAPIView, save_progress, save_progress_delta
+
+jwt_authentication = CachedJWTAuthentication()
+
+
+def json_response(payload, status=200, **kwargs):
+    return JsonResponse(payload, status=status, encoder=DjangoJSONEncoder, safe=False, **kwargs)
+
+
+async def aauthenticate(request, allow_ticket=False):
+    """Validate the bearer token without touching the DB, then resolve the user through the auth cache."""
+    header = jwt_authentication.get_header(request)
+    raw_token = jwt_authentication.get_raw_token(header) if header else None
+    if raw_token is not None:
+        try:
+            token = jwt_authentication.get_validated_token(raw_token)
+            user_id = token[api_settings.USER_ID_CLAIM]
+        except (InvalidToken, TokenError, KeyError):
+            return None
+    elif allow_ticket:
+        # EventSource cannot set headers, so the event stream takes ?ticket= from events_ticket instead.
+        user_id = ticket_user_id(request.GET.get('ticket', ''))
+        if user_id is None:
+            return None
+    else:
+        return None
+    user = await aget_token_user(user_id)
+    return user if user and user.is_active else None
+
+
+def async_api_view(methods, allow_ticket=False):
+    def decorator(view):
+        @csrf_exempt
+        @wraps(view)
+        async def wrapper(request, *args, **kwargs):
+            if request.method not in methods:
+                return json_response({'detail': f'Method "{request.method}" not allowed.'}, status=405)
+            user = await aauthenticate(request, allow_ticket)
+            if user is None:
+                return json_response({'detail': 'Authentication credentials were not provided.'}, status=401)
+            request.user = user
+            if request.body:
+                try:
+                    request.data = json.loads(request.body)
+                except ValueError:
+                    return json_response({'error': 'Invalid JSON body'}, status=400)
+                if not isinstance(request.data, dict):
+                    return json_response({'error': 'JSON body must be an object'}, status=400)
+            else:
+                request.data = {}
+            try:
+                return await view(request, *args, **kwargs)
+            except Http404:
+                return json_response({'detail': 'Not found.'}, status=404)
+        return wrapper
+    return decorator
+
+
+@async_api_view(['GET'])
+async def home(request):
+    user = request.user
+    version = await sync_to_async(get_user_version)(user.pk)
+    etag = make_etag(user.pk, 'home', version)
+    headers = {'ETag': etag, 'Cache-Control': 'private, no-cache'}
+    if etag_matches(request, etag):
+        return HttpResponse(status=304, headers=headers)
+    cache = get_cache()
+    key = payload_key(user.pk, 'home', version)
+    payload = await cache.aget(key)
+    if payload is None:
+        assessments = await aassessment_data(Assessment.objects.filter(
+            user=user, status__in=['in_progress', 'completed']))
+        stats = await Assessment.objects.filter(user=user).acompletion_stats()
+        payload = HomeAPIView.serialize(user, assessments, stats)
+        await cache.aset(key, payload, PAYLOAD_TIMEOUT)
+    return json_response(payload, headers=headers)
+
+
+@async_api_view(['GET'])
+async def chat_history(request):
+    messages = ChatMessage.objects.filter(user=request.user)
+    assessment_id = request.GET.get('assessment_id')
+    if assessment_id:
+        messages = messages.filter(assessment_id=assessment_id)
+    messages = messages.values(*CHAT_MESSAGE.sources)
+    limit = parse_limit(request.GET.get('limit'))
+    since = request.GET.get('since')
+    try:
+        wait = parse_wait(request.GET.get('wait'))
+    except ValueError:
+        return json_response({'error': f'wait must be a number of seconds up to {MAX_WAIT_SECONDS}'}, status=400)
+    try:
+        if since is not None:
+            items, has_more = await await_new(messages, int(since), limit, wait)
+        else:
+            page, newest_first = keyset_queryset(messages, request.GET.get('before'), request.GET.get('after'))
+            items, has_more = finish_page([m async for m in page[:limit + 1]], limit, newest_first)
+    except (InvalidCursor, ValueError):
+        return json_response({'error': 'Invalid cursor'}, status=400)
+    return json_response({
+        'messages': CHAT_MESSAGE.many(items),
+        'has_more': has_more,
+        'before': encode_cursor(items[0]) if items else None,
+        'after': encode_cursor(items[-1]) if items else None,
+        'latest_id': items[-1]['id'] if items else None,
+    })
+
+
+@async_api_view(['POST'])
+async def chatbot_message(request):
+    user = request.user
+    message_text = request.data.get('message')
+    assessment_id = request.data.get('assessment_id')
+    language = request.data.get('language', 'en')
+    if not message_text:
+        return json_response({'error': 'Message is required'}, status=400)
+    assessment = None
+    if assessment_id:
+        assessment = await Assessment.objects.filter(id=assessment_id, user=user).afirst()
+    results = AssessmentResults.objects.filter(
+        assessment=assessment) if assessment else AssessmentResults.objects.filter(assessment__user=user)
+    context = {'assessment': assessment, 'user': user, 'results': await results.afirst()}
+
+    async def save_messages(bot_response_text):
+        # A single multi-row INSERT, so both messages land together.
+        saved = await ChatMessage.objects.abulk_create([
+            ChatMessage(user=user, assessment=assessment, message_text=message_text,
+                        sender='user', is_results_chat=assessment is not None),
+            ChatMessage(user=user, assessment=assessment, message_text=bot_response_text,
+                        sender='bot', is_results_chat=assessment is not None),
+        ])
+        await sync_to_async(publish_event)(user.pk, 'chat_message', ChatMessageSerializer(saved, many=True).data)
+
+    if request.data.get('stream') or 'text/event-stream' in request.META.get('HTTP_ACCEPT', ''):
+        async def events():
+            chunks = []
+            async for chunk in astream_bot_response(message_text, language, context):
+                chunks.append(chunk)
+                yield f'data: {json.dumps({"delta": chunk})}\n\n'
+            bot_response_text = ''.join(chunks)
+            await save_messages(bot_response_text)
+            yield f'event: done\ndata: {json.dumps({"bot_message": bot_response_text})}\n\n'
+        response = StreamingHttpResponse(events(), content_type='text/event-stream')
+        response['Cache-Control'] = 'no-cache'
+        response['X-Accel-Buffering'] = 'no'
+        return response
+
+    bot_response_text = ''.join([chunk async for chunk in astream_bot_response(message_text, language, context)])
+    await save_messages(bot_response_text)
+    return json_response({'bot_message': bot_response_text})
+
+
+@async_api_view(['POST', 'PATCH'])
+async def save_test_progress(request):
+    handler = save_progress if request.method == 'POST' else save_progress_delta
+    endpoint = 'save-progress' if request.method == 'POST' else 'save-progress-delta'
+    status_code, payload, replayed = await sync_to_async(run_idempotent)(
+        request.user, request.headers.get(IDEMPOTENCY_HEADER), endpoint, request.data,
+        lambda: handler(request.user, request.data))
+    response = json_response(payload, status=status_code)
+    if replayed:
+        response[REPLAYED_HEADER] = 'true'
+    return response
+
+
+@async_api_view(['POST'])
+async def events_ticket(request):
+    """A short-lived ticket for opening the event stream, so no access token ends up in a URL."""
+    return json_response({'ticket': issue_ticket(request.user.pk), 'expires_in': TICKET_MAX_AGE})
+
+
+# Result rows are stamped before their job commits; each poll looks back this far and skips ids already sent.
+RESULTS_POLL_OVERLAP = timedelta(seconds=60)
+
+
+async def poll_results_ready(user_id, since, sent):
+    """results_ready messages for results generated since `since` that were not sent yet."""
+    messages = []
+    async for assessment_id in AssessmentResults.objects.filter(
+            assessment__user_id=user_id, generated_at__gte=since - RESULTS_POLL_OVERLAP).exclude(
+            assessment_id__in=sent).values_list('assessment_id', flat=True):
+        sent.add(assessment_id)
+        messages.append({'event': 'results_ready', 'data': results_ready_data(assessment_id)})
+    return messages
+
+
+@async_api_view(['GET'], allow_ticket=True)
+async def events(request):
+    """
+    Per-user server-sent event stream: test_submitted, results_ready and chat_message. Open it with
+    ?ticket= from events_ticket. Without a cross-process broker, results_ready is polled for on each heartbeat.
+    """
+    broker = get_broker()
+
+    async def stream():
+        yield 'retry: 3000\n\n'
+        polled_at, sent = timezone.now(), set()
+        async for message in broker.subscribe(request.user.pk):
+            if message is not None and message['event'] == 'results_ready':
+                sent.add(message['data']['assessment_id'])
+            elif message is None and not broker.cross_process:
+                since, polled_at = polled_at, timezone.now()
+                for result in await poll_results_ready(request.user.pk, since, sent):
+                    yield format_sse(result)
+            yield format_sse(message)
+    response = StreamingHttpResponse(stream(), content_type='text/event-stream')
+    response['Cache-Control'] = 'no-cache'
+    response['X-Accel-Buffering'] = 'no'
+    return response
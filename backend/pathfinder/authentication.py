@@ -0,0 +1,75 @@
+from django.conf import settings
+from django.db import DEFAULT_DB_ALIAS, transaction
+from django.utils.translation import gettext_lazy as _
+from rest_framework.exceptions import AuthenticationFailed
+from rest_framework_simplejwt.authentication import JWTAuthentication
+from rest_framework_simplejwt.exceptions import InvalidToken
+from rest_framework_simplejwt.settings import api_settings
+
+from .cache import get_cache
+from .models import CustomUser
+
+AUTH_USER_TIMEOUT = getattr(settings, 'PATHFINDER_AUTH_USER_CACHE_TIMEOUT', 60)
+
+# Everything but the password hash, which stays deferred and is loaded from the DB only if read.
+CACHED_FIELDS = [f.attname for f in CustomUser._meta.concrete_fields if f.attname != 'password']
+
+
+def _user_key(user_id):
+    return f'pathfinder:authuser:{user_id}'
+
+
+def build_user(data):
+    """A CustomUser instance from cached field values, with the uncached fields deferred."""
+    return CustomUser.from_db(DEFAULT_DB_ALIAS, CACHED_FIELDS, [data[name] for name in CACHED_FIELDS])
+
+
+def get_token_user(user_id):
+    """The user for a token's id claim, from a short-TTL cache; None if the user does not exist."""
+    cache = get_cache()
+    data = cache.get(_user_key(user_id))
+    if data is None:
+        data = CustomUser.objects.filter(pk=user_id).values(*CACHED_FIELDS).first()
+        if data is None:
+            return None
+        cache.set(_user_key(user_id), data, AUTH_USER_TIMEOUT)
+    return build_user(data)
+
+
+async def aget_token_user(user_id):
+    cache = get_cache()
+    data = await cache.aget(_user_key(user_id))
+    if data is None:
+        data = await CustomUser.objects.filter(pk=user_id).values(*CACHED_FIELDS).afirst()
+        if data is None:
+            return None
+        await cache.aset(_user_key(user_id), data, AUTH_USER_TIMEOUT)
+    return build_user(data)
+
+
+def forget_user(user_id):
+    """Drop the cached auth record now and again on commit, so a concurrent request can't re-cache stale data."""
+    cache = get_cache()
+    cache.delete(_user_key(user_id))
+    transaction.on_commit(lambda: cache.delete(_user_key(user_id)))
+
+
+class CachedJWTAuthentication(JWTAuthentication):
+    """
+    JWTAuthentication that resolves the user from cache instead of querying CustomUser on every request.
+    Profile saves and deletes evict the entry (see signals); other changes show up within the cache timeout.
+    """
+
+    def get_user(self, validated_token):
+        if api_settings.CHECK_REVOKE_TOKEN:
+            return super().get_user(validated_token)
+        try:
+            user_id = validated_token[api_settings.USER_ID_CLAIM]
+        except KeyError as e:
+            raise InvalidToken(_('Token contained no recognizable user identification')) from e
+        user = get_token_user(user_id)
+        if user is None:
+            raise AuthenticationFailed(_('User not found'), code='user_not_found')
+        if api_settings.CHECK_USER_IS_ACTIVE and not user.is_active:
+            raise AuthenticationFailed(_('User is inactive'), code='user_inactive')
+        return user
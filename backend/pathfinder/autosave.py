@@ -0,0 +1,170 @@
+import atexit
+import logging
+import threading
+import time
+
+from django.conf import settings
+from django.db import close_old_connections
+from django.utils import timezone
+
+from .cache import get_cache, invalidate_user, is_shared_cache
+from .models import TestResponse
+
+logger = logging.getLogger(__name__)
+
+
+def get_buffer_settings():
+    return {
+        'ENABLED': False,
+        'FLUSH_INTERVAL': 2.0,
+        'BATCH_SIZE': 500,
+        'SINGLE_PROCESS': False,
+        'STATE_TIMEOUT': 300,
+        **getattr(settings, 'PATHFINDER_AUTOSAVE_BUFFER', {}),
+    }
+
+
+def buffer_enabled():
+    """Buffering needs pending state every process can see: a shared cache, or a declared single-process server."""
+    options = get_buffer_settings()
+    return options['ENABLED'] and (options['SINGLE_PROCESS'] or is_shared_cache())
+
+
+def _state_key(test_response_id):
+    return f'pathfinder:autosave:{test_response_id}'
+
+
+class AutosaveBuffer:
+    """
+    Coalesces autosaves, keeping only the latest state per test response in the cache, and writes them with
+    bulk_update from a background flusher thread. Each process's flusher writes what that process buffered;
+    `flush_pending` writes a test response's latest state from any process before it is read or submitted.
+    """
+    UPDATE_FIELDS = ['responses', 'current_question_index', 'revision', 'last_saved_at']
+
+    def __init__(self):
+        self._pending = {}
+        self._lock = threading.Lock()
+        self._thread = None
+        self._stop = threading.Event()
+        self.stats = {
+            'buffered_total': 0,
+            'flushed_total': 0,
+            'flush_count': 0,
+            'flush_errors': 0,
+            'last_flush_seconds': 0.0,
+            'max_flush_seconds': 0.0,
+        }
+
+    def depth(self):
+        return len(self._pending)
+
+    def metrics(self):
+        return {'depth': self.depth(), **self.stats}
+
+    def put(self, test_response_id, responses, current_question_index):
+        saved_at = timezone.now()
+        get_cache().set(_state_key(test_response_id), (responses, current_question_index, saved_at),
+                        get_buffer_settings()['STATE_TIMEOUT'])
+        with self._lock:
+            self._pending[test_response_id] = saved_at
+            self.stats['buffered_total'] += 1
+        self._ensure_flusher()
+        return saved_at
+
+    def flush(self, test_response_ids=None):
+        """
+        Write pending state to the database; restrict to `test_response_ids` when given, which also picks up
+        state buffered by other processes.
+        """
+        with self._lock:
+            if test_response_ids is None:
+                test_response_ids, self._pending = list(self._pending), {}
+            else:
+                for pk in test_response_ids:
+                    self._pending.pop(pk, None)
+        if not test_response_ids:
+            return 0
+        # State stays cached until it expires: deleting it could race with a newer put from another process,
+        # and a state that was already written is skipped by `_write`.
+        states = get_cache().get_many([_state_key(pk) for pk in test_response_ids])
+        batch = {pk: states[_state_key(pk)] for pk in test_response_ids if _state_key(pk) in states}
+        if not batch:
+            return 0
+        started = time.perf_counter()
+        try:
+            written = self._write(batch)
+        except Exception:
+            self.stats['flush_errors'] += 1
+            logger.exception('Autosave flush failed for %d test responses', len(batch))
+            with self._lock:
+                for pk, (_, _, saved_at) in batch.items():
+                    self._pending.setdefault(pk, saved_at)
+            raise
+        elapsed = time.perf_counter() - started
+        self.stats['flushed_total'] += written
+        self.stats['flush_count'] += 1
+        self.stats['last_flush_seconds'] = elapsed
+        self.stats['max_flush_seconds'] = max(self.stats['max_flush_seconds'], elapsed)
+        logger.info('Flushed %d autosaves in %.1fms (depth=%d)', written, elapsed * 1000, self.depth())
+        return written
+
+    def _write(self, batch):
+        rows = TestResponse.objects.select_related('assessment').in_bulk(list(batch))
+        to_update = []
+        for pk, (responses, current_question_index, saved_at) in batch.items():
+            test_response = rows.get(pk)
+            # Submitted tests, rows saved since this state was buffered, and states already written are skipped.
+            if test_response is None or test_response.is_completed or test_response.last_saved_at >= saved_at:
+                continue
+            test_response.responses = responses
+            test_response.current_question_index = current_question_index
+            test_response.revision += 1
+            test_response.last_saved_at = saved_at
+            to_update.append(test_response)
+        TestResponse.objects.bulk_update(
+            to_update, self.UPDATE_FIELDS, batch_size=get_buffer_settings()['BATCH_SIZE'])
+        for user_id in {test_response.assessment.user_id for test_response in to_update}:
+            invalidate_user(user_id)
+        return len(to_update)
+
+    def _ensure_flusher(self):
+        interval = get_buffer_settings()['FLUSH_INTERVAL']
+        if not interval or (self._thread and self._thread.is_alive()):
+            return
+        with self._lock:
+            if self._thread and self._thread.is_alive():
+                return
+            self._stop.clear()
+            self._thread = threading.Thread(
+                target=self._run, args=(interval,), name='autosave-flusher', daemon=True)
+            self._thread.start()
+
+    def _run(self, interval):
+        while not self._stop.wait(interval):
+            close_old_connections()
+            try:
+                self.flush()
+            except Exception:
+                pass  # already logged; the batch stays pending for the next tick
+
+    def stop(self):
+        self._stop.set()
+        if self._thread:
+            self._thread.join()
+        self.flush()
+
+
+autosave_buffer = AutosaveBuffer()
+atexit.register(autosave_buffer.stop)
+
+
+def flush_pending(test_response_id):
+    """Write any buffered state for one test response before it is read or submitted."""
+    if not buffer_enabled():
+        return 0
+    try:
+        pk = int(test_response_id)
+    except (TypeError, ValueError):
+        return 0
+    return autosave_buffer.flush([pk])
@@ -0,0 +1,127 @@
+"""
+Run several API sub-requests inside one HTTP request. The batch is authenticated and passes through the
+middleware once; each sub-request is dispatched straight to its DRF view with the batch's user forced in,
+and per-user cache versions are memoized for the whole batch.
+"""
+import contextvars
+import io
+import json
+import logging
+from concurrent.futures import ThreadPoolExecutor
+from urllib.parse import urlsplit
+
+from django.db import connections
+from django.http import HttpRequest, QueryDict
+from django.urls import Resolver404, resolve
+
+from .cache import request_scope
+
+logger = logging.getLogger(__name__)
+
+API_PREFIX = '/api/'
+MAX_REQUESTS = 10
+MAX_WORKERS = 4
+SAFE_METHODS = {'GET', 'HEAD', 'OPTIONS'}
+ALLOWED_METHODS = SAFE_METHODS | {'POST', 'PUT', 'PATCH', 'DELETE'}
+# Hop-by-hop and batch-level headers that sub-requests must not inherit from the batch request.
+DROPPED_META = ('CONTENT_TYPE', 'CONTENT_LENGTH', 'QUERY_STRING', 'HTTP_IF_NONE_MATCH', 'HTTP_IF_MATCH',
+                'HTTP_IDEMPOTENCY_KEY')
+RESPONSE_HEADERS_SKIPPED = {'content-type', 'content-length', 'vary', 'allow', 'x-frame-options'}
+
+
+class BatchError(ValueError):
+    pass
+
+
+def parse_batch(data):
+    """Validate the batch body; returns ([(id, method, path, body, headers)], parallel). Raises BatchError."""
+    if not isinstance(data, dict) or not isinstance(data.get('requests'), list) or not data['requests']:
+        raise BatchError('requests must be a non-empty list')
+    if len(data['requests']) > MAX_REQUESTS:
+        raise BatchError(f'At most {MAX_REQUESTS} requests per batch')
+    items = []
+    for index, item in enumerate(data['requests']):
+        if not isinstance(item, dict) or not isinstance(item.get('path'), str):
+            raise BatchError(f'requests[{index}] needs a path')
+        method = str(item.get('method', 'GET')).upper()
+        if method not in ALLOWED_METHODS:
+            raise BatchError(f'requests[{index}]: unsupported method {method}')
+        headers = item.get('headers') or {}
+        if not isinstance(headers, dict):
+            raise BatchError(f'requests[{index}]: headers must be an object')
+        items.append((item.get('id', index), method, item['path'], item.get('body'), headers))
+    return items, bool(data.get('parallel'))
+
+
+def build_request(request, method, path, body, headers):
+    """A Django request for one sub-request, carrying the batch's authenticated user and token."""
+    split = urlsplit(path)
+    full_path = split.path if split.path.startswith(API_PREFIX) else API_PREFIX + split.path.lstrip('/')
+    sub = HttpRequest()
+    sub.method = method
+    sub.path = sub.path_info = full_path
+    sub.META = {key: value for key, value in request.META.items() if key not in DROPPED_META}
+    for name, value in headers.items():
+        sub.META['HTTP_' + name.upper().replace('-', '_')] = str(value)
+    sub.META['QUERY_STRING'] = split.query
+    sub.GET = QueryDict(split.query)
+    sub.COOKIES = request.COOKIES
+    raw = json.dumps(body).encode() if body is not None else b''
+    sub.META['CONTENT_TYPE'] = 'application/json'
+    sub.META['CONTENT_LENGTH'] = str(len(raw))
+    sub._body = raw
+    sub._stream = io.BytesIO(raw)
+    sub._read_started = True  # DRF then parses from `_body`
+    sub.user = request.user
+    # DRF honours these in Request.__init__ and skips its authenticators, so the JWT is not decoded again.
+    sub._force_auth_user = request.user
+    sub._force_auth_token = request.auth
+    return sub
+
+
+def execute(request, item):
+    request_id, method, path, body, headers = item
+    try:
+        sub = build_request(request, method, path, body, headers)
+        match = resolve(sub.path_info)
+    except Resolver404:
+        return {'id': request_id, 'status': 404, 'headers': {}, 'body': {'error': f'No route for {path}'}}
+    if not hasattr(match.func, 'cls') or match.url_name == 'batch':
+        return {'id': request_id, 'status': 400, 'headers': {}, 'body': {'error': f'{path} cannot be batched'}}
+    sub.resolver_match = match
+    try:
+        response = match.func(sub, *match.args, **match.kwargs)
+    except Exception:
+        logger.exception('Batched %s %s failed', method, path)
+        return {'id': request_id, 'status': 500, 'headers': {}, 'body': {'error': 'Internal server error'}}
+    if response.streaming:
+        return {'id': request_id, 'status': 400, 'headers': {},
+                'body': {'error': 'Streaming responses cannot be batched'}}
+    return {
+        'id': request_id,
+        'status': response.status_code,
+        'headers': {name: value for name, value in response.headers.items()
+                    if name.lower() not in RESPONSE_HEADERS_SKIPPED},
+        'body': getattr(response, 'data', None),
+    }
+
+
+def _execute_in_thread(request, item):
+    try:
+        return execute(request, item)
+    finally:
+        connections.close_all()  # this worker thread's connections only
+
+
+def run_batch(request, items, parallel=False):
+    """
+    Sub-responses in request order. With `parallel`, batches made only of safe (read) methods run on a
+    small thread pool; anything that writes runs sequentially so later sub-requests see earlier writes.
+    """
+    with request_scope():
+        if not parallel or len(items) == 1 or any(method not in SAFE_METHODS for _, method, _, _, _ in items):
+            return [execute(request, item) for item in items]
+        with ThreadPoolExecutor(max_workers=min(MAX_WORKERS, len(items))) as pool:
+            futures = [pool.submit(contextvars.copy_context().run, _execute_in_thread, request, item)
+                       for item in items]
+            return [future.result() for future in futures]
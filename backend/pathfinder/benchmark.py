@@ -0,0 +1,517 @@
+"""
+Synthetic population seeding and endpoint drivers for the `benchmark` management command.
+"""
+import itertools
+import json
+import random
+import statistics
+import time
+import urllib.error
+import urllib.request
+from concurrent.futures import ThreadPoolExecutor
+from datetime import timedelta
+
+from asgiref.sync import async_to_sync
+from django.conf import settings
+from django.contrib.auth.hashers import make_password
+from django.db import OperationalError, connection, connections, transaction
+from django.test import AsyncClient, Client, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+from rest_framework_simplejwt.tokens import RefreshToken
+
+from .answers import LIKERT_OPTIONS, SUBJECT_OPTIONS
+from .catalog import get_catalog
+from .models import CustomUser, Assessment, TestResponse, QuestionAnswer, ChatMessage
+from .scoring import APTITUDE_QUESTIONS, VALUES_QUESTIONS, SUBJECTS_QUESTION, CAREER_FIELD_QUESTION, COLLEGE_QUESTION
+
+BENCH_PREFIX = 'bench_'
+BENCH_PASSWORD = 'bench-password'
+GRADES = ['8th', '9th', '10th', '11th', '12th']
+
+
+def http(method, url, token=None, body=None, first_chunk=False):
+    """Plain urllib request returning (status, body); `first_chunk` stops after the first line of a stream."""
+    data = json.dumps(body).encode() if body is not None else None
+    request = urllib.request.Request(url, data=data, method=method, headers={'Content-Type': 'application/json'})
+    if token:
+        request.add_header('Authorization', f'Bearer {token}')
+    try:
+        with urllib.request.urlopen(request, timeout=60) as response:
+            return response.status, response.readline() if first_chunk else response.read()
+    except urllib.error.HTTPError as exc:
+        return exc.code, exc.read()
+
+
+def effective_status(path, status, body):
+    """A batch's worst failing sub-response status, so errors inside its 200 envelope are counted."""
+    if status != 200 or not path.rstrip('/').endswith('/batch'):
+        return status
+    failed = [sub['status'] for sub in json.loads(body)['responses'] if sub['status'] >= 400]
+    return max(failed) if failed else status
+
+
+def percentile(sorted_values, fraction):
+    """Nearest-rank percentile of an already sorted list."""
+    if not sorted_values:
+        return None
+    return sorted_values[max(0, min(len(sorted_values) - 1, round(fraction * len(sorted_values)) - 1))]
+
+
+def random_responses(test_type, rng, answered=None):
+    if test_type == 'personal':
+        return {
+            SUBJECTS_QUESTION: rng.sample(SUBJECT_OPTIONS['en'], 3),
+            CAREER_FIELD_QUESTION: 'Engineering',
+            COLLEGE_QUESTION: 'Yes',
+        }
+    questions = list(APTITUDE_QUESTIONS if test_type == 'aptitude' else VALUES_QUESTIONS)
+    return {q: rng.choice(LIKERT_OPTIONS['en']) for q in questions[:answered or len(questions)]}
+
+
+def seed_population(users, assessments_per_user=2, messages_per_user=4, batch_size=1000, seed=0, log=None):
+    """
+    Bulk-create `users` benchmark students (bench_0 .. bench_{users-1}), topping up an existing population.
+    Each gets completed assessments plus one in progress (aptitude and values partly answered) and a chat history.
+    """
+    rng = random.Random(seed)
+    password = make_password(BENCH_PASSWORD)
+    existing = CustomUser.objects.filter(username__startswith=BENCH_PREFIX).count()
+    now = timezone.now()
+    for start in range(existing, users, batch_size):
+        stop = min(start + batch_size, users)
+        with transaction.atomic():
+            created = CustomUser.objects.bulk_create([
+                CustomUser(username=f'{BENCH_PREFIX}{i}', password=password, name=f'Student {i}',
+                           grade=GRADES[i % len(GRADES)], is_setup_complete=True)
+                for i in range(start, stop)
+            ])
+            assessments = Assessment.objects.bulk_create([
+                Assessment(user=user, assessment_number=number,
+                           status='completed' if number < assessments_per_user else 'in_progress',
+                           completed_at=now if number < assessments_per_user else None)
+                for user in created for number in range(1, assessments_per_user + 1)
+            ])
+            test_responses = []
+            for assessment in assessments:
+                if assessment.status == 'completed':
+                    test_responses.extend(
+                        TestResponse(assessment=assessment, test_type=test_type, is_completed=True, submitted_at=now,
+                                     responses=random_responses(test_type, rng), current_question_index=0)
+                        for test_type in ['aptitude', 'values', 'personal'])
+                else:
+                    test_responses.extend(
+                        TestResponse(assessment=assessment, test_type=test_type,
+                                     responses=random_responses(test_type, rng, answered=5), current_question_index=5)
+                        for test_type in ['aptitude', 'values'])
+            TestResponse.objects.bulk_create(test_responses)
+            QuestionAnswer.objects.bulk_create(
+                answer for tr in test_responses if tr.is_completed for answer in QuestionAnswer.from_test_response(tr))
+            ChatMessage.objects.bulk_create([
+                ChatMessage(user=user, message_text=f'Message {n}', sender='user' if n % 2 == 0 else 'bot')
+                for user in created for n in range(messages_per_user)
+            ])
+        if log:
+            log(f'Seeded {stop}/{users} users')
+
+
+def sample_contexts(count, seed=0):
+    """Per-user request context for a random sample of the benchmark population."""
+    ids = list(CustomUser.objects.filter(username__startswith=BENCH_PREFIX).values_list('id', flat=True))
+    if not ids:
+        raise ValueError('No benchmark users; seed a population first')
+    catalog_digest = get_catalog('aptitude', 'en').digest
+    contexts = []
+    for user in CustomUser.objects.filter(id__in=random.Random(seed).sample(ids, min(count, len(ids)))):
+        in_progress = user.assessments.filter(status='in_progress').first()
+        completed = user.assessments.filter(status='completed').first()
+        if in_progress is None or completed is None:
+            continue
+        by_type = {tr.test_type: tr.id for tr in in_progress.test_responses.all()}
+        contexts.append({
+            'user': user,
+            'token': str(RefreshToken.for_user(user).access_token),
+            'assessment_id': in_progress.id,
+            'completed_assessment_id': completed.id,
+            'aptitude_id': by_type['aptitude'],
+            'values_id': by_type['values'],
+            # Exports are incremental; a recent watermark keeps each request to a realistic delta.
+            'export_since': (timezone.now() - timedelta(hours=1)).isoformat().replace('+', '%2B'),
+            'catalog_digest': catalog_digest,
+        })
+    return contexts
+
+
+_unique = itertools.count()
+
+
+def unique_name(prefix):
+    return f'{prefix}{time.time_ns()}_{next(_unique)}'
+
+
+def current_revision(test_response_id):
+    return TestResponse.objects.values_list('revision', flat=True).get(id=test_response_id)
+
+
+def throwaway_token(ctx):
+    user = CustomUser.objects.create(username=unique_name('benchdel_'), password=make_password(None),
+                                     name='Throwaway', grade='10th')
+    return str(RefreshToken.for_user(user).access_token)
+
+
+def admin_token(ctx):
+    admin, _ = CustomUser.objects.get_or_create(
+        username='benchadmin', defaults={'name': 'Benchmark Admin', 'grade': '-', 'is_staff': True})
+    return str(RefreshToken.for_user(admin).access_token)
+
+
+def delta_body(ctx):
+    return {'test_response_id': ctx['aptitude_id'], 'changes': {'1': 'Agree'},
+            'revision': current_revision(ctx['aptitude_id'])}
+
+
+# (name, method, path, body(ctx) or None, prepare(ctx) -> token override or None, streaming)
+ENDPOINTS = [
+    ('setup', 'POST', 'auth/setup/', lambda ctx: {
+        'username': unique_name('benchnew_'), 'password': BENCH_PASSWORD, 'name': 'New Student', 'grade': '10th'},
+     None, False),
+    ('login', 'POST', 'auth/login/', lambda ctx: {
+        'username': ctx['user'].username, 'password': BENCH_PASSWORD}, None, False),
+    ('logout', 'POST', 'auth/logout/', lambda ctx: {'refresh': str(RefreshToken.for_user(ctx['user']))}, None, False),
+    ('token-refresh', 'POST', 'token/refresh/', lambda ctx: {'refresh': str(RefreshToken.for_user(ctx['user']))},
+     None, False),
+    ('home', 'GET', 'home/', None, None, False),
+    ('chatbot-message', 'POST', 'chatbot/message/', lambda ctx: {'message': 'Which stream suits me?'}, None, False),
+    ('chatbot-history', 'GET', 'chatbot/history/', None, None, False),
+    ('question-catalog', 'GET', 'questions/aptitude/en/', None, None, False),
+    ('question-catalog-version', 'GET', 'questions/aptitude/en/{catalog_digest}/', None, None, False),
+    ('start-assessment', 'POST', 'assessment/start/', lambda ctx: {}, None, False),
+    ('get-test', 'GET', 'assessment/{assessment_id}/test/aptitude/', None, None, False),
+    ('save-progress', 'POST', 'assessment/save-progress/', lambda ctx: {
+        'test_response_id': ctx['aptitude_id'], 'answers': {'1': 'Agree'}, 'current_question_index': 1},
+     None, False),
+    ('save-progress-delta', 'PATCH', 'assessment/save-progress/', delta_body, None, False),
+    ('autosave-metrics', 'GET', 'assessment/autosave-metrics/', None, admin_token, False),
+    ('submit-test', 'POST', 'assessment/submit-test/', lambda ctx: {
+        'test_response_id': ctx['values_id'], 'answers': random_responses('values', random.Random())}, None, False),
+    ('processing-status', 'GET', 'assessment/processing-status/{completed_assessment_id}/', None, None, False),
+    ('assessment-history', 'GET', 'assessment/history/', None, None, False),
+    ('assessment-responses', 'GET', 'assessment/{completed_assessment_id}/responses/', None, None, False),
+    ('update-profile', 'PATCH', 'profile/update/', lambda ctx: {'name': 'Updated Student'}, None, False),
+    ('delete-account', 'DELETE', 'profile/delete/', None, throwaway_token, False),
+    ('export', 'GET', 'admin/export/test_responses/?since={export_since}', None, admin_token, False),
+    ('cohort-analytics', 'GET', 'analytics/cohorts/?bucket=week', None, admin_token, False),
+    ('batch', 'POST', 'batch/', lambda ctx: {'requests': [
+        {'id': 'home', 'path': 'home/'}, {'id': 'history', 'path': 'assessment/history/'},
+        {'id': 'chat', 'path': 'chatbot/history/'}]}, None, False),
+    ('metrics', 'GET', 'metrics/', None, admin_token, False),
+    ('async-home', 'GET', 'async/home/', None, None, False),
+    ('async-chatbot-message', 'POST', 'async/chatbot/message/', lambda ctx: {'message': 'hello'}, None, False),
+    ('async-chatbot-history', 'GET', 'async/chatbot/history/', None, None, False),
+    ('async-save-progress', 'PATCH', 'async/assessment/save-progress/', delta_body, None, False),
+    ('async-events-ticket', 'POST', 'async/events/ticket/', None, None, False),
+    ('async-events', 'GET', 'async/events/', None, None, True),
+]
+
+
+def summarize(name, method, path, samples, elapsed, count_queries):
+    """samples: list of (latency_seconds, status, query_count)."""
+    latencies = sorted(latency * 1000 for latency, _, _ in samples)
+    queries = [q for _, _, q in samples if q is not None]
+    statuses = {}
+    for _, code, _ in samples:
+        statuses[str(code)] = statuses.get(str(code), 0) + 1
+    return {
+        'name': name,
+        'method': method,
+        'path': path,
+        'requests': len(samples),
+        'errors': sum(1 for _, code, _ in samples if code >= 400),
+        'status_codes': statuses,
+        'throughput_rps': round(len(samples) / elapsed, 2) if elapsed else None,
+        'latency_ms': {
+            'mean': round(statistics.fmean(latencies), 3),
+            'p50': round(percentile(latencies, 0.50), 3),
+            'p95': round(percentile(latencies, 0.95), 3),
+            'p99': round(percentile(latencies, 0.99), 3),
+        },
+        'queries': {'mean': round(statistics.fmean(queries), 2), 'max': max(queries)}
+                   if count_queries and queries else None,
+    }
+
+
+class ClientDriver:
+    """In-process driver: Django test clients, with per-request query counts."""
+
+    count_queries = True
+
+    def __init__(self):
+        self.client = Client()
+        self.async_client = AsyncClient()
+        # The test clients send Host: testserver, as under the test runner.
+        self.allow_testserver = override_settings(ALLOWED_HOSTS=[*settings.ALLOWED_HOSTS, 'testserver'])
+
+    def __enter__(self):
+        self.allow_testserver.enable()
+        return self
+
+    def __exit__(self, *exc_info):
+        self.allow_testserver.disable()
+
+    def request(self, method, path, token, body, streaming):
+        headers = {'Authorization': f'Bearer {token}'} if token else {}
+        kwargs = {'content_type': 'application/json', 'headers': headers}
+        if body is not None:
+            kwargs['data'] = json.dumps(body)
+        with CaptureQueriesContext(connection) as queries:
+            started = time.perf_counter()
+            if path.startswith('/api/async/'):
+                status = async_to_sync(self.async_request)(method, path, kwargs, streaming)
+            else:
+                response = getattr(self.client, method.lower())(path, **kwargs)
+                if response.streaming:
+                    b''.join(response.streaming_content)
+                    status = response.status_code
+                else:
+                    status = effective_status(path, response.status_code, response.content)
+            latency = time.perf_counter() - started
+        return latency, status, len(queries)
+
+    async def async_request(self, method, path, kwargs, streaming):
+        response = await getattr(self.async_client, method.lower())(path, **kwargs)
+        if streaming and response.status_code == 200:
+            stream = aiter(response.streaming_content)
+            await anext(stream)
+            await stream.aclose()
+        return response.status_code
+
+
+class HttpDriver:
+    """External-process driver against a running server sharing the benchmark database; no query counts."""
+
+    count_queries = False
+
+    def __init__(self, base_url):
+        self.base_url = base_url.rstrip('/')
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        pass
+
+    def request(self, method, path, token, body, streaming):
+        started = time.perf_counter()
+        status, content = http(method, f'{self.base_url}{path[len("/api"):]}', token, body, first_chunk=streaming)
+        return time.perf_counter() - started, effective_status(path, status, content), None
+
+
+def run_endpoint(driver, endpoint, contexts, requests, concurrency=1):
+    """Time `requests` calls to one endpoint; per-request setup (tokens, bodies) happens outside the timing."""
+    name, method, path, body_fn, prepare, streaming = endpoint
+
+    def one(i):
+        ctx = contexts[i % len(contexts)]
+        token = prepare(ctx) if prepare else ctx['token']
+        body = body_fn(ctx) if body_fn else None
+        return driver.request(method, '/api/' + path.format(**ctx), token, body, streaming)
+
+    started = time.perf_counter()
+    if concurrency > 1:
+        with ThreadPoolExecutor(max_workers=concurrency) as pool:
+            samples = list(pool.map(one, range(requests)))
+    else:
+        samples = [one(i) for i in range(requests)]
+    elapsed = sum(latency for latency, _, _ in samples) if concurrency == 1 else time.perf_counter() - started
+    return summarize(name, method, '/api/' + path, samples, elapsed, driver.count_queries)
+
+
+def compare_reports(report, baseline, max_regression):
+    """Endpoints whose p95 latency grew by more than `max_regression` (a fraction) or whose query count grew."""
+    previous = {row['name']: row for row in baseline['endpoints']}
+    regressions = []
+    for row in report['endpoints']:
+        before = previous.get(row['name'])
+        if before is None:
+            continue
+        old_p95, new_p95 = before['latency_ms']['p95'], row['latency_ms']['p95']
+        if old_p95 and new_p95 > old_p95 * (1 + max_regression):
+            regressions.append(f'{row["name"]}: p95 {old_p95}ms -> {new_p95}ms')
+        if before.get('queries') and row.get('queries') and row['queries']['max'] > before['queries']['max']:
+            regressions.append(f'{row["name"]}: queries {before["queries"]["max"]} -> {row["queries"]["max"]}')
+    return regressions
+
+
+def describe_database(using='default'):
+    """Engine and the settings that matter for write concurrency, as actually in effect on a connection."""
+    conn = connections[using]
+    profile = {
+        'vendor': conn.vendor,
+        'conn_max_age': conn.settings_dict['CONN_MAX_AGE'],
+        'pool': bool(conn.settings_dict.get('OPTIONS', {}).get('pool')),
+    }
+    if conn.vendor == 'sqlite':
+        with conn.cursor() as cursor:
+            for pragma in ['journal_mode', 'synchronous', 'busy_timeout', 'mmap_size']:
+                cursor.execute(f'PRAGMA {pragma}')
+                row = cursor.fetchone()  # in-memory databases report no mmap_size
+                profile[pragma] = row[0] if row else None
+        profile['transaction_mode'] = conn.settings_dict.get('OPTIONS', {}).get('transaction_mode', 'DEFERRED')
+    return profile
+
+
+def seed_autosave_writers(writers):
+    password = make_password(None)
+    test_responses = []
+    for i in range(writers):
+        user, _ = CustomUser.objects.get_or_create(
+            username=f'autosavebench_{i}', defaults={'password': password, 'name': f'Writer {i}', 'grade': '10th'})
+        assessment, _ = Assessment.objects.get_or_create(user=user, assessment_number=1)
+        test_response, _ = TestResponse.objects.get_or_create(assessment=assessment, test_type='aptitude')
+        TestResponse.objects.filter(id=test_response.id).update(is_completed=False, revision=0, responses={})
+        test_responses.append((user, test_response.id))
+    return test_responses
+
+
+def run_autosave_benchmark(writers, saves_per_writer, mode='full'):
+    """
+    Concurrent autosave writers, one thread (and so one connection) each, calling the same save path as the
+    view. Lock timeouts count as errors rather than aborting the run.
+    """
+    from .views import save_progress, save_progress_delta
+
+    targets = seed_autosave_writers(writers)
+    questions = list(APTITUDE_QUESTIONS)
+
+    def writer(target):
+        user, test_response_id = target
+        samples = []
+        revision = 0
+        try:
+            for n in range(saves_per_writer):
+                answered = {q: LIKERT_OPTIONS['en'][n % 5] for q in questions[:n % len(questions) + 1]}
+                started = time.perf_counter()
+                try:
+                    if mode == 'delta':
+                        code, payload = save_progress_delta(user, {
+                            'test_response_id': test_response_id, 'revision': revision,
+                            'changes': {questions[n % len(questions)]: LIKERT_OPTIONS['en'][n % 5]}})
+                        revision = payload.get('revision', revision)
+                    else:
+                        code, _ = save_progress(user, {
+                            'test_response_id': test_response_id, 'answers': answered, 'current_question_index': n})
+                except OperationalError:
+                    code = 503
+                samples.append((time.perf_counter() - started, code, None))
+        finally:
+            connection.close()
+        return samples
+
+    started = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=writers) as pool:
+        samples = [sample for result in pool.map(writer, targets) for sample in result]
+    elapsed = time.perf_counter() - started
+    return {
+        'database': describe_database(),
+        'writers': writers,
+        'mode': mode,
+        **summarize(f'autosave-{mode}', 'POST' if mode == 'full' else 'PATCH', 'assessment/save-progress/',
+                    samples, elapsed, False),
+    }
+
+
+def drf_payloads(user):
+    """The read endpoints' payloads built the ModelSerializer way, as before the projection fast path."""
+    from .serializers import UserSerializer, AssessmentSerializer, ChatMessageSerializer
+
+    assessments = list(Assessment.objects.filter(
+        user=user, status__in=['in_progress', 'completed']).with_test_responses())
+    stats = Assessment.objects.filter(user=user).completion_stats()
+    saved = next((a for a in assessments if a.status == 'in_progress'), None)
+    completed = Assessment.objects.filter(user=user, status='completed').with_test_responses().order_by('-completed_at')
+    messages = list(ChatMessage.objects.filter(user=user).order_by('-created_at', '-id')[:50])[::-1]
+    one = Assessment.objects.with_test_responses().filter(user=user).order_by('id').first()
+    return {
+        'home': {
+            'user_profile': UserSerializer(user).data,
+            'saved_assessment': AssessmentSerializer(saved).data if saved else None,
+            'completed_assessments': AssessmentSerializer(
+                [a for a in assessments if a.status == 'completed'], many=True).data,
+            'completion_stats': {'total_assessments': stats['total_assessments'],
+                                 'completed_percentage': round(stats['completed_percentage'], 2)},
+        },
+        'history': {'completed_assessments': AssessmentSerializer(completed, many=True).data},
+        'chat-history': {'messages': ChatMessageSerializer(messages, many=True).data},
+        'assessment-responses': {
+            'assessment': AssessmentSerializer(one).data,
+            'test_responses': [{'test_type': tr.test_type, 'answers': tr.responses}
+                               for tr in one.test_responses.all() if tr.is_completed],
+        },
+    }
+
+
+def fast_payloads(user):
+    from .projections import CHAT_MESSAGE, assessment_data
+    from .views import HomeAPIView
+
+    assessments = assessment_data(Assessment.objects.filter(user=user, status__in=['in_progress', 'completed']))
+    stats = Assessment.objects.filter(user=user).completion_stats()
+    messages = list(ChatMessage.objects.filter(user=user).order_by('-created_at', '-id')
+                    .values(*CHAT_MESSAGE.sources)[:50])[::-1]
+    [one] = assessment_data(Assessment.objects.filter(user=user).order_by('id')[:1])
+    return {
+        'home': HomeAPIView.serialize(user, assessments, stats),
+        'history': {'completed_assessments': assessment_data(
+            Assessment.objects.filter(user=user, status='completed').order_by('-completed_at'))},
+        'chat-history': {'messages': CHAT_MESSAGE.many(messages)},
+        'assessment-responses': {
+            'assessment': one,
+            'test_responses': [{'test_type': tr['test_type'], 'answers': tr['responses']}
+                               for tr in one['test_responses'] if tr['is_completed']],
+        },
+    }
+
+
+def run_serialization_benchmark(contexts, repeat=5):
+    """
+    Build and render the read endpoints' payloads both ways for each sampled user. Reports per-endpoint time
+    (queries + serialization + rendering) for each path, render-only time, and whether the bytes are identical.
+    """
+    from rest_framework.renderers import JSONRenderer
+    from .renderers import FastJSONRenderer, orjson
+
+    drf_renderer, fast_renderer = JSONRenderer(), FastJSONRenderer()
+    timings = {}
+    mismatches = []
+
+    def timed(key, fn):
+        started = time.perf_counter()
+        result = fn()
+        timings.setdefault(key, []).append(time.perf_counter() - started)
+        return result
+
+    for _ in range(repeat):
+        for ctx in contexts:
+            user = ctx['user']
+            drf = timed('drf', lambda: {name: drf_renderer.render(payload)
+                                        for name, payload in drf_payloads(user).items()})
+            payloads = timed('fast-build', lambda: fast_payloads(user))
+            fast = timed('fast-render', lambda: {name: fast_renderer.render(payload)
+                                                 for name, payload in payloads.items()})
+            timed('drf-render', lambda: [drf_renderer.render(payload) for payload in payloads.values()])
+            mismatches += [(user.username, name) for name in drf if drf[name] != fast[name]]
+
+    def ms(key):
+        return round(statistics.mean(timings[key]) * 1000, 3)
+
+    return {
+        'users': len(contexts),
+        'repeat': repeat,
+        'orjson': orjson is not None,
+        'drf_ms': ms('drf'),
+        'fast_ms': round(ms('fast-build') + ms('fast-render'), 3),
+        'render_drf_ms': ms('drf-render'),
+        'render_fast_ms': ms('fast-render'),
+        'speedup': round(ms('drf') / (ms('fast-build') + ms('fast-render')), 2),
+        'mismatches': mismatches[:10],
+    }
@@ -0,0 +1,102 @@
+import contextvars
+import time
+from contextlib import contextmanager
+
+from django.conf import settings
+from django.core.cache import caches
+from django.core.cache.backends.dummy import DummyCache
+from django.core.cache.backends.locmem import LocMemCache
+from django.db import transaction
+from rest_framework import status
+from rest_framework.response import Response
+
+PAYLOAD_TIMEOUT = getattr(settings, 'PATHFINDER_PAYLOAD_CACHE_TIMEOUT', 300)
+
+# user_id -> version, memoized while a request_scope() is active (e.g. for the sub-requests of a batch)
+_scoped_versions = contextvars.ContextVar('pathfinder_scoped_versions', default=None)
+
+
+def get_cache():
+    return caches[getattr(settings, 'PATHFINDER_CACHE_ALIAS', 'default')]
+
+
+def is_shared_cache():
+    """Whether the cache is visible to every process (Redis, files), rather than per-process locmem/dummy."""
+    return not isinstance(get_cache(), (LocMemCache, DummyCache))
+
+
+def _version_key(user_id):
+    return f'pathfinder:user:{user_id}:version'
+
+
+@contextmanager
+def request_scope():
+    """Look each user's cache version up once for the duration of the block; bumps still take effect."""
+    token = _scoped_versions.set({})
+    try:
+        yield
+    finally:
+        _scoped_versions.reset(token)
+
+
+def get_user_version(user_id):
+    """Current cache version for a user; seeded from the clock so evictions never reuse a stamp."""
+    scoped = _scoped_versions.get()
+    if scoped is not None and user_id in scoped:
+        return scoped[user_id]
+    cache = get_cache()
+    key = _version_key(user_id)
+    version = cache.get(key)
+    if version is None:
+        version = time.time_ns()
+        if not cache.add(key, version, None):
+            version = cache.get(key, version)
+    if scoped is not None:
+        scoped[user_id] = version
+    return version
+
+
+def bump_user_version(user_id):
+    scoped = _scoped_versions.get()
+    if scoped is not None:
+        scoped.pop(user_id, None)
+    cache = get_cache()
+    try:
+        cache.incr(_version_key(user_id))
+    except ValueError:
+        cache.set(_version_key(user_id), time.time_ns(), None)
+
+
+def invalidate_user(user_id):
+    """Bump the user's version once the surrounding transaction commits."""
+    transaction.on_commit(lambda: bump_user_version(user_id))
+
+
+def make_etag(user_id, name, version):
+    return f'"{name}-{user_id}-{version}"'
+
+
+def payload_key(user_id, name, version):
+    return f'pathfinder:user:{user_id}:{name}:{version}'
+
+
+def etag_matches(request, etag):
+    if_none_match = request.META.get('HTTP_IF_NONE_MATCH', '')
+    return etag in [tag.strip() for tag in if_none_match.split(',')]
+
+
+def cached_user_response(request, name, builder):
+    """Serve a per-user payload from cache with ETag/304 support, rebuilding it on a version miss."""
+    user_id = request.user.pk
+    version = get_user_version(user_id)
+    etag = make_etag(user_id, name, version)
+    headers = {'ETag': etag, 'Cache-Control': 'private, no-cache'}
+    if etag_matches(request, etag):
+        return Response(status=status.HTTP_304_NOT_MODIFIED, headers=headers)
+    cache = get_cache()
+    key = payload_key(user_id, name, version)
+    payload = cache.get(key)
+    if payload is None:
+        payload = builder()
+        cache.set(key, payload, PAYLOAD_TIMEOUT)
+    return Response(payload, headers=headers)
@@ -0,0 +1,180 @@
+"""
+Per-(test_type, language) question catalogs, compiled once into immutable JSON documents named by their
+content hash and kept gzipped in an in-process LRU. Question edits bump a shared version stamp, so the
+next request recompiles; unchanged catalogs keep their hash and ETag across versions and processes.
+"""
+import gzip
+import hashlib
+import json
+import threading
+import time
+from collections import OrderedDict
+
+from django.conf import settings
+from django.db import transaction
+from django.db.models import Count, Max
+from django.http import Http404, HttpResponse, HttpResponseNotModified
+from django.urls import reverse
+from django.views.decorators.http import require_GET
+
+from .cache import etag_matches, get_cache, is_shared_cache
+from .models import Question
+
+CATALOG_LRU_SIZE = getattr(settings, 'PATHFINDER_CATALOG_LRU_SIZE', 64)
+VERSION_KEY = 'pathfinder:catalog:version'
+IMMUTABLE = 'public, max-age=31536000, immutable'
+
+
+class CompiledCatalog:
+    __slots__ = ('digest', 'body', 'gzipped')
+
+    def __init__(self, body):
+        self.digest = hashlib.sha256(body).hexdigest()[:32]
+        self.body = body
+        self.gzipped = gzip.compress(body, compresslevel=9, mtime=0)
+
+    def etag(self, encoding=None):
+        return f'"{self.digest}-gzip"' if encoding == 'gzip' else f'"{self.digest}"'
+
+
+class LRUCache:
+    def __init__(self, max_size):
+        self.max_size = max_size
+        self._items = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        with self._lock:
+            value = self._items.get(key)
+            if value is not None:
+                self._items.move_to_end(key)
+            return value
+
+    def set(self, key, value):
+        with self._lock:
+            self._items[key] = value
+            self._items.move_to_end(key)
+            while len(self._items) > self.max_size:
+                self._items.popitem(last=False)
+
+    def clear(self):
+        with self._lock:
+            self._items.clear()
+
+
+# (test_type, language, version) and (test_type, language, digest) -> CompiledCatalog
+catalogs = LRUCache(CATALOG_LRU_SIZE)
+
+
+def get_catalog_version():
+    """
+    A stamp that changes whenever questions do: a counter in the cache when it is shared between processes,
+    otherwise the questions' latest update time and count, so a per-process cache never serves stale catalogs.
+    """
+    if not is_shared_cache():
+        stamp = Question.objects.aggregate(updated=Max('updated_at'), count=Count('id'))
+        return stamp['updated'], stamp['count']
+    cache = get_cache()
+    version = cache.get(VERSION_KEY)
+    if version is None:
+        version = time.time_ns()
+        if not cache.add(VERSION_KEY, version, None):
+            version = cache.get(VERSION_KEY, version)
+    return version
+
+
+def invalidate_catalogs():
+    """Move every process to a new catalog version once the surrounding transaction commits."""
+    transaction.on_commit(lambda: get_cache().set(VERSION_KEY, time.time_ns(), None))
+
+
+def build_catalog(test_type, language):
+    questions = Question.objects.filter(test_type=test_type, is_active=True).order_by('question_number')
+    return {
+        'test_type': test_type,
+        'language': language,
+        'questions': [{
+            'id': question.question_number,
+            'type': question.question_type,
+            'text': question.get_question_text(language),
+            'options': question.get_options(language),
+        } for question in questions],
+    }
+
+
+def compile_catalog(test_type, language):
+    document = build_catalog(test_type, language)
+    return CompiledCatalog(json.dumps(document, ensure_ascii=False, separators=(',', ':')).encode())
+
+
+def get_catalog(test_type, language):
+    """The current compiled catalog, from the LRU unless questions changed since it was compiled."""
+    key = (test_type, language, get_catalog_version())
+    catalog = catalogs.get(key)
+    if catalog is None:
+        catalog = compile_catalog(test_type, language)
+        previous = catalogs.get((test_type, language, catalog.digest))
+        catalog = previous or catalog  # reuse the identical document, and its gzip, when content is unchanged
+        catalogs.set(key, catalog)
+        catalogs.set((test_type, language, catalog.digest), catalog)
+    return catalog
+
+
+def accepts_gzip(accept_encoding):
+    """Whether an Accept-Encoding header allows gzip, honouring q-values (`gzip;q=0` refuses it)."""
+    qualities = {}
+    for item in accept_encoding.split(','):
+        coding, _, params = item.partition(';')
+        quality = 1.0
+        for param in params.split(';'):
+            name, _, value = param.strip().partition('=')
+            if name.lower() == 'q':
+                try:
+                    quality = float(value)
+                except ValueError:
+                    quality = 0.0
+        if coding.strip():
+            qualities[coding.strip().lower()] = quality
+    return qualities.get('gzip', qualities.get('*', 0.0)) > 0
+
+
+def catalog_response(request, test_type, language, catalog, cache_control):
+    gzip_ok = accepts_gzip(request.headers.get('Accept-Encoding', ''))
+    headers = {
+        'ETag': catalog.etag('gzip' if gzip_ok else None),
+        'Cache-Control': cache_control,
+        'Vary': 'Accept-Encoding',
+        'Content-Location': reverse('question-catalog-version', args=[test_type, language, catalog.digest]),
+    }
+    if etag_matches(request, catalog.etag()) or etag_matches(request, catalog.etag('gzip')):
+        return HttpResponseNotModified(headers=headers)
+    response = HttpResponse(catalog.gzipped if gzip_ok else catalog.body,
+                            content_type='application/json; charset=utf-8', headers=headers)
+    if gzip_ok:
+        response['Content-Encoding'] = 'gzip'
+    return response
+
+
+def _check(test_type, language):
+    if test_type not in dict(Question.TEST_TYPE_CHOICES) or language not in Question.LANGUAGES:
+        raise Http404('Unknown test type or language')
+
+
+@require_GET
+def question_catalog(request, test_type, language):
+    """Current catalog; revalidate with If-None-Match, or follow Content-Location to the immutable copy."""
+    _check(test_type, language)
+    return catalog_response(request, test_type, language, get_catalog(test_type, language), 'no-cache')
+
+
+@require_GET
+def question_catalog_version(request, test_type, language, digest):
+    """A catalog by content hash; never changes, so clients may cache it indefinitely."""
+    _check(test_type, language)
+    catalog = catalogs.get((test_type, language, digest))
+    if catalog is None:
+        current = get_catalog(test_type, language)
+        if current.digest != digest:
+            raise Http404('Unknown catalog version')
+        catalog = current
+    return catalog_response(request, test_type, language, catalog, IMMUTABLE)
@@ -0,0 +1,110 @@
+import re
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.utils.module_loading import import_string
+
+
+class ResponseGenerator:
+    """
+    Interface for chatbot backends. Subclasses implement `stream`, yielding the reply in chunks;
+    `generate` returns the whole reply.
+    """
+
+    def stream(self, message, language='en', context=None):
+        raise NotImplementedError
+
+    def generate(self, message, language='en', context=None):
+        return ''.join(self.stream(message, language, context))
+
+    async def astream(self, message, language='en', context=None):
+        """Async chunk iterator; backends doing network I/O should override this natively."""
+        iterator = iter(self.stream(message, language, context))
+        while (chunk := await sync_to_async(next)(iterator, None)) is not None:
+            yield chunk
+
+
+class RuleBasedGenerator(ResponseGenerator):
+    """Keyword-matched templates, filled in from the student's assessment results when available."""
+
+    INTENTS = [
+        ('greeting', r'\b(hi|hello|hey|namaste)\b'),
+        ('results', r'\b(result|results|score|scores|report)\b'),
+        ('stream', r'\b(stream|science|commerce|arts|humanities|pcm|pcb)\b'),
+        ('career', r'\b(career|careers|job|jobs|profession|future)\b'),
+        ('strengths', r'\b(strength|strengths|good at|skills?)\b'),
+        ('college', r'\b(college|university|degree|exam|entrance)\b'),
+        ('thanks', r'\b(thanks|thank you|dhanyavad)\b'),
+    ]
+
+    TEMPLATES = {
+        'en': {
+            'greeting': 'Hello {name}! I can help you understand your assessment results and explore streams and careers.',
+            'results': 'Your strongest match is {top_stream}. Your top areas are {strengths}.',
+            'stream': 'Based on your answers, {top_stream} suits you best, followed by {second_stream}.',
+            'career': 'Careers that fit your profile include {careers}.',
+            'strengths': 'Your assessment shows strengths in {strengths}.',
+            'college': 'Talk to your teachers about entrance exams for {top_stream}; planning early helps.',
+            'thanks': "You're welcome! Ask me anything else about your results.",
+            'no_results': 'Complete all three tests and I can give you personalised stream and career suggestions.',
+            'fallback': 'I can answer questions about your results, streams, strengths and career options.',
+        },
+        'hi': {
+            'greeting': 'नमस्ते {name}! मैं आपके मूल्यांकन परिणाम समझने और स्ट्रीम व करियर चुनने में मदद कर सकता हूँ।',
+            'results': 'आपके लिए सबसे उपयुक्त स्ट्रीम {top_stream} है। आपकी मुख्य क्षमताएँ: {strengths}।',
+            'stream': 'आपके उत्तरों के आधार पर {top_stream} सबसे उपयुक्त है, उसके बाद {second_stream}।',
+            'career': 'आपके लिए उपयुक्त करियर: {careers}।',
+            'strengths': 'आपकी मुख्य क्षमताएँ: {strengths}।',
+            'college': '{top_stream} की प्रवेश परीक्षाओं के बारे में अपने शिक्षकों से बात करें।',
+            'thanks': 'आपका स्वागत है! परिणामों के बारे में और कुछ भी पूछें।',
+            'no_results': 'तीनों टेस्ट पूरे करें, फिर मैं आपको स्ट्रीम और करियर सुझाव दे सकूँगा।',
+            'fallback': 'मैं आपके परिणाम, स्ट्रीम, क्षमताओं और करियर विकल्पों के बारे में बता सकता हूँ।',
+        },
+    }
+
+    RESULT_INTENTS = {'results', 'stream', 'career', 'strengths', 'college'}
+
+    def classify(self, message):
+        text = message.lower()
+        for intent, pattern in self.INTENTS:
+            if re.search(pattern, text):
+                return intent
+        return 'fallback'
+
+    def render(self, message, language, context):
+        context = context or {}
+        templates = self.TEMPLATES.get(language, self.TEMPLATES['en'])
+        intent = self.classify(message)
+        results = context.get('results')
+        if intent in self.RESULT_INTENTS and results is None:
+            intent = 'no_results'
+        streams = [s['stream'] for s in results.recommended_streams] if results else []
+        user = context.get('user')
+        return templates[intent].format(
+            name=getattr(user, 'name', '') or '',
+            top_stream=streams[0] if streams else '',
+            second_stream=streams[1] if len(streams) > 1 else '',
+            strengths=', '.join(s.replace('_', ' ') for s in results.strengths) if results and results.strengths else '-',
+            careers=', '.join(results.career_paths) if results else '',
+        )
+
+    def stream(self, message, language='en', context=None):
+        for word in re.findall(r'\S+\s*', self.render(message, language, context)):
+            yield word
+
+
+def get_generator():
+    backend = getattr(settings, 'PATHFINDER_CHATBOT_BACKEND', 'pathfinder.chatbot.RuleBasedGenerator')
+    return import_string(backend)()
+
+
+def generate_bot_response(message, language='en', context=None):
+    return get_generator().generate(message, language, context)
+
+
+def stream_bot_response(message, language='en', context=None):
+    return get_generator().stream(message, language, context)
+
+
+def astream_bot_response(message, language='en', context=None):
+    return get_generator().astream(message, language, context)
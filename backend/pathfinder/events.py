@@ -0,0 +1,145 @@
+"""
+Per-user server-sent events. Brokers fan events out to open streams; EventSource cannot send headers, so a
+stream is opened with a short-lived signed ticket rather than an access token in the URL.
+"""
+import abc
+import asyncio
+import json
+import threading
+
+from django.conf import settings
+from django.core import signing
+from django.core.exceptions import ImproperlyConfigured
+from django.db import transaction
+from django.utils.module_loading import import_string
+
+HEARTBEAT_SECONDS = 15
+TICKET_MAX_AGE = getattr(settings, 'PATHFINDER_EVENT_TICKET_MAX_AGE', 30)
+TICKET_SALT = 'pathfinder.events.ticket'
+
+
+class EventBroker(abc.ABC):
+    """
+    Per-user pub/sub. `publish` is called from sync code; `subscribe` is an async iterator of
+    event dicts that yields None after HEARTBEAT_SECONDS of silence so callers can send keep-alives.
+    """
+    # Whether events published in one process reach subscribers in another (e.g. the process_jobs worker's).
+    cross_process = False
+
+    @abc.abstractmethod
+    def publish(self, user_id, event, data):
+        pass
+
+    @abc.abstractmethod
+    def subscribe(self, user_id):
+        pass
+
+
+class InMemoryBroker(EventBroker):
+    """
+    Delivers only to subscribers in this process. results_ready comes from the process_jobs worker, so
+    streams poll for it instead; use RedisBroker to push it, and whenever several web workers serve streams.
+    """
+
+    def __init__(self):
+        self._subscribers = {}
+        self._lock = threading.Lock()
+
+    def subscriber_count(self, user_id):
+        return len(self._subscribers.get(user_id, ()))
+
+    def publish(self, user_id, event, data):
+        message = {'event': event, 'data': data}
+        with self._lock:
+            subscribers = list(self._subscribers.get(user_id, ()))
+        for loop, queue in subscribers:
+            loop.call_soon_threadsafe(queue.put_nowait, message)
+
+    async def subscribe(self, user_id):
+        entry = (asyncio.get_running_loop(), asyncio.Queue())
+        with self._lock:
+            self._subscribers.setdefault(user_id, set()).add(entry)
+        try:
+            while True:
+                try:
+                    yield await asyncio.wait_for(entry[1].get(), HEARTBEAT_SECONDS)
+                except asyncio.TimeoutError:
+                    yield None
+        finally:
+            with self._lock:
+                self._subscribers[user_id].discard(entry)
+                if not self._subscribers[user_id]:
+                    del self._subscribers[user_id]
+
+
+class RedisBroker(EventBroker):
+    """Cross-process delivery over Redis pub/sub; requires the `redis` package."""
+    cross_process = True
+
+    def __init__(self):
+        try:
+            import redis
+        except ImportError as exc:
+            raise ImproperlyConfigured('RedisBroker requires the redis package') from exc
+        self.url = getattr(settings, 'PATHFINDER_EVENT_REDIS_URL', None) or settings.CACHE_URL
+        self.client = redis.Redis.from_url(self.url)
+
+    def channel(self, user_id):
+        return f'pathfinder:events:{user_id}'
+
+    def publish(self, user_id, event, data):
+        self.client.publish(self.channel(user_id), json.dumps({'event': event, 'data': data}))
+
+    async def subscribe(self, user_id):
+        import redis.asyncio
+        client = redis.asyncio.Redis.from_url(self.url)
+        pubsub = client.pubsub()
+        await pubsub.subscribe(self.channel(user_id))
+        try:
+            while True:
+                message = await pubsub.get_message(ignore_subscribe_messages=True, timeout=HEARTBEAT_SECONDS)
+                yield json.loads(message['data']) if message else None
+        finally:
+            await pubsub.unsubscribe(self.channel(user_id))
+            await client.aclose()
+
+
+_broker = None
+
+
+def get_broker():
+    global _broker
+    if _broker is None:
+        _broker = import_string(getattr(settings, 'PATHFINDER_EVENT_BROKER', 'pathfinder.events.InMemoryBroker'))()
+    return _broker
+
+
+def publish_event(user_id, event, data):
+    """Publish once the surrounding transaction commits, so listeners never see uncommitted state."""
+    transaction.on_commit(lambda: get_broker().publish(user_id, event, data))
+
+
+def results_ready_data(assessment_id):
+    return {
+        'assessment_id': assessment_id,
+        'redirect_url': f'/chatbot/?show_results=true&assessment_id={assessment_id}',
+    }
+
+
+def issue_ticket(user_id):
+    """A signed ticket that opens `user_id`'s event stream for TICKET_MAX_AGE seconds."""
+    return signing.TimestampSigner(salt=TICKET_SALT).sign(str(user_id))
+
+
+def ticket_user_id(ticket):
+    """The user id a ticket was issued to, or None if it is forged or expired."""
+    try:
+        return int(signing.TimestampSigner(salt=TICKET_SALT).unsign(ticket, max_age=TICKET_MAX_AGE))
+    except (signing.BadSignature, ValueError):
+        return None
+
+
+def format_sse(message):
+    if message is None:
+        return ': ping\n\n'
+    return f'event: {message["event"]}\ndata: {json.dumps(message["data"], default=str)}\n\n'
@@ -0,0 +1,187 @@
+"""
+Constant-memory bulk export of assessments, test responses and normalized answers, shared by the
+`export_data` command and the admin export API.
+"""
+import csv
+import io
+import json
+from datetime import timedelta, timezone as dt_timezone
+
+from django.conf import settings
+from django.core.exceptions import ImproperlyConfigured
+from django.core.serializers.json import DjangoJSONEncoder
+from django.utils import timezone
+from django.utils.dateparse import parse_datetime
+
+from .autosave import buffer_enabled, get_buffer_settings
+from .models import Assessment, TestResponse, QuestionAnswer
+
+CHUNK_SIZE = 2000
+# Watermarks are stamped before their transaction commits, so an export stops this many seconds behind now;
+# it must exceed the longest write transaction. Buffered autosaves add their flush interval on top.
+SAFETY_LAG = getattr(settings, 'PATHFINDER_EXPORT_SAFETY_LAG', 60)
+FORMATS = {
+    'ndjson': 'application/x-ndjson',
+    'csv': 'text/csv',
+    'parquet': 'application/vnd.apache.parquet',
+}
+
+# kind -> (queryset, watermark field, [(column, values() lookup, type)])
+EXPORTS = {
+    'assessments': (Assessment.objects.filter(completed_at__isnull=False), 'completed_at', [
+        ('id', 'id', 'int'),
+        ('user_id', 'user_id', 'int'),
+        ('username', 'user__username', 'str'),
+        ('grade', 'user__grade', 'str'),
+        ('assessment_number', 'assessment_number', 'int'),
+        ('status', 'status', 'str'),
+        ('started_at', 'started_at', 'datetime'),
+        ('completed_at', 'completed_at', 'datetime'),
+        ('recommended_streams', 'results__recommended_streams', 'json'),
+        ('strengths', 'results__strengths', 'json'),
+        ('career_paths', 'results__career_paths', 'json'),
+    ]),
+    'test_responses': (TestResponse.objects.all(), 'last_saved_at', [
+        ('id', 'id', 'int'),
+        ('assessment_id', 'assessment_id', 'int'),
+        ('user_id', 'assessment__user_id', 'int'),
+        ('test_type', 'test_type', 'str'),
+        ('is_completed', 'is_completed', 'bool'),
+        ('current_question_index', 'current_question_index', 'int'),
+        ('total_questions', 'total_questions', 'int'),
+        ('revision', 'revision', 'int'),
+        ('started_at', 'started_at', 'datetime'),
+        ('submitted_at', 'submitted_at', 'datetime'),
+        ('last_saved_at', 'last_saved_at', 'datetime'),
+        ('responses', 'responses', 'json'),
+    ]),
+    'answers': (QuestionAnswer.objects.all(), 'answered_at', [
+        ('id', 'id', 'int'),
+        ('test_response_id', 'test_response_id', 'int'),
+        ('assessment_id', 'test_response__assessment_id', 'int'),
+        ('user_id', 'test_response__assessment__user_id', 'int'),
+        ('test_type', 'test_response__test_type', 'str'),
+        ('question_id', 'question_id', 'str'),
+        ('answer_value', 'answer_value', 'str'),
+        ('answer_index', 'answer_index', 'int'),
+        ('answered_at', 'answered_at', 'datetime'),
+    ]),
+}
+
+
+def parse_watermark(value):
+    """ISO-8601 timestamp -> aware datetime (naive values are taken as UTC); raises ValueError."""
+    parsed = parse_datetime(value)
+    if parsed is None:
+        raise ValueError(f'Invalid timestamp {value!r}')
+    return parsed if timezone.is_aware(parsed) else timezone.make_aware(parsed, dt_timezone.utc)
+
+
+def export_until():
+    """Upper bound for an export; every row stamped at or before it has committed by now."""
+    lag = SAFETY_LAG + (get_buffer_settings()['FLUSH_INTERVAL'] if buffer_enabled() else 0)
+    return timezone.now() - timedelta(seconds=lag)
+
+
+def export_rows(kind, since=None, until=None, chunk_size=CHUNK_SIZE):
+    """
+    Rows of `kind` as dicts, ordered by (watermark, id) and streamed with a server-side iterator.
+    `since` is exclusive and `until` inclusive, so consecutive exports using the previous `until`
+    as the next `since` neither skip nor repeat rows.
+    """
+    queryset, watermark, columns = EXPORTS[kind]
+    if since is not None:
+        queryset = queryset.filter(**{f'{watermark}__gt': since})
+    if until is not None:
+        queryset = queryset.filter(**{f'{watermark}__lte': until})
+    names = [name for name, _, _ in columns]
+    lookups = [lookup for _, lookup, _ in columns]
+    for values in queryset.order_by(watermark, 'id').values_list(*lookups).iterator(chunk_size=chunk_size):
+        yield dict(zip(names, values))
+
+
+def _flat(row, columns):
+    """Nested JSON columns as strings, for the flat formats."""
+    return {name: json.dumps(row[name]) if kind == 'json' and row[name] is not None else row[name]
+            for name, _, kind in columns}
+
+
+def ndjson_chunks(rows, columns):
+    for row in rows:
+        yield json.dumps(row, cls=DjangoJSONEncoder, ensure_ascii=False) + '\n'
+
+
+def csv_chunks(rows, columns):
+    buffer = io.StringIO()
+    writer = csv.DictWriter(buffer, fieldnames=[name for name, _, _ in columns])
+    writer.writeheader()
+    for row in rows:
+        flat = _flat(row, columns)
+        writer.writerow({name: value.isoformat() if hasattr(value, 'isoformat') else value
+                         for name, value in flat.items()})
+        if buffer.tell() > 64 * 1024:
+            yield buffer.getvalue()
+            buffer.seek(0)
+            buffer.truncate()
+    yield buffer.getvalue()
+
+
+class _ByteSink(io.RawIOBase):
+    """Write-only file object that hands back whatever has been written since the last drain."""
+
+    def __init__(self):
+        self.chunks = []
+        self.position = 0
+
+    def writable(self):
+        return True
+
+    def write(self, data):
+        self.chunks.append(bytes(data))
+        self.position += len(data)
+        return len(data)
+
+    def tell(self):
+        return self.position
+
+    def drain(self):
+        data, self.chunks = b''.join(self.chunks), []
+        return data
+
+
+def parquet_chunks(rows, columns, chunk_size=CHUNK_SIZE):
+    """One Parquet row group per `chunk_size` rows; requires the optional `pyarrow` package."""
+    try:
+        import pyarrow as pa
+        import pyarrow.parquet as pq
+    except ImportError as exc:
+        raise ImproperlyConfigured('Parquet export requires the pyarrow package') from exc
+    types = {'int': pa.int64(), 'str': pa.string(), 'bool': pa.bool_(), 'json': pa.string(),
+             'datetime': pa.timestamp('us', tz='UTC')}
+    schema = pa.schema([(name, types[kind]) for name, _, kind in columns])
+    sink = _ByteSink()
+    writer = pq.ParquetWriter(sink, schema)
+    batch = []
+
+    def flush():
+        writer.write_table(pa.Table.from_pylist([_flat(row, columns) for row in batch], schema=schema))
+        batch.clear()
+        return sink.drain()
+
+    for row in rows:
+        batch.append(row)
+        if len(batch) >= chunk_size:
+            yield flush()
+    if batch:
+        yield flush()
+    writer.close()
+    yield sink.drain()
+
+
+def export_stream(kind, fmt, since=None, until=None, chunk_size=CHUNK_SIZE):
+    """Encoded chunks of the export; bytes for parquet, str otherwise."""
+    columns = EXPORTS[kind][2]
+    rows = export_rows(kind, since, until, chunk_size)
+    if fmt == 'parquet':
+        return parquet_chunks(rows, columns, chunk_size)
+    return (csv_chunks if fmt == 'csv' else ndjson_chunks)(rows, columns)
@@ -0,0 +1,81 @@
+"""
+Idempotency-Key support for the assessment writes. The key row is inserted in the same transaction as the
+write it guards and holds the response, so a retry either replays the committed outcome or, when the first
+attempt failed and rolled back, runs again. A concurrent duplicate blocks on the unique key until the first
+attempt commits, then replays it.
+"""
+import hashlib
+import json
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import IntegrityError, transaction
+from django.utils import timezone
+from rest_framework import status
+from rest_framework.response import Response
+from rest_framework.utils.encoders import JSONEncoder
+
+from .models import IdempotencyKey
+
+IDEMPOTENCY_TTL = getattr(settings, 'PATHFINDER_IDEMPOTENCY_TTL', 24 * 60 * 60)
+HEADER = 'Idempotency-Key'
+REPLAYED_HEADER = 'Idempotent-Replayed'
+MAX_KEY_LENGTH = 255
+
+
+def fingerprint(endpoint, data):
+    body = json.dumps(data, cls=JSONEncoder, sort_keys=True, separators=(',', ':'))
+    return hashlib.sha256(f'{endpoint}\n{body}'.encode()).hexdigest()
+
+
+def run_idempotent(user, key, endpoint, data, handler):
+    """
+    Call `handler()` -> (status_code, payload) at most once per (user, key) within the TTL.
+    Returns (status_code, payload, replayed). Without a key the handler just runs. 5xx outcomes are
+    rolled back and not stored, so they can be retried.
+    """
+    if not key:
+        return (*handler(), False)
+    if len(key) > MAX_KEY_LENGTH:
+        return status.HTTP_400_BAD_REQUEST, {'error': f'{HEADER} must be at most {MAX_KEY_LENGTH} characters'}, False
+    digest = fingerprint(endpoint, data)
+    now = timezone.now()
+    with transaction.atomic():
+        record = IdempotencyKey(user_id=user.pk, key=key, endpoint=endpoint, fingerprint=digest,
+                                status_code=0, response={}, expires_at=now + timedelta(seconds=IDEMPOTENCY_TTL))
+        try:
+            with transaction.atomic():
+                record.save(force_insert=True)
+        except IntegrityError:
+            existing = IdempotencyKey.objects.select_for_update().get(user_id=user.pk, key=key)
+            if existing.expires_at > now:
+                if existing.fingerprint != digest:
+                    return status.HTTP_422_UNPROCESSABLE_ENTITY, {
+                        'error': f'{HEADER} was already used for a different request'}, False
+                return existing.status_code, existing.response, True
+            existing.delete()
+            record.save(force_insert=True)
+
+        status_code, payload = handler()
+        if status_code >= 500:
+            transaction.set_rollback(True)
+            return status_code, payload, False
+        record.status_code = status_code
+        record.response = payload
+        record.save(update_fields=['status_code', 'response'])
+        return status_code, payload, False
+
+
+def idempotent_response(request, endpoint, handler):
+    """DRF Response for `handler(user, data)` -> (status_code, payload), honouring the request's Idempotency-Key."""
+    status_code, payload, replayed = run_idempotent(
+        request.user, request.headers.get(HEADER), endpoint, request.data,
+        lambda: handler(request.user, request.data))
+    response = Response(payload, status=status_code)
+    if replayed:
+        response[REPLAYED_HEADER] = 'true'
+    return response
+
+
+def purge_expired_keys():
+    return IdempotencyKey.objects.filter(expires_at__lte=timezone.now()).delete()[0]
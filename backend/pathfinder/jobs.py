@@ -0,0 +1,92 @@
+import logging
+import os
+import uuid
+from datetime import timedelta
+
+from django.db import connections, transaction
+from django.db.models import F
+from django.utils import timezone
+
+from .events import publish_event, results_ready_data
+from .models import ProcessingJob
+from .scoring import score_assessments
+
+logger = logging.getLogger(__name__)
+
+MAX_ATTEMPTS = 3
+
+
+def enqueue_processing(assessment):
+    """Queue (or re-queue) result processing for a completed assessment."""
+    job, _ = ProcessingJob.objects.update_or_create(
+        assessment=assessment,
+        defaults={'status': 'queued', 'current_stage': 1, 'attempts': 0, 'claimed_by': '',
+                  'error': '', 'started_at': None, 'finished_at': None},
+    )
+    return job
+
+
+def requeue_stale_jobs(stale_after):
+    """
+    Hand jobs back to the queue when the worker that claimed them died mid-run. Each counts as an attempt,
+    so a job that keeps crashing its worker ends in 'error' instead of being requeued forever.
+    """
+    cutoff = timezone.now() - timedelta(seconds=stale_after)
+    stale = ProcessingJob.objects.filter(status='processing', started_at__lt=cutoff)
+    with transaction.atomic():
+        stale.filter(attempts__gte=MAX_ATTEMPTS - 1).update(
+            status='error', attempts=F('attempts') + 1, claimed_by='', error='Worker stopped while processing')
+        return stale.update(status='queued', current_stage=1, claimed_by='', attempts=F('attempts') + 1)
+
+
+def claim_jobs(limit, worker_id=None):
+    """Atomically move up to `limit` queued jobs to processing; returns the claimed job ids."""
+    worker_id = worker_id or uuid.uuid4().hex
+    with transaction.atomic():
+        candidates = list(ProcessingJob.objects.filter(status='queued').order_by('created_at')
+                          .values_list('id', flat=True)[:limit])
+        ProcessingJob.objects.filter(id__in=candidates, status='queued').update(
+            status='processing', current_stage=2, claimed_by=worker_id, started_at=timezone.now())
+    return list(ProcessingJob.objects.filter(id__in=candidates, claimed_by=worker_id, status='processing')
+                .values_list('id', flat=True))
+
+
+def run_jobs(job_ids):
+    """
+    Score the assessments behind the given claimed jobs; runs inside a pool worker or inline. Returns the
+    number completed.
+    """
+    jobs = ProcessingJob.objects.filter(id__in=job_ids, status='processing')
+    assessment_ids = list(jobs.values_list('assessment_id', flat=True))
+    jobs.update(current_stage=3)
+    try:
+        score_assessments(assessment_ids, on_scored=lambda batch: ProcessingJob.objects.filter(
+            id__in=job_ids, assessment_id__in=batch).update(current_stage=4))
+    except Exception as exc:
+        if len(job_ids) > 1:
+            # Find the failing assessment(s) instead of failing the healthy jobs claimed alongside them.
+            logger.warning('Processing failed for a batch of %d jobs; retrying them one at a time', len(job_ids))
+            return sum(run_jobs([job_id]) for job_id in job_ids)
+        logger.exception('Processing failed for jobs %s', job_ids)
+        for job in ProcessingJob.objects.filter(id__in=job_ids):
+            job.attempts += 1
+            job.error = str(exc)
+            job.status = 'queued' if job.attempts < MAX_ATTEMPTS else 'error'
+            job.current_stage = 1
+            job.save(update_fields=['attempts', 'error', 'status', 'current_stage'])
+        return 0
+    ProcessingJob.objects.filter(id__in=job_ids).update(
+        status='completed', current_stage=ProcessingJob.STAGE_COUNT, finished_at=timezone.now())
+    # Pushed to browsers by a cross-process broker such as RedisBroker; otherwise event streams poll for it.
+    for assessment_id, user_id in ProcessingJob.objects.filter(id__in=job_ids).values_list(
+            'assessment_id', 'assessment__user_id'):
+        publish_event(user_id, 'results_ready', results_ready_data(assessment_id))
+    return len(job_ids)
+
+
+def init_worker():
+    """Pool initializer: make sure Django is configured and drop DB connections inherited from the parent."""
+    os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'webapp.settings')
+    import django
+    django.setup()
+    connections.close_all()
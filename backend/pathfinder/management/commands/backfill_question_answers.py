@@ -0,0 +1,48 @@
+from django.core.management.base import BaseCommand
+from django.db import transaction
+
+from pathfinder.models import TestResponse, QuestionAnswer
+
+
+class Command(BaseCommand):
+    help = 'Backfill normalized QuestionAnswer rows from submitted TestResponse blobs'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--chunk-size', type=int, default=500)
+        parser.add_argument('--rebuild', action='store_true',
+                            help='Rewrite answers for test responses that already have them')
+
+    def handle(self, *args, **options):
+        chunk_size = options['chunk_size']
+        test_responses = TestResponse.objects.filter(is_completed=True).order_by('id')
+        if not options['rebuild']:
+            test_responses = test_responses.filter(answers__isnull=True)
+        test_responses = test_responses.only('id', 'responses')
+
+        processed = written = skipped = 0
+        chunk = []
+        for test_response in test_responses.iterator(chunk_size=chunk_size):
+            if not isinstance(test_response.responses, dict):
+                skipped += 1  # malformed blob; there are no answers to normalize
+                continue
+            chunk.append(test_response)
+            if len(chunk) >= chunk_size:
+                written += self.write_chunk(chunk, options['rebuild'])
+                processed += len(chunk)
+                chunk = []
+                self.stdout.write(f'{processed} test responses processed')
+        if chunk:
+            written += self.write_chunk(chunk, options['rebuild'])
+            processed += len(chunk)
+        self.stdout.write(self.style.SUCCESS(
+            f'Backfilled {written} answers from {processed} test responses'))
+        if skipped:
+            self.stdout.write(self.style.WARNING(f'Skipped {skipped} test responses whose responses are not an object'))
+
+    def write_chunk(self, chunk, rebuild):
+        answers = [answer for test_response in chunk for answer in QuestionAnswer.from_test_response(test_response)]
+        with transaction.atomic():
+            if rebuild:
+                QuestionAnswer.objects.filter(test_response__in=chunk).delete()
+            QuestionAnswer.objects.bulk_create(answers, batch_size=1000, ignore_conflicts=True)
+        return len(answers)
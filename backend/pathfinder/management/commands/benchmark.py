@@ -0,0 +1,114 @@
+import json
+import os
+import socket
+import subprocess
+import sys
+import time
+import urllib.error
+import urllib.request
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+
+from pathfinder.benchmark import (
+    ENDPOINTS, ClientDriver, HttpDriver, compare_reports, run_endpoint, sample_contexts, seed_population)
+
+
+class Command(BaseCommand):
+    help = (
+        'Seed a synthetic student population and measure throughput, p50/p95/p99 latency and query counts for '
+        'every pathfinder endpoint, as JSON. Run against a scratch database: it writes benchmark users and data.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--users', type=int, default=1000, help='Population size to seed (tops up existing)')
+        parser.add_argument('--assessments-per-user', type=int, default=2)
+        parser.add_argument('--messages-per-user', type=int, default=4)
+        parser.add_argument('--seed-batch-size', type=int, default=1000)
+        parser.add_argument('--skip-seed', action='store_true')
+        parser.add_argument('--mode', choices=['client', 'http'], default='client',
+                            help='client: in-process test client; http: a separate server process')
+        parser.add_argument('--base-url', help='http mode: server to hit; by default a runserver is spawned')
+        parser.add_argument('--server-command', default=f'{sys.executable} manage.py runserver --noreload {{addr}}',
+                            help='http mode: command used to spawn the server; {addr} is host:port, {port} the port')
+        parser.add_argument('--include-streaming', action='store_true',
+                            help='http mode: also hit the SSE stream; needs an ASGI server, e.g. '
+                                 '--server-command "uvicorn webapp.asgi:application --port {port}"')
+        parser.add_argument('--requests', type=int, default=200, help='Requests per endpoint')
+        parser.add_argument('--concurrency', type=int, default=1, help='http mode: concurrent requests')
+        parser.add_argument('--sample-users', type=int, default=100, help='Distinct users requests rotate through')
+        parser.add_argument('--endpoint', action='append', help='Only run the named endpoint(s)')
+        parser.add_argument('--output', help='Write the JSON report to this file instead of stdout')
+        parser.add_argument('--baseline', help='Fail if p95 or query counts regressed against this report')
+        parser.add_argument('--max-regression', type=float, default=0.25, help='Allowed p95 growth, as a fraction')
+
+    def handle(self, *args, **options):
+        if not options['skip_seed']:
+            seed_population(options['users'], options['assessments_per_user'], options['messages_per_user'],
+                            options['seed_batch_size'], log=lambda line: self.stderr.write(line))
+        try:
+            contexts = sample_contexts(options['sample_users'])
+        except ValueError as exc:
+            raise CommandError(str(exc))
+        endpoints = [e for e in ENDPOINTS if not options['endpoint'] or e[0] in options['endpoint']]
+        if options['mode'] == 'http' and not options['include_streaming']:
+            # A WSGI server buffers the never-ending event stream, so it would only time out.
+            endpoints = [e for e in endpoints if not e[5]]
+
+        server = None
+        if options['mode'] == 'http':
+            base_url = options['base_url']
+            if not base_url:
+                server, base_url = self.spawn_server(options['server_command'])
+            driver = HttpDriver(base_url)
+        else:
+            driver = ClientDriver()
+        try:
+            rows = []
+            with driver:
+                for endpoint in endpoints:
+                    self.stderr.write(f'Benchmarking {endpoint[0]}')
+                    rows.append(run_endpoint(driver, endpoint, contexts, options['requests'], options['concurrency']))
+        finally:
+            if server:
+                server.terminate()
+                server.wait()
+
+        report = {
+            'mode': options['mode'],
+            'database': settings.DATABASES['default']['ENGINE'],
+            'users': options['users'],
+            'requests_per_endpoint': options['requests'],
+            'concurrency': options['concurrency'],
+            'endpoints': rows,
+        }
+        output = json.dumps(report, indent=2)
+        if options['output']:
+            with open(options['output'], 'w') as f:
+                f.write(output)
+        else:
+            self.stdout.write(output)
+
+        if options['baseline']:
+            with open(options['baseline']) as f:
+                regressions = compare_reports(report, json.load(f), options['max_regression'])
+            if regressions:
+                raise CommandError('Regressions against baseline:\n' + '\n'.join(regressions))
+
+    def spawn_server(self, command):
+        with socket.socket() as sock:
+            sock.bind(('127.0.0.1', 0))
+            port = sock.getsockname()[1]
+        addr = f'127.0.0.1:{port}'
+        server = subprocess.Popen(command.format(addr=addr, port=port).split(), env=os.environ.copy(),
+                                  stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+        base_url = f'http://{addr}/api'
+        for _ in range(100):
+            try:
+                urllib.request.urlopen(f'{base_url}/home/', timeout=1)
+            except urllib.error.HTTPError:
+                return server, base_url
+            except OSError:
+                time.sleep(0.2)
+        server.terminate()
+        raise CommandError(f'Server did not start: {command}')
@@ -0,0 +1,60 @@
+import json
+import os
+import subprocess
+import sys
+import tempfile
+
+from django.core.management.base import BaseCommand, CommandError
+
+from pathfinder.benchmark import run_autosave_benchmark
+
+# Environment overlays for --profiles; each profile runs in its own process so settings.py picks them up.
+PROFILES = {
+    'sqlite': {'SQLITE_TUNING': '0', 'DB_CONN_MAX_AGE': '0', 'DATABASE_URL': ''},
+    'sqlite-wal': {'SQLITE_TUNING': '1', 'DATABASE_URL': ''},
+    'postgres': {'DB_POOL_MAX_SIZE': '0'},
+    'postgres-pool': {},
+}
+
+
+class Command(BaseCommand):
+    help = (
+        'Measure autosave throughput under concurrent writers against the configured database, or compare '
+        'database profiles with --profiles sqlite,sqlite-wal[,postgres,postgres-pool]. SQLite profiles run on '
+        'a fresh temporary database; PostgreSQL profiles need DATABASE_URL.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--writers', type=int, default=16)
+        parser.add_argument('--saves', type=int, default=100, help='Saves per writer')
+        parser.add_argument('--mode', choices=['full', 'delta'], default='full',
+                            help='full: POST-style whole-state saves; delta: PATCH-style revisioned merges')
+        parser.add_argument('--profiles', help='Comma-separated profiles to compare, each in a subprocess')
+        parser.add_argument('--pool-size', type=int, default=20, help='postgres-pool: DB_POOL_MAX_SIZE')
+
+    def handle(self, *args, **options):
+        if options['profiles']:
+            report = [self.run_profile(name, options) for name in options['profiles'].split(',')]
+        else:
+            report = run_autosave_benchmark(options['writers'], options['saves'], options['mode'])
+        self.stdout.write(json.dumps(report, indent=2))
+
+    def run_profile(self, name, options):
+        if name not in PROFILES:
+            raise CommandError(f'Unknown profile {name!r}; choose from {", ".join(PROFILES)}')
+        env = {**os.environ, 'DJANGO_SETTINGS_MODULE': 'webapp.settings', **PROFILES[name]}
+        if name.startswith('postgres'):
+            if not env.get('DATABASE_URL', '').startswith(('postgres://', 'postgresql://')):
+                raise CommandError(f'Profile {name} needs DATABASE_URL pointing at PostgreSQL')
+            if name == 'postgres-pool':
+                env['DB_POOL_MAX_SIZE'] = str(options['pool_size'])
+        with tempfile.TemporaryDirectory() as tmp:
+            if name.startswith('sqlite'):
+                env['SQLITE_PATH'] = os.path.join(tmp, 'autosave.sqlite3')
+            manage = [sys.executable, sys.argv[0]]
+            subprocess.run([*manage, 'migrate', '--verbosity', '0'], env=env, check=True)
+            result = subprocess.run(
+                [*manage, 'benchmark_autosave', '--writers', str(options['writers']),
+                 '--saves', str(options['saves']), '--mode', options['mode']],
+                env=env, check=True, capture_output=True, text=True)
+        return {'profile': name, **json.loads(result.stdout)}
@@ -0,0 +1,29 @@
+import json
+
+from django.core.management.base import BaseCommand, CommandError
+
+from pathfinder.benchmark import run_serialization_benchmark, sample_contexts, seed_population
+
+
+class Command(BaseCommand):
+    help = (
+        'Compare the DRF ModelSerializer + JSONRenderer path with the projection fast path for the home, '
+        'history, chat history and assessment responses payloads, and check the rendered bytes are identical.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--users', type=int, default=0, help='Seed this many benchmark users first')
+        parser.add_argument('--sample', type=int, default=50, help='Users to serialize per round')
+        parser.add_argument('--repeat', type=int, default=5)
+
+    def handle(self, *args, **options):
+        if options['users']:
+            seed_population(options['users'], log=self.stderr.write)
+        try:
+            contexts = sample_contexts(options['sample'])
+        except ValueError as exc:
+            raise CommandError(f'{exc} (use --users)')
+        report = run_serialization_benchmark(contexts, options['repeat'])
+        self.stdout.write(json.dumps(report, indent=2))
+        if report['mismatches']:
+            raise CommandError(f'Fast path output differs for {report["mismatches"]}')
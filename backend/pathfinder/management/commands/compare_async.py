@@ -0,0 +1,70 @@
+import json
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from django.core.management.base import BaseCommand, CommandError
+
+from pathfinder.benchmark import http, percentile
+
+
+class Command(BaseCommand):
+    help = (
+        'Load-test the sync (/api/...) and async (/api/async/...) variants of the hot endpoints against a '
+        'running server, e.g. `gunicorn webapp.wsgi -w 4` vs `uvicorn webapp.asgi:application --workers 4`.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--base-url', default='http://localhost:8000/api')
+        parser.add_argument('--username', default='loadtest')
+        parser.add_argument('--password', default='loadtest-password')
+        parser.add_argument('--concurrency', type=int, default=50)
+        parser.add_argument('--requests', type=int, default=1000, help='Requests per endpoint variant')
+
+    def handle(self, *args, **options):
+        base = options['base_url'].rstrip('/')
+        token = self.login(base, options['username'], options['password'])
+        test_response_id = self.prepare_test_response(base, token)
+        endpoints = [
+            ('home', 'GET', 'home/', None),
+            ('chat history', 'GET', 'chatbot/history/', None),
+            ('chat message', 'POST', 'chatbot/message/', {'message': 'Which stream suits me?'}),
+            ('save progress', 'POST', 'assessment/save-progress/',
+             {'test_response_id': test_response_id, 'answers': {'1': 'Agree'}, 'current_question_index': 1}),
+        ]
+        rows = []
+        for name, method, path, body in endpoints:
+            for variant, prefix in [('wsgi', ''), ('async', 'async/')]:
+                rows.append((name, variant, *self.run(f'{base}/{prefix}{path}', method, token, body, options)))
+
+        self.stdout.write(f'{"endpoint":<16}{"variant":<8}{"req/s":>10}{"p50 ms":>10}{"p95 ms":>10}{"errors":>8}')
+        for name, variant, rps, p50, p95, errors in rows:
+            self.stdout.write(f'{name:<16}{variant:<8}{rps:>10.1f}{p50:>10.1f}{p95:>10.1f}{errors:>8}')
+
+    def login(self, base, username, password):
+        credentials = {'username': username, 'password': password}
+        status, body = http('POST', f'{base}/auth/login/', body=credentials)
+        if status == 401:
+            status, body = http('POST', f'{base}/auth/setup/', body={**credentials, 'name': 'Load Test', 'grade': '10th'})
+        if status not in (200, 201):
+            raise CommandError(f'Could not log in as {username}: {status} {body[:200]!r}')
+        return json.loads(body)['access']
+
+    def prepare_test_response(self, base, token):
+        status, body = http('POST', f'{base}/assessment/start/', token, {})
+        assessment_id = json.loads(body)['assessment_id']
+        status, body = http('GET', f'{base}/assessment/{assessment_id}/test/aptitude/', token)
+        return json.loads(body)['id']
+
+    def run(self, url, method, token, body, options):
+        def one(_):
+            started = time.perf_counter()
+            status, _ = http(method, url, token, body)
+            return time.perf_counter() - started, status
+
+        started = time.perf_counter()
+        with ThreadPoolExecutor(max_workers=options['concurrency']) as pool:
+            results = list(pool.map(one, range(options['requests'])))
+        elapsed = time.perf_counter() - started
+        latencies = sorted(latency * 1000 for latency, _ in results)
+        errors = sum(1 for _, status in results if status >= 400)
+        return len(results) / elapsed, percentile(latencies, 0.5), percentile(latencies, 0.95), errors
@@ -0,0 +1,53 @@
+import json
+import os
+import sys
+
+from django.core.management.base import BaseCommand, CommandError
+
+from pathfinder.export import CHUNK_SIZE, EXPORTS, FORMATS, export_stream, export_until, parse_watermark
+
+
+class Command(BaseCommand):
+    help = (
+        'Stream assessments, test responses or answers as NDJSON, CSV or Parquet with constant memory. '
+        'Use --since for an incremental export, or --state-file to resume from the previous run automatically.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('kind', choices=list(EXPORTS))
+        parser.add_argument('--format', choices=list(FORMATS), default='ndjson')
+        parser.add_argument('--output', default='-', help='File to write, or - for stdout')
+        parser.add_argument('--since', help='Only rows whose watermark is after this ISO-8601 timestamp')
+        parser.add_argument('--state-file', help='JSON file holding the last watermark per kind; read and updated')
+        parser.add_argument('--chunk-size', type=int, default=CHUNK_SIZE)
+
+    def handle(self, *args, **options):
+        kind = options['kind']
+        state = {}
+        if options['state_file'] and os.path.exists(options['state_file']):
+            with open(options['state_file']) as f:
+                state = json.load(f)
+        since = options['since'] or state.get(kind)
+        try:
+            since = parse_watermark(since) if since else None
+        except ValueError as exc:
+            raise CommandError(str(exc))
+        until = export_until()
+
+        binary = options['format'] == 'parquet'
+        if options['output'] == '-':
+            out = sys.stdout.buffer if binary else sys.stdout
+        else:
+            out = open(options['output'], 'wb' if binary else 'w', newline='' if not binary else None)
+        try:
+            for chunk in export_stream(kind, options['format'], since, until, options['chunk_size']):
+                out.write(chunk)
+        finally:
+            if out not in (sys.stdout, sys.stdout.buffer):
+                out.close()
+
+        if options['state_file']:
+            state[kind] = until.isoformat()
+            with open(options['state_file'], 'w') as f:
+                json.dump(state, f, indent=2)
+        self.stderr.write(f'Exported {kind} up to {until.isoformat()}')
@@ -0,0 +1,168 @@
+import csv
+import json
+import os
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
+from itertools import islice
+
+from django.conf import settings
+from django.contrib.auth.hashers import get_hasher, make_password
+from django.core.exceptions import ValidationError
+from django.core.management.base import BaseCommand, CommandError
+from django.db import DataError, IntegrityError, transaction
+
+from pathfinder.jobs import init_worker
+from pathfinder.models import CustomUser
+
+REQUIRED = ['username', 'name', 'grade']
+OPTIONAL = ['password', 'age', 'email', 'phone']
+
+
+def hash_password(args):
+    """Pool task: (password, hasher algorithm) -> encoded hash; rows without a password get an unusable one."""
+    password, algorithm = args
+    return make_password(password or None, hasher=algorithm)
+
+
+def read_rows(path, fmt):
+    """Yield (line_number, row dict) without loading the whole roster."""
+    handle = sys.stdin if path == '-' else open(path, newline='', encoding='utf-8-sig')
+    try:
+        if fmt == 'csv':
+            reader = csv.DictReader(handle)
+            for row in reader:
+                yield reader.line_num, row
+        else:
+            for line_number, line in enumerate(handle, 1):
+                if line.strip():
+                    try:
+                        yield line_number, json.loads(line)
+                    except ValueError as exc:
+                        yield line_number, exc
+    finally:
+        if handle is not sys.stdin:
+            handle.close()
+
+
+class Command(BaseCommand):
+    help = (
+        'Create student accounts in bulk from a CSV or JSONL roster (columns: username, name, grade, and '
+        'optionally password, age, email, phone). Passwords are hashed in a process pool and rows are '
+        'inserted with bulk_create; invalid rows are reported and skipped.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('path', help='Roster file, or - for stdin')
+        parser.add_argument('--format', choices=['csv', 'jsonl'], help='Defaults to the file extension')
+        parser.add_argument('--batch-size', type=int, default=1000)
+        parser.add_argument('--workers', type=int, default=os.cpu_count() or 1,
+                            help='Hashing processes; 0 hashes inline')
+        parser.add_argument('--hasher', help='Password hasher algorithm from PASSWORD_HASHERS (default: the first)')
+        parser.add_argument('--errors', help='Write rejected rows to this CSV file')
+
+    def handle(self, *args, **options):
+        fmt = options['format'] or ('jsonl' if options['path'].endswith(('.jsonl', '.ndjson')) else 'csv')
+        algorithm = options['hasher'] or get_hasher().algorithm
+        try:
+            get_hasher(algorithm)
+        except ValueError:
+            raise CommandError(f'Unknown hasher {algorithm!r}; configured: {", ".join(settings.PASSWORD_HASHERS)}')
+
+        workers = options['workers']
+        pool = ProcessPoolExecutor(max_workers=workers, initializer=init_worker) if workers else None
+        rows = read_rows(options['path'], fmt)
+        seen = set()
+        created = 0
+        errors = []
+        started = time.perf_counter()
+        try:
+            while batch := list(islice(rows, options['batch_size'])):
+                valid = self.validate(batch, seen, errors)
+                tasks = [(row.get('password'), algorithm) for _, row in valid]
+                chunksize = max(1, len(tasks) // (max(workers, 1) * 4))
+                hashes = list(pool.map(hash_password, tasks, chunksize=chunksize)) if pool else map(hash_password, tasks)
+                users = [(line, self.build_user(row, password)) for (line, row), password in zip(valid, hashes)]
+                created += self.insert(users, errors)
+                elapsed = time.perf_counter() - started
+                self.stdout.write(f'{created} created, {len(errors)} rejected ({created / elapsed * 60:.0f}/min)')
+        finally:
+            if pool:
+                pool.shutdown()
+
+        if options['errors']:
+            with open(options['errors'], 'w', newline='') as f:
+                writer = csv.writer(f)
+                writer.writerow(['line', 'username', 'error'])
+                writer.writerows(errors)
+        else:
+            for line, username, error in errors:
+                self.stderr.write(f'line {line} ({username or "-"}): {error}')
+        self.stdout.write(self.style.SUCCESS(
+            f'Imported {created} students, rejected {len(errors)} rows in {time.perf_counter() - started:.1f}s'))
+
+    def validate(self, batch, seen, errors):
+        """Rows that can be inserted, as (line, cleaned row); everything else is appended to `errors`."""
+        candidates = []
+        for line, row in batch:
+            if not isinstance(row, dict):
+                errors.append((line, '', f'Invalid row: {row}'))
+                continue
+            row = {key.strip().lower(): str(value).strip() for key, value in row.items()
+                   if key and value is not None and str(value).strip()}
+            missing = [field for field in REQUIRED if not row.get(field)]
+            if missing:
+                errors.append((line, row.get('username', ''), f'Missing {", ".join(missing)}'))
+                continue
+            if 'age' in row:
+                try:
+                    row['age'] = int(row['age'])
+                except ValueError:
+                    errors.append((line, row['username'], f'Invalid age {row["age"]!r}'))
+                    continue
+            try:
+                # Field lengths and validators (e.g. the username characters); uniqueness is checked per batch below.
+                self.build_user(row, '').full_clean(
+                    exclude=['password'], validate_unique=False, validate_constraints=False)
+            except ValidationError as exc:
+                errors.append((line, row['username'], '; '.join(
+                    f'{field}: {" ".join(messages)}' for field, messages in exc.message_dict.items())))
+                continue
+            if row['username'] in seen:
+                errors.append((line, row['username'], 'Duplicate username in roster'))
+                continue
+            seen.add(row['username'])
+            candidates.append((line, row))
+        existing = set(CustomUser.objects.filter(
+            username__in=[row['username'] for _, row in candidates]).values_list('username', flat=True))
+        valid = []
+        for line, row in candidates:
+            if row['username'] in existing:
+                errors.append((line, row['username'], 'Username already exists'))
+            else:
+                valid.append((line, row))
+        return valid
+
+    def build_user(self, row, password):
+        return CustomUser(
+            username=row['username'], password=password, name=row['name'], grade=row['grade'],
+            age=row.get('age'), email=row.get('email', ''), phone=row.get('phone'), is_setup_complete=True)
+
+    def insert(self, users, errors):
+        try:
+            with transaction.atomic():
+                CustomUser.objects.bulk_create([user for _, user in users])
+            return len(users)
+        except (IntegrityError, DataError):
+            pass
+        # Someone else created one of these usernames meanwhile, or the database rejected a value the model
+        # validators allowed: fall back to row-by-row to isolate it.
+        created = 0
+        for line, user in users:
+            try:
+                with transaction.atomic():
+                    user.save(force_insert=True)
+                created += 1
+            except (IntegrityError, DataError) as exc:
+                errors.append((line, user.username, str(exc)))
+        return created
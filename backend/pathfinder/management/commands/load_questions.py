@@ -0,0 +1,51 @@
+import json
+from pathlib import Path
+
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from django.utils import timezone
+
+from pathfinder.catalog import invalidate_catalogs
+from pathfinder.models import Question
+
+QUESTIONS_FILE = Path(__file__).resolve().parents[2] / 'data' / 'questions.json'
+
+
+class Command(BaseCommand):
+    help = 'Create or update the question bank from a JSON file (default: pathfinder/data/questions.json)'
+
+    def add_arguments(self, parser):
+        parser.add_argument('path', nargs='?', default=str(QUESTIONS_FILE))
+        parser.add_argument('--deactivate-missing', action='store_true',
+                            help='Mark questions that are not in the file as inactive')
+
+    def handle(self, *args, **options):
+        with open(options['path'], encoding='utf-8') as f:
+            entries = json.load(f)
+        created = updated = 0
+        with transaction.atomic():
+            existing = {(q.test_type, q.question_number): q for q in Question.objects.all()}
+            for entry in entries:
+                fields = {
+                    'question_type': entry.get('question_type', 'rating'),
+                    'options': entry.get('options', {}),
+                    'is_active': entry.get('is_active', True),
+                    **{f'question_text_{language}': entry['text'].get(language, '') for language in Question.LANGUAGES},
+                }
+                question = existing.pop((entry['test_type'], entry['question_number']), None)
+                if question is None:
+                    Question.objects.create(
+                        test_type=entry['test_type'], question_number=entry['question_number'], **fields)
+                    created += 1
+                elif any(getattr(question, name) != value for name, value in fields.items()):
+                    for name, value in fields.items():
+                        setattr(question, name, value)
+                    question.save()
+                    updated += 1
+            if options['deactivate_missing']:
+                # update() skips auto_now; stamping updated_at moves the DB-derived catalog version too.
+                updated += Question.objects.filter(
+                    pk__in=[q.pk for q in existing.values() if q.is_active]).update(
+                    is_active=False, updated_at=timezone.now())
+            invalidate_catalogs()
+        self.stdout.write(self.style.SUCCESS(f'{created} questions created, {updated} updated'))
@@ -0,0 +1,52 @@
+import os
+import time
+import uuid
+from concurrent.futures import ProcessPoolExecutor
+
+from django.core.management.base import BaseCommand
+from django.db import close_old_connections
+
+from pathfinder.jobs import claim_jobs, init_worker, requeue_stale_jobs, run_jobs
+
+
+class Command(BaseCommand):
+    help = 'Run queued assessment processing jobs using a process pool'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--workers', type=int, default=os.cpu_count() or 1,
+                            help='Worker processes; 0 runs jobs inline in this process')
+        parser.add_argument('--batch-size', type=int, default=50, help='Jobs handed to a worker at once')
+        parser.add_argument('--poll-interval', type=float, default=1.0)
+        parser.add_argument('--stale-after', type=int, default=600,
+                            help='Seconds before a job claimed by a dead worker is re-queued')
+        parser.add_argument('--once', action='store_true', help='Drain the queue and exit')
+
+    def handle(self, *args, **options):
+        worker_id = f'{os.getpid()}-{uuid.uuid4().hex[:8]}'
+        workers = options['workers']
+        pool = ProcessPoolExecutor(max_workers=workers, initializer=init_worker) if workers else None
+        processed = 0
+        try:
+            while True:
+                close_old_connections()
+                requeue_stale_jobs(options['stale_after'])
+                capacity = options['batch_size'] * max(workers, 1)
+                job_ids = claim_jobs(capacity, worker_id)
+                if job_ids:
+                    batches = [job_ids[i:i + options['batch_size']]
+                               for i in range(0, len(job_ids), options['batch_size'])]
+                    if pool:
+                        processed += sum(pool.map(run_jobs, batches))
+                    else:
+                        processed += sum(run_jobs(batch) for batch in batches)
+                    self.stdout.write(f'Processed {processed} jobs')
+                elif options['once']:
+                    break
+                else:
+                    time.sleep(options['poll_interval'])
+        except KeyboardInterrupt:
+            pass
+        finally:
+            if pool:
+                pool.shutdown()
+        self.stdout.write(self.style.SUCCESS(f'Processed {processed} jobs'))
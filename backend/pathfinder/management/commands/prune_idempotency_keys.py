@@ -0,0 +1,11 @@
+from django.core.management.base import BaseCommand
+
+from pathfinder.idempotency import purge_expired_keys
+
+
+class Command(BaseCommand):
+    help = 'Delete stored Idempotency-Key responses past their TTL (PATHFINDER_IDEMPOTENCY_TTL)'
+
+    def handle(self, *args, **options):
+        deleted = purge_expired_keys()
+        self.stdout.write(self.style.SUCCESS(f'Deleted {deleted} expired idempotency keys'))
@@ -0,0 +1,16 @@
+from django.core.management.base import BaseCommand
+
+from pathfinder.tokens import prune_expired_tokens
+
+
+class Command(BaseCommand):
+    help = 'Delete expired JWT outstanding/blacklisted tokens in small batches; run it from cron'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=1000, help='Tokens deleted per transaction')
+        parser.add_argument('--pause', type=float, default=0.05,
+                            help='Seconds to sleep between batches so other writers get the lock')
+
+    def handle(self, *args, **options):
+        pruned = prune_expired_tokens(options['batch_size'], options['pause'])
+        self.stdout.write(self.style.SUCCESS(f'Deleted {pruned} expired tokens'))
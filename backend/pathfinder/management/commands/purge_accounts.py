@@ -0,0 +1,41 @@
+import os
+import time
+import uuid
+
+from django.core.management.base import BaseCommand
+from django.db import close_old_connections
+
+from pathfinder.deletion import claim_deletion, purge_account, requeue_stale_deletions
+
+
+class Command(BaseCommand):
+    help = 'Purge the data of deleted (disabled) accounts in small batches'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=500, help='Rows deleted per transaction')
+        parser.add_argument('--pause', type=float, default=0.05,
+                            help='Seconds to sleep between batches so other writers get the lock')
+        parser.add_argument('--poll-interval', type=float, default=1.0)
+        parser.add_argument('--stale-after', type=int, default=300,
+                            help='Seconds without a heartbeat before a purge claimed by a dead worker is re-queued')
+        parser.add_argument('--once', action='store_true', help='Drain the queue and exit')
+
+    def handle(self, *args, **options):
+        worker_id = f'{os.getpid()}-{uuid.uuid4().hex[:8]}'
+        purged = 0
+        try:
+            while True:
+                close_old_connections()
+                requeue_stale_deletions(options['stale_after'])
+                deletion = claim_deletion(worker_id)
+                if deletion:
+                    if purge_account(deletion, options['batch_size'], options['pause']):
+                        purged += 1
+                        self.stdout.write(f'Purged user {deletion.user_id}: {deletion.deleted}')
+                elif options['once']:
+                    break
+                else:
+                    time.sleep(options['poll_interval'])
+        except KeyboardInterrupt:
+            pass
+        self.stdout.write(self.style.SUCCESS(f'Purged {purged} accounts'))
@@ -0,0 +1,30 @@
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+from django.utils.dateparse import parse_date
+
+from pathfinder.analytics import rebuild_rollups
+
+
+class Command(BaseCommand):
+    help = (
+        'Recompute the cohort analytics rollups from assessments and test responses. Run nightly to correct '
+        'drift in the incrementally maintained counters; --since limits the rebuild to recent days.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--since', help='Only rebuild buckets on or after this YYYY-MM-DD date')
+
+    def handle(self, *args, **options):
+        since = None
+        if options['since']:
+            try:
+                since = parse_date(options['since'])
+            except ValueError:
+                pass
+            if since is None:
+                raise CommandError(f'Invalid date {options["since"]!r}')
+        started = time.perf_counter()
+        count = rebuild_rollups(since)
+        self.stdout.write(self.style.SUCCESS(
+            f'Rebuilt {count} rollup rows in {time.perf_counter() - started:.1f}s'))
@@ -0,0 +1,29 @@
+import time
+
+from django.core.management.base import BaseCommand
+
+from pathfinder.models import Assessment
+from pathfinder.scoring import score_assessments
+
+
+class Command(BaseCommand):
+    help = 'Score completed assessments and store their AssessmentResults'
+
+    def add_arguments(self, parser):
+        parser.add_argument('assessment_ids', nargs='*', type=int)
+        parser.add_argument('--rescore', action='store_true',
+                            help='Also rescore assessments that already have results')
+        parser.add_argument('--batch-size', type=int, default=1000)
+
+    def handle(self, *args, **options):
+        assessments = Assessment.objects.filter(status='completed')
+        if options['assessment_ids']:
+            assessments = assessments.filter(id__in=options['assessment_ids'])
+        if not options['rescore']:
+            assessments = assessments.filter(results__isnull=True)
+        assessment_ids = list(assessments.order_by('id').values_list('id', flat=True))
+
+        started = time.perf_counter()
+        scored = score_assessments(assessment_ids, batch_size=options['batch_size'])
+        elapsed = time.perf_counter() - started
+        self.stdout.write(self.style.SUCCESS(f'Scored {scored} assessments in {elapsed:.2f}s'))
@@ -0,0 +1,257 @@
+"""
+Per-request instrumentation: query count, SQL time, serializer time and response size, recorded for a
+configurable sample of requests and exposed as debug headers, structured log lines and Prometheus text.
+Metrics are per process, like the autosave buffer's.
+"""
+import contextvars
+import json
+import logging
+import random
+import threading
+import time
+from contextlib import contextmanager
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction
+from django.conf import settings
+from django.http import HttpResponse
+from django.utils.crypto import constant_time_compare
+from rest_framework.exceptions import AuthenticationFailed
+
+from .authentication import CachedJWTAuthentication
+
+logger = logging.getLogger(__name__)
+
+_current = contextvars.ContextVar('pathfinder_request_sample', default=None)
+
+DEFAULTS = {
+    'ENABLED': True,
+    'SAMPLE_RATE': 1.0,
+    'HEADERS': False,
+    'LOG': True,
+    'TOKEN': None,
+    'PUBLIC': False,  # serve /api/metrics/ without credentials
+}
+
+
+def get_metrics_settings():
+    return {**DEFAULTS, **getattr(settings, 'PATHFINDER_METRICS', {})}
+
+
+class RequestSample:
+    __slots__ = ('started', 'queries', 'sql_seconds', 'serializer_seconds', 'serializer_depth')
+
+    def __init__(self):
+        self.started = time.perf_counter()
+        self.queries = 0
+        self.sql_seconds = 0.0
+        self.serializer_seconds = 0.0
+        self.serializer_depth = 0
+
+
+def record_query(execute, sql, params, many, context):
+    """`connection.execute_wrapper` hook; a no-op outside sampled requests."""
+    sample = _current.get()
+    if sample is None:
+        return execute(sql, params, many, context)
+    started = time.perf_counter()
+    try:
+        return execute(sql, params, many, context)
+    finally:
+        sample.queries += 1
+        sample.sql_seconds += time.perf_counter() - started
+
+
+def install_query_hook(sender, connection, **kwargs):
+    """connection_created receiver, so connections opened in sync_to_async threads are covered too."""
+    if record_query not in connection.execute_wrappers:
+        connection.execute_wrappers.append(record_query)
+
+
+@contextmanager
+def serializer_timer():
+    """Time serialization for the current sample; nested serializers count once, in their outermost parent."""
+    sample = _current.get()
+    if sample is None:
+        yield
+        return
+    sample.serializer_depth += 1
+    started = time.perf_counter()
+    try:
+        yield
+    finally:
+        sample.serializer_depth -= 1
+        if sample.serializer_depth == 0:
+            sample.serializer_seconds += time.perf_counter() - started
+
+
+class Histogram:
+    """Thread-safe Prometheus histogram keyed by a label-value tuple."""
+
+    def __init__(self, name, help_text, buckets):
+        self.name = name
+        self.help_text = help_text
+        self.buckets = buckets
+        self.series = {}
+        self._lock = threading.Lock()
+
+    def observe(self, labels, value):
+        with self._lock:
+            counts, total, count = self.series.get(labels) or ([0] * len(self.buckets), 0.0, 0)
+            for i, bound in enumerate(self.buckets):
+                if value <= bound:
+                    counts[i] += 1
+            self.series[labels] = (counts, total + value, count + 1)
+
+    def render(self, label_names):
+        lines = [f'# HELP {self.name} {self.help_text}', f'# TYPE {self.name} histogram']
+        with self._lock:
+            series = sorted((labels, list(counts), total, count)
+                            for labels, (counts, total, count) in self.series.items())
+        for labels, counts, total, count in series:
+            base = ','.join(f'{name}="{value}"' for name, value in zip(label_names, labels))
+            for bound, bucket_count in zip(self.buckets, counts):
+                lines.append(f'{self.name}_bucket{{{base},le="{bound}"}} {bucket_count}')
+            lines.append(f'{self.name}_bucket{{{base},le="+Inf"}} {count}')
+            lines.append(f'{self.name}_sum{{{base}}} {total}')
+            lines.append(f'{self.name}_count{{{base}}} {count}')
+        return lines
+
+    def reset(self):
+        with self._lock:
+            self.series.clear()
+
+
+LABELS = ('view', 'method', 'status')
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+HISTOGRAMS = {
+    'duration': Histogram('pathfinder_request_duration_seconds', 'Request latency.', LATENCY_BUCKETS),
+    'sql': Histogram('pathfinder_request_sql_seconds', 'Time spent in SQL per request.', LATENCY_BUCKETS),
+    'serializer': Histogram('pathfinder_request_serializer_seconds', 'Time spent serializing per request.',
+                            LATENCY_BUCKETS),
+    'queries': Histogram('pathfinder_request_queries', 'DB queries per request.', (0, 1, 2, 3, 5, 8, 13, 21, 50, 100)),
+    'size': Histogram('pathfinder_response_size_bytes', 'Response body size.',
+                      (256, 1024, 4096, 16384, 65536, 262144, 1048576)),
+}
+
+
+def view_name(request):
+    match = getattr(request, 'resolver_match', None)
+    return match.view_name if match else 'unresolved'
+
+
+def finish_sample(request, response, sample, config):
+    duration = time.perf_counter() - sample.started
+    size = None if response.streaming else len(response.content)
+    labels = (view_name(request), request.method, str(response.status_code))
+    HISTOGRAMS['duration'].observe(labels, duration)
+    HISTOGRAMS['sql'].observe(labels, sample.sql_seconds)
+    HISTOGRAMS['serializer'].observe(labels, sample.serializer_seconds)
+    HISTOGRAMS['queries'].observe(labels, sample.queries)
+    if size is not None:
+        HISTOGRAMS['size'].observe(labels, size)
+    if config['HEADERS']:
+        response['X-Query-Count'] = str(sample.queries)
+        response['Server-Timing'] = (f'total;dur={duration * 1000:.2f}, db;dur={sample.sql_seconds * 1000:.2f}, '
+                                     f'serializer;dur={sample.serializer_seconds * 1000:.2f}')
+    if config['LOG']:
+        logger.info(json.dumps({
+            'event': 'request',
+            'view': labels[0],
+            'method': labels[1],
+            'status': response.status_code,
+            'duration_ms': round(duration * 1000, 3),
+            'queries': sample.queries,
+            'sql_ms': round(sample.sql_seconds * 1000, 3),
+            'serializer_ms': round(sample.serializer_seconds * 1000, 3),
+            'response_bytes': size,
+        }))
+    return response
+
+
+class RequestMetricsMiddleware:
+    """Records metrics for a SAMPLE_RATE fraction of requests; unsampled requests pay one random() call."""
+
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        self.config = get_metrics_settings()
+        if iscoroutinefunction(get_response):
+            markcoroutinefunction(self)
+
+    def sampled(self):
+        return self.config['ENABLED'] and random.random() < self.config['SAMPLE_RATE']
+
+    def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+        if not self.sampled():
+            return self.get_response(request)
+        sample = RequestSample()
+        token = _current.set(sample)
+        try:
+            response = self.get_response(request)
+        finally:
+            _current.reset(token)
+        return finish_sample(request, response, sample, self.config)
+
+    async def __acall__(self, request):
+        if not self.sampled():
+            return await self.get_response(request)
+        sample = RequestSample()
+        token = _current.set(sample)
+        try:
+            response = await self.get_response(request)
+        finally:
+            _current.reset(token)
+        return finish_sample(request, response, sample, self.config)
+
+
+def render_prometheus():
+    from .autosave import autosave_buffer, buffer_enabled
+
+    lines = []
+    for histogram in HISTOGRAMS.values():
+        lines.extend(histogram.render(LABELS))
+    lines += [
+        '# HELP pathfinder_metrics_sample_rate Fraction of requests recorded above.',
+        '# TYPE pathfinder_metrics_sample_rate gauge',
+        f'pathfinder_metrics_sample_rate {get_metrics_settings()["SAMPLE_RATE"]}',
+    ]
+    autosave = autosave_buffer.metrics()
+    lines += [
+        '# HELP pathfinder_autosave_buffer_enabled Whether autosaves are buffered in memory.',
+        '# TYPE pathfinder_autosave_buffer_enabled gauge',
+        f'pathfinder_autosave_buffer_enabled {int(buffer_enabled())}',
+        '# HELP pathfinder_autosave_buffer_depth Test responses waiting to be flushed.',
+        '# TYPE pathfinder_autosave_buffer_depth gauge',
+        f'pathfinder_autosave_buffer_depth {autosave["depth"]}',
+    ]
+    for key in ['buffered_total', 'flushed_total', 'flush_count', 'flush_errors']:
+        name = f'pathfinder_autosave_{key}' if key.endswith('_total') else f'pathfinder_autosave_{key}_total'
+        lines += [f'# TYPE {name} counter', f'{name} {autosave[key]}']
+    lines += [
+        '# TYPE pathfinder_autosave_max_flush_seconds gauge',
+        f'pathfinder_autosave_max_flush_seconds {autosave["max_flush_seconds"]}',
+    ]
+    return '\n'.join(lines) + '\n'
+
+
+def scrape_allowed(request, token):
+    """True for `Authorization: Bearer <TOKEN>` or a staff user's access token."""
+    if token and constant_time_compare(request.headers.get('Authorization', ''), f'Bearer {token}'):
+        return True
+    try:
+        authenticated = CachedJWTAuthentication().authenticate(request)
+    except AuthenticationFailed:
+        return False
+    return authenticated is not None and authenticated[0].is_staff
+
+
+def metrics_endpoint(request):
+    """Prometheus scrape target for the metrics TOKEN or staff; open to anyone only when PUBLIC is set."""
+    config = get_metrics_settings()
+    if not (config['PUBLIC'] or scrape_allowed(request, config['TOKEN'])):
+        return HttpResponse('Forbidden', status=403, content_type='text/plain')
+    return HttpResponse(render_prometheus(), content_type='text/plain; version=0.0.4; charset=utf-8')
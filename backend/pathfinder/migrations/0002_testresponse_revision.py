@@ -0,0 +1,18 @@
+# Generated by Django 5.2.8 on 2026-10-18 05:17
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('pathfinder', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='testresponse',
+            name='revision',
+            field=models.IntegerField(default=0),
+        ),
+    ]
@@ -0,0 +1,30 @@
+# Generated by Django 5.2.8 on 2026-10-18 05:19
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('pathfinder', '0002_testresponse_revision'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='QuestionAnswer',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('question_id', models.CharField(max_length=50)),
+                ('answer_value', models.TextField()),
+                ('answer_index', models.IntegerField(blank=True, null=True)),
+                ('answered_at', models.DateTimeField(auto_now=True)),
+                ('test_response', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='answers', to='pathfinder.testresponse')),
+            ],
+            options={
+                'ordering': ['test_response', 'question_id'],
+                'indexes': [models.Index(fields=['question_id', 'answer_index'], name='pathfinder__questio_111ac9_idx')],
+                'unique_together': {('test_response', 'question_id')},
+            },
+        ),
+    ]
@@ -0,0 +1,32 @@
+# Generated by Django 5.2.8 on 2026-10-18 05:20
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('pathfinder', '0003_questionanswer'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='AssessmentResults',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('aptitude_score', models.JSONField(default=dict)),
+                ('values_score', models.JSONField(default=dict)),
+                ('personal_score', models.JSONField(default=dict)),
+                ('recommended_streams', models.JSONField(default=list)),
+                ('strengths', models.JSONField(default=list)),
+                ('career_paths', models.JSONField(default=list)),
+                ('generated_at', models.DateTimeField(auto_now_add=True)),
+                ('last_viewed_at', models.DateTimeField(blank=True, null=True)),
+                ('assessment', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, related_name='results', to='pathfinder.assessment')),
+            ],
+            options={
+                'ordering': ['-generated_at'],
+            },
+        ),
+    ]
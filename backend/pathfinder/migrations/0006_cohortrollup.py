@@ -0,0 +1,31 @@
+# Generated by Django 5.2.8 on 2026-10-18 05:53
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('pathfinder', '0005_processingjob'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='CohortRollup',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('grade', models.CharField(max_length=20)),
+                ('bucket', models.DateField()),
+                ('test_type', models.CharField(choices=[('aptitude', 'Aptitude'), ('values', 'Values'), ('personal', 'Personal'), ('assessment', 'Assessment')], max_length=20)),
+                ('started_count', models.PositiveIntegerField(default=0)),
+                ('completed_count', models.PositiveIntegerField(default=0)),
+                ('duration_seconds_total', models.FloatField(default=0)),
+                ('answer_counts', models.JSONField(default=dict)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+            ],
+            options={
+                'indexes': [models.Index(fields=['bucket', 'grade'], name='pathfinder__bucket_edde67_idx')],
+                'unique_together': {('grade', 'bucket', 'test_type')},
+            },
+        ),
+    ]
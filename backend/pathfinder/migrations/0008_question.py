@@ -0,0 +1,37 @@
+# Generated by Django 5.2.8 on 2026-10-18 05:59
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('pathfinder', '0007_idempotencykey'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='Question',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('test_type', models.CharField(choices=[('aptitude', 'Aptitude'), ('values', 'Values'), ('personal', 'Personal')], max_length=20)),
+                ('question_number', models.IntegerField()),
+                ('question_text_en', models.TextField()),
+                ('question_text_hi', models.TextField(blank=True)),
+                ('question_text_te', models.TextField(blank=True)),
+                ('question_text_ta', models.TextField(blank=True)),
+                ('question_text_bn', models.TextField(blank=True)),
+                ('question_text_gu', models.TextField(blank=True)),
+                ('question_type', models.CharField(choices=[('rating', 'Rating'), ('single', 'Single Choice'), ('multiple', 'Multiple Choice'), ('text', 'Text')], default='rating', max_length=20)),
+                ('options', models.JSONField(blank=True, default=dict)),
+                ('is_active', models.BooleanField(default=True)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+            ],
+            options={
+                'ordering': ['test_type', 'question_number'],
+                'indexes': [models.Index(fields=['test_type', 'is_active'], name='pathfinder__test_ty_9379d5_idx')],
+                'unique_together': {('test_type', 'question_number')},
+            },
+        ),
+    ]
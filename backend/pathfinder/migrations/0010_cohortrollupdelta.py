@@ -0,0 +1,30 @@
+# Generated by Django 5.2.8 on 2026-10-18 06:32
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('pathfinder', '0009_accountdeletion'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='CohortRollupDelta',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('grade', models.CharField(max_length=20)),
+                ('bucket', models.DateField()),
+                ('test_type', models.CharField(choices=[('aptitude', 'Aptitude'), ('values', 'Values'), ('personal', 'Personal'), ('assessment', 'Assessment')], max_length=20)),
+                ('started_count', models.PositiveIntegerField(default=0)),
+                ('completed_count', models.PositiveIntegerField(default=0)),
+                ('duration_seconds_total', models.FloatField(default=0)),
+                ('answer_counts', models.JSONField(default=dict)),
+                ('claimed_by', models.CharField(blank=True, max_length=32)),
+            ],
+            options={
+                'indexes': [models.Index(fields=['claimed_by'], name='pathfinder__claimed_74078c_idx')],
+            },
+        ),
+    ]
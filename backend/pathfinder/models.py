@@ -1,6 +1,10 @@
+from asgiref.sync import sync_to_async
 from django.db import models
 from django.contrib.auth.models import AbstractUser
 from django.utils import timezone
+from rest_framework.utils.encoders import JSONEncoder
+
+from .answers import LIKERT_OPTIONS, encode_answer
 
 
 class CustomUser(AbstractUser):
@@ -24,14 +28,34 @@ class CustomUser(AbstractUser):
         return self.name
 
     def get_progress_percentage(self):
-        total = self.assessments.count()
-        completed = self.assessments.filter(status='completed').count()
-        return (completed / total * 100) if total > 0 else 0
+        return self.assessments.completion_stats()['completed_percentage']
 
     def get_latest_assessment(self):
         return self.assessments.order_by('-started_at').first()
 
 
+class AssessmentQuerySet(models.QuerySet):
+    def with_test_responses(self):
+        """Prefetch test responses and annotate completed test counts for serialization."""
+        return self.prefetch_related('test_responses').annotate(
+            completed_test_count=models.Count(
+                'test_responses', filter=models.Q(test_responses__is_completed=True))
+        )
+
+    def completion_stats(self):
+        """Total/completed counts and completion percentage in a single aggregate query."""
+        stats = self.aggregate(
+            total_assessments=models.Count('id'),
+            completed_assessments=models.Count('id', filter=models.Q(status='completed')),
+        )
+        total = stats['total_assessments']
+        stats['completed_percentage'] = (stats['completed_assessments'] / total * 100) if total > 0 else 0
+        return stats
+
+    async def acompletion_stats(self):
+        return await sync_to_async(self.completion_stats)()
+
+
 class Assessment(models.Model):
     STATUS_CHOICES = [
         ('in_progress', 'In Progress'),
@@ -49,6 +73,8 @@ class Assessment(models.Model):
     started_at = models.DateTimeField(auto_now_add=True)
     completed_at = models.DateTimeField(null=True, blank=True)
 
+    objects = AssessmentQuerySet.as_manager()
+
     class Meta:
         ordering = ['-started_at']
         unique_together = ('user', 'assessment_number')
@@ -67,6 +93,8 @@ class Assessment(models.Model):
         return self.test_responses.all()
     
     def is_fully_completed(self):
+        if hasattr(self, 'completed_test_count'):
+            return self.completed_test_count == 3
         return self.test_responses.filter(is_completed=True).count() == 3
     
     def get_chat_history(self):
@@ -89,6 +117,7 @@ class TestResponse(models.Model):
     is_completed = models.BooleanField(default=False)
     current_question_index = models.IntegerField(default=0)
     total_questions = models.IntegerField(default=0)
+    revision = models.IntegerField(default=0)  # bumped on every save, used to reject stale autosaves
     last_saved_at = models.DateTimeField(auto_now=True)
 
     class Meta:
@@ -105,6 +134,247 @@ class TestResponse(models.Model):
     def is_test_complete(self):
         return self.is_completed
 
+    def get_all_answers(self):
+        return self.answers.all()
+
+    def sync_answers(self):
+        """Replace the normalized QuestionAnswer rows with the current responses blob."""
+        self.answers.all().delete()
+        QuestionAnswer.objects.bulk_create(QuestionAnswer.from_test_response(self))
+
+    def apply_delta(self, changes, removed=(), current_question_index=None):
+        """Merge changed answers into the stored responses and bump the revision."""
+        if not isinstance(self.responses, dict):
+            raise ValueError('responses must be an object to apply a delta')
+        self.responses.update(changes)
+        for question_id in removed:
+            self.responses.pop(question_id, None)
+        if current_question_index is not None:
+            self.current_question_index = current_question_index
+        self.revision += 1
+        self.save(update_fields=['responses', 'current_question_index', 'revision', 'last_saved_at'])
+
+class Question(models.Model):
+    """A test question with its translations; `question_number` is the id used as the key in TestResponse.responses."""
+    TEST_TYPE_CHOICES = TestResponse.TEST_TYPE_CHOICES
+    QUESTION_TYPE_CHOICES = [
+        ('rating', 'Rating'),
+        ('single', 'Single Choice'),
+        ('multiple', 'Multiple Choice'),
+        ('text', 'Text'),
+    ]
+    LANGUAGES = ['en', 'hi', 'te', 'ta', 'bn', 'gu']
+
+    test_type = models.CharField(max_length=20, choices=TEST_TYPE_CHOICES)
+    question_number = models.IntegerField()
+    question_text_en = models.TextField()
+    question_text_hi = models.TextField(blank=True)
+    question_text_te = models.TextField(blank=True)
+    question_text_ta = models.TextField(blank=True)
+    question_text_bn = models.TextField(blank=True)
+    question_text_gu = models.TextField(blank=True)
+    question_type = models.CharField(max_length=20, choices=QUESTION_TYPE_CHOICES, default='rating')
+    options = models.JSONField(default=dict, blank=True)  # {language: [option, ...]}; rating questions use the Likert scale
+    is_active = models.BooleanField(default=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        ordering = ['test_type', 'question_number']
+        unique_together = ('test_type', 'question_number')
+        indexes = [
+            models.Index(fields=['test_type', 'is_active']),
+        ]
+
+    def get_question_text(self, language):
+        """Text in `language`, falling back to English where a translation is missing."""
+        return getattr(self, f'question_text_{language}', '') or self.question_text_en
+
+    def get_options(self, language):
+        if self.question_type == 'rating':
+            options = LIKERT_OPTIONS
+        elif self.question_type == 'text':
+            return []
+        else:
+            options = self.options
+        return options.get(language) or options.get('en', [])
+
+
+class QuestionAnswer(models.Model):
+    test_response = models.ForeignKey(TestResponse, on_delete=models.CASCADE, related_name='answers')
+    question_id = models.CharField(max_length=50)
+    answer_value = models.TextField()  # option text, or JSON-encoded list for multi-select answers
+    answer_index = models.IntegerField(null=True, blank=True)  # 0-4 on the rating scale, null otherwise
+    answered_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        ordering = ['test_response', 'question_id']
+        unique_together = ('test_response', 'question_id')
+        indexes = [
+            models.Index(fields=['question_id', 'answer_index']),
+        ]
+
+    @classmethod
+    def from_test_response(cls, test_response):
+        answers = []
+        for question_id, value in test_response.responses.items():
+            answer_value, answer_index = encode_answer(value)
+            answers.append(cls(
+                test_response=test_response, question_id=str(question_id),
+                answer_value=answer_value, answer_index=answer_index))
+        return answers
+
+    def get_score(self):
+        return self.answer_index
+
+
+class AssessmentResults(models.Model):
+    SCORE_FIELDS = ['aptitude_score', 'values_score', 'personal_score',
+                    'recommended_streams', 'strengths', 'career_paths']
+
+    assessment = models.OneToOneField(Assessment, on_delete=models.CASCADE, related_name='results')
+    aptitude_score = models.JSONField(default=dict)  # {category: 0-100}
+    values_score = models.JSONField(default=dict)  # {category: 0-100}
+    personal_score = models.JSONField(default=dict)
+    recommended_streams = models.JSONField(default=list)  # [{stream, score}] best first
+    strengths = models.JSONField(default=list)
+    career_paths = models.JSONField(default=list)
+    generated_at = models.DateTimeField(auto_now_add=True)
+    last_viewed_at = models.DateTimeField(null=True, blank=True)
+
+    class Meta:
+        ordering = ['-generated_at']
+
+    def get_top_stream(self):
+        return self.recommended_streams[0]['stream'] if self.recommended_streams else None
+
+
+class ProcessingJob(models.Model):
+    STATUS_CHOICES = [
+        ('queued', 'Queued'),
+        ('processing', 'Processing'),
+        ('completed', 'Completed'),
+        ('error', 'Error'),
+    ]
+    # 1 queued, 2 claimed by a worker, 3 scoring, 4 saving results, 5 done
+    STAGE_COUNT = 5
+
+    assessment = models.OneToOneField(Assessment, on_delete=models.CASCADE, related_name='processing_job')
+    status = models.CharField(max_length=20, choices=STATUS_CHOICES, default='queued')
+    current_stage = models.IntegerField(default=1)
+    attempts = models.IntegerField(default=0)
+    claimed_by = models.CharField(max_length=64, blank=True)
+    error = models.TextField(blank=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+    started_at = models.DateTimeField(null=True, blank=True)
+    finished_at = models.DateTimeField(null=True, blank=True)
+
+    class Meta:
+        ordering = ['created_at']
+        indexes = [
+            models.Index(fields=['status', 'created_at']),
+        ]
+
+    def get_progress_percentage(self):
+        return int(self.current_stage / self.STAGE_COUNT * 100)
+
+
+class AccountDeletion(models.Model):
+    """
+    Background purge of a soft-disabled account. Rows are deleted table by table in bounded batches; `step`
+    and `deleted` are saved with each batch, so a worker that dies mid-purge is resumed where it stopped.
+    """
+    STATUS_CHOICES = [
+        ('queued', 'Queued'),
+        ('running', 'Running'),
+        ('completed', 'Completed'),
+        ('error', 'Error'),
+    ]
+
+    user_id = models.BigIntegerField(unique=True)  # not a foreign key: the row outlives the user it purges
+    status = models.CharField(max_length=20, choices=STATUS_CHOICES, default='queued')
+    step = models.IntegerField(default=0)  # index into deletion.PURGE_STEPS
+    deleted = models.JSONField(default=dict)  # {model label: rows deleted}
+    attempts = models.IntegerField(default=0)
+    claimed_by = models.CharField(max_length=64, blank=True)
+    error = models.TextField(blank=True)
+    requested_at = models.DateTimeField(auto_now_add=True)
+    started_at = models.DateTimeField(null=True, blank=True)
+    heartbeat_at = models.DateTimeField(null=True, blank=True)
+    finished_at = models.DateTimeField(null=True, blank=True)
+
+    class Meta:
+        ordering = ['requested_at']
+        indexes = [
+            models.Index(fields=['status', 'requested_at']),
+        ]
+
+    def get_progress_percentage(self):
+        from .deletion import PURGE_STEPS
+        return int(self.step / len(PURGE_STEPS) * 100)
+
+
+class IdempotencyKey(models.Model):
+    """Stored outcome of a write sent with an Idempotency-Key header, replayed for retries until it expires."""
+    user = models.ForeignKey(CustomUser, on_delete=models.CASCADE, related_name='idempotency_keys')
+    key = models.CharField(max_length=255)
+    endpoint = models.CharField(max_length=50)
+    fingerprint = models.CharField(max_length=64)  # sha256 of endpoint + request body
+    status_code = models.PositiveSmallIntegerField()
+    response = models.JSONField(encoder=JSONEncoder)
+    created_at = models.DateTimeField(auto_now_add=True)
+    expires_at = models.DateTimeField()
+
+    class Meta:
+        unique_together = ('user', 'key')
+        indexes = [
+            models.Index(fields=['expires_at']),
+        ]
+
+
+class CohortRollup(models.Model):
+    """
+    Per-grade, per-day counters for counselor analytics, folded from CohortRollupDelta rows and rebuilt
+    nightly by `rebuild_rollups`. test_type 'assessment' rows count whole assessments.
+    """
+    TEST_TYPE_CHOICES = Assessment.TEST_TYPE_CHOICES + [('assessment', 'Assessment')]
+
+    grade = models.CharField(max_length=20)
+    bucket = models.DateField()
+    test_type = models.CharField(max_length=20, choices=TEST_TYPE_CHOICES)
+    started_count = models.PositiveIntegerField(default=0)
+    completed_count = models.PositiveIntegerField(default=0)
+    duration_seconds_total = models.FloatField(default=0)  # started_at -> submitted_at, over completed tests
+    answer_counts = models.JSONField(default=dict)  # {question_id: {answer key: count}}
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        unique_together = ('grade', 'bucket', 'test_type')
+        indexes = [
+            models.Index(fields=['bucket', 'grade']),
+        ]
+
+
+class CohortRollupDelta(models.Model):
+    """
+    One start or submit's contribution to a CohortRollup, appended without touching the shared rollup row;
+    `analytics.compact_rollups` folds these into the rollups.
+    """
+    grade = models.CharField(max_length=20)
+    bucket = models.DateField()
+    test_type = models.CharField(max_length=20, choices=CohortRollup.TEST_TYPE_CHOICES)
+    started_count = models.PositiveIntegerField(default=0)
+    completed_count = models.PositiveIntegerField(default=0)
+    duration_seconds_total = models.FloatField(default=0)
+    answer_counts = models.JSONField(default=dict)
+    claimed_by = models.CharField(max_length=32, blank=True)  # set by the compaction folding this row
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['claimed_by']),
+        ]
+
+
 class ChatMessage(models.Model):
     SENDER_CHOICES = [
         ('user', 'User'),
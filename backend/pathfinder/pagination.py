@@ -0,0 +1,97 @@
+import asyncio
+import base64
+import math
+import time
+from datetime import datetime
+
+from django.db.models import Q
+
+DEFAULT_PAGE_SIZE = 50
+MAX_PAGE_SIZE = 100
+MAX_WAIT_SECONDS = 25
+POLL_INTERVAL = 1.0
+
+
+class InvalidCursor(ValueError):
+    pass
+
+
+def encode_cursor(obj):
+    """Cursor for a model instance or a `.values()` row."""
+    if isinstance(obj, dict):
+        raw = f'{obj["created_at"].isoformat()}|{obj["id"]}'
+    else:
+        raw = f'{obj.created_at.isoformat()}|{obj.id}'
+    return base64.urlsafe_b64encode(raw.encode()).decode()
+
+
+def decode_cursor(cursor):
+    try:
+        created_at, pk = base64.urlsafe_b64decode(cursor.encode()).decode().rsplit('|', 1)
+        return datetime.fromisoformat(created_at), int(pk)
+    except (ValueError, UnicodeDecodeError) as exc:
+        raise InvalidCursor('Invalid cursor') from exc
+
+
+def keyset_queryset(queryset, before=None, after=None):
+    """
+    Order/filter a (created_at, id)-keyed queryset for one page. With no cursor this is the newest page;
+    `before`/`after` page backwards/forwards from a cursor. Returns (queryset, newest_first).
+    """
+    if after:
+        created_at, pk = decode_cursor(after)
+        queryset = queryset.filter(Q(created_at__gt=created_at) | Q(created_at=created_at, id__gt=pk))
+        return queryset.order_by('created_at', 'id'), False
+    if before:
+        created_at, pk = decode_cursor(before)
+        queryset = queryset.filter(Q(created_at__lt=created_at) | Q(created_at=created_at, id__lt=pk))
+    return queryset.order_by('-created_at', '-id'), True
+
+
+def finish_page(items, limit, newest_first):
+    """Trim the limit+1 probe row and return (items oldest first, has_more)."""
+    has_more = len(items) > limit
+    items = items[:limit]
+    return (items[::-1] if newest_first else items), has_more
+
+
+def keyset_page(queryset, before=None, after=None, limit=DEFAULT_PAGE_SIZE):
+    queryset, newest_first = keyset_queryset(queryset, before, after)
+    return finish_page(list(queryset[:limit + 1]), limit, newest_first)
+
+
+def parse_wait(value):
+    """Long-poll seconds from a query parameter, clamped to [0, MAX_WAIT_SECONDS]; raises ValueError."""
+    if value is None:
+        return 0
+    wait = float(value)
+    if not math.isfinite(wait):
+        raise ValueError(f'Invalid wait {value!r}')
+    return max(0.0, min(wait, MAX_WAIT_SECONDS))
+
+
+def wait_for_new(queryset, since_id, limit=DEFAULT_PAGE_SIZE, wait=0):
+    """Items with id > since_id, polling for up to `wait` seconds (see `parse_wait`) until at least one appears."""
+    deadline = time.monotonic() + parse_wait(wait)
+    while True:
+        items = list(queryset.filter(id__gt=since_id).order_by('id')[:limit + 1])
+        if items or time.monotonic() >= deadline:
+            return items[:limit], len(items) > limit
+        time.sleep(POLL_INTERVAL)
+
+
+def parse_limit(value):
+    try:
+        return max(1, min(int(value), MAX_PAGE_SIZE))
+    except (TypeError, ValueError):
+        return DEFAULT_PAGE_SIZE
+
+
+async def await_new(queryset, since_id, limit=DEFAULT_PAGE_SIZE, wait=0):
+    """Async `wait_for_new`: the long poll sleeps on the event loop instead of holding a thread."""
+    deadline = time.monotonic() + parse_wait(wait)
+    while True:
+        items = [item async for item in queryset.filter(id__gt=since_id).order_by('id')[:limit + 1]]
+        if items or time.monotonic() >= deadline:
+            return items[:limit], len(items) > limit
+        await asyncio.sleep(POLL_INTERVAL)
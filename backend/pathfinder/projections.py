@@ -0,0 +1,119 @@
+"""
+Read-only fast path for the hot GET endpoints: the fields of a DRF serializer are compiled once into
+(name, source, converter) triples and applied to `.values()` rows, skipping per-object field binding and
+`to_representation` dispatch. The output is the same dict the serializer would produce.
+"""
+from django.conf import settings
+from django.utils import timezone
+from rest_framework import serializers
+
+from .metrics import serializer_timer
+from .models import TestResponse
+from .serializers import UserSerializer, AssessmentSerializer, TestResponseSerializer, ChatMessageSerializer
+
+
+def _datetime(value):
+    if settings.USE_TZ:
+        value = timezone.localtime(value)
+    text = value.isoformat()
+    return text[:-6] + 'Z' if text.endswith('+00:00') else text
+
+
+def _identity(value):
+    return value
+
+
+# Checked in order, so subclasses (EmailField is a CharField) must come before their bases.
+CONVERTERS = [
+    (serializers.DateTimeField, _datetime),
+    (serializers.BooleanField, bool),
+    (serializers.IntegerField, int),
+    (serializers.CharField, str),
+    (serializers.ChoiceField, str),
+    (serializers.JSONField, _identity),
+]
+
+
+def converter_for(field):
+    for field_class, convert in CONVERTERS:
+        if isinstance(field, field_class):
+            return convert
+    raise TypeError(f'No fast-path converter for {type(field).__name__} {field.field_name!r}')
+
+
+class Projection:
+    """Precompiled equivalent of a ModelSerializer's output; `computed` supplies its method and nested fields."""
+
+    def __init__(self, serializer_class, **computed):
+        self.fields = []
+        for name, field in serializer_class().fields.items():
+            if name in computed:
+                self.fields.append((name, None, computed[name]))
+            else:
+                self.fields.append((name, field.source, converter_for(field)))
+        self.sources = [source for _, source, _ in self.fields if source is not None]
+
+    def __call__(self, row):
+        data = {}
+        for name, source, convert in self.fields:
+            if source is None:
+                data[name] = convert(row)
+            else:
+                value = row[source]
+                data[name] = None if value is None else convert(value)
+        return data
+
+    def many(self, rows):
+        with serializer_timer():
+            return [self(row) for row in rows]
+
+    def from_instance(self, instance):
+        with serializer_timer():
+            return self({source: getattr(instance, source) for source in self.sources})
+
+
+def _progress_percentage(row):
+    # Mirrors TestResponse.get_progress_percentage.
+    total = row['total_questions']
+    return int((row['current_question_index'] / total) * 100) if total else 0
+
+
+def _is_fully_completed(row):
+    # Mirrors Assessment.is_fully_completed with the completed_test_count annotation.
+    return sum(1 for test_response in row['test_responses'] if test_response['is_completed']) == 3
+
+
+USER = Projection(UserSerializer)
+CHAT_MESSAGE = Projection(ChatMessageSerializer)
+TEST_RESPONSE = Projection(TestResponseSerializer, progress_percentage=_progress_percentage)
+ASSESSMENT = Projection(AssessmentSerializer, test_responses=lambda row: row['test_responses'],
+                        is_fully_completed=_is_fully_completed)
+
+
+def _test_responses(assessment_rows):
+    return TestResponse.objects.filter(assessment_id__in=[row['id'] for row in assessment_rows]).order_by(
+        'assessment_id', 'test_type').values('assessment_id', *TEST_RESPONSE.sources)
+
+
+def _attach(assessment_rows, test_response_rows):
+    by_id = {}
+    for row in assessment_rows:
+        row['test_responses'] = []
+        by_id[row['id']] = row
+    with serializer_timer():
+        for row in test_response_rows:
+            by_id[row['assessment_id']]['test_responses'].append(TEST_RESPONSE(row))
+    return ASSESSMENT.many(assessment_rows)
+
+
+def assessment_data(queryset):
+    """AssessmentSerializer(queryset, many=True).data in two queries, without model instances."""
+    rows = list(queryset.values(*ASSESSMENT.sources))
+    return _attach(rows, _test_responses(rows)) if rows else []
+
+
+async def aassessment_data(queryset):
+    rows = [row async for row in queryset.values(*ASSESSMENT.sources)]
+    if not rows:
+        return []
+    return _attach(rows, [row async for row in _test_responses(rows)])
@@ -0,0 +1,34 @@
+import re
+
+from rest_framework.renderers import JSONRenderer
+
+try:
+    import orjson
+except ImportError:  # optional; without it FastJSONRenderer is plain JSONRenderer
+    orjson = None
+
+# orjson writes floats >= 1e16 and < 1e-4 differently from json.dumps ("1e16" vs "1e+16", "0.00001" vs "1e-05").
+# Such payloads are rare; a match (usually a false positive inside a string) just falls back to json.dumps.
+# The pattern starts with a literal so the scan stays fast.
+EXPONENT = re.compile(rb'e[-0-9]')
+SMALL_FLOAT = b'0.0000'
+
+
+class FastJSONRenderer(JSONRenderer):
+    """JSONRenderer with byte-identical output, encoded with orjson when it is installed."""
+
+    def __init__(self):
+        self.default = self.encoder_class().default
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        if orjson is None or data is None or not (self.compact and self.strict and not self.ensure_ascii) \
+                or self.get_indent(accepted_media_type, renderer_context or {}) is not None:
+            return super().render(data, accepted_media_type, renderer_context)
+        try:
+            ret = orjson.dumps(data, default=self.default, option=(
+                orjson.OPT_NON_STR_KEYS | orjson.OPT_PASSTHROUGH_DATETIME | orjson.OPT_PASSTHROUGH_DATACLASS))
+        except TypeError:  # integers beyond 64 bits, unsupported types
+            return super().render(data, accepted_media_type, renderer_context)
+        if SMALL_FLOAT in ret or EXPONENT.search(ret):
+            return super().render(data, accepted_media_type, renderer_context)
+        return ret.replace('\u2028'.encode(), b'\\u2028').replace('\u2029'.encode(), b'\\u2029')
@@ -0,0 +1,202 @@
+import numpy as np
+
+from .answers import LIKERT_INDEX, SUBJECT_INDEX, YES_NO_INDEX
+from .models import AssessmentResults, TestResponse
+
+# question_id -> (category, reverse_scored)
+APTITUDE_QUESTIONS = {
+    '1': ('analytical', False), '2': ('analytical', True), '6': ('analytical', False), '27': ('analytical', False),
+    '4': ('verbal', True), '5': ('verbal', True), '7': ('verbal', False), '33': ('verbal', False),
+    '12': ('interpersonal', False), '13': ('interpersonal', True), '14': ('interpersonal', False),
+    '30': ('interpersonal', False),
+    '8': ('creative', True), '10': ('creative', True), '32': ('creative', False), '35': ('creative', False),
+    '11': ('spatial', True), '25': ('spatial', False),
+    '3': ('technical', False), '15': ('technical', False), '16': ('technical', False),
+    '17': ('technical', False), '26': ('technical', False),
+    '9': ('organisational', False), '18': ('organisational', False), '19': ('organisational', True),
+    '20': ('entrepreneurial', True), '21': ('entrepreneurial', False), '22': ('entrepreneurial', True),
+    '28': ('entrepreneurial', False),
+    '29': ('nature_and_care', False), '31': ('nature_and_care', False), '34': ('nature_and_care', False),
+}
+
+VALUES_QUESTIONS = {
+    '36': ('work_life_balance', False), '37': ('work_life_balance', True),
+    '38': ('recognition', True), '40': ('recognition', True),
+    '39': ('autonomy', False),
+    '41': ('teamwork', False),
+    '42': ('growth', False),
+    '43': ('financial_reward', False), '44': ('financial_reward', False), '45': ('financial_reward', True),
+    '47': ('financial_reward', False),
+    '46': ('stability', False), '48': ('stability', False), '49': ('stability', False),
+    '50': ('social_impact', False), '52': ('social_impact', False),
+    '51': ('leadership', False),
+}
+
+SUBJECTS_QUESTION = '53'
+CAREER_FIELD_QUESTION = '54'
+COLLEGE_QUESTION = '55'
+SUBJECTS = ['math', 'science', 'social_studies', 'languages', 'computer_science',
+            'art_design', 'music', 'drama', 'economics', 'physical_education']
+
+STREAMS = ['Science (PCM)', 'Science (PCB)', 'Commerce', 'Arts & Humanities', 'Vocational & Skill-based']
+
+# Feature weights per stream; features are aptitude categories, then values categories, then subjects.
+STREAM_WEIGHTS = {
+    'analytical':        [3, 2, 2, 0, 0],
+    'verbal':            [0, 0, 1, 3, 0],
+    'interpersonal':     [0, 1, 1, 2, 1],
+    'creative':          [0, 0, 0, 3, 1],
+    'spatial':           [2, 0, 0, 1, 2],
+    'technical':         [3, 1, 0, 0, 2],
+    'organisational':    [0, 0, 3, 0, 1],
+    'entrepreneurial':   [0, 0, 3, 0, 1],
+    'nature_and_care':   [0, 3, 0, 0, 2],
+    'work_life_balance': [0, 0, 0, 1, 1],
+    'recognition':       [1, 1, 1, 1, 0],
+    'autonomy':          [0, 0, 1, 2, 1],
+    'teamwork':          [0, 1, 1, 1, 1],
+    'growth':            [1, 1, 1, 1, 0],
+    'financial_reward':  [1, 0, 2, 0, 0],
+    'stability':         [1, 1, 1, 0, 0],
+    'social_impact':     [0, 2, 0, 2, 0],
+    'leadership':        [0, 0, 2, 1, 0],
+    'math':              [3, 0, 2, 0, 0],
+    'science':           [2, 3, 0, 0, 0],
+    'social_studies':    [0, 0, 0, 3, 0],
+    'languages':         [0, 0, 0, 3, 0],
+    'computer_science':  [3, 0, 0, 0, 1],
+    'art_design':        [0, 0, 0, 2, 2],
+    'music':             [0, 0, 0, 2, 1],
+    'drama':             [0, 0, 0, 2, 1],
+    'economics':         [0, 0, 3, 1, 0],
+    'physical_education': [0, 1, 0, 0, 3],
+}
+
+CAREER_PATHS = {
+    'Science (PCM)': ['Engineering', 'Software Development', 'Architecture', 'Data Science'],
+    'Science (PCB)': ['Medicine', 'Nursing', 'Pharmacy', 'Biotechnology', 'Veterinary Science'],
+    'Commerce': ['Chartered Accountancy', 'Business Management', 'Banking & Finance', 'Entrepreneurship'],
+    'Arts & Humanities': ['Law', 'Journalism', 'Design', 'Teaching', 'Civil Services'],
+    'Vocational & Skill-based': ['Hospitality', 'Sports & Fitness', 'Technician Trades', 'Agriculture'],
+}
+
+STRENGTH_THRESHOLD = 60.0
+TEST_TYPES = ['aptitude', 'values', 'personal']
+
+
+class Scale:
+    """Compiled layout of one rating-scale test: question columns, reverse mask and category membership."""
+
+    def __init__(self, questions):
+        self.question_ids = list(questions)
+        self.column = {question_id: i for i, question_id in enumerate(self.question_ids)}
+        self.categories = list(dict.fromkeys(category for category, _ in questions.values()))
+        self.reverse = np.array([questions[q][1] for q in self.question_ids])
+        self.membership = np.zeros((len(self.question_ids), len(self.categories)))
+        for i, question_id in enumerate(self.question_ids):
+            self.membership[i, self.categories.index(questions[question_id][0])] = 1.0
+
+    def answer_matrix(self, responses_list):
+        """(N, Q) matrix of 0-4 answers, NaN where a question was skipped or unrecognised."""
+        matrix = np.full((len(responses_list), len(self.question_ids)), np.nan)
+        for row, responses in enumerate(responses_list):
+            for question_id, value in responses.items():
+                col = self.column.get(str(question_id))
+                if col is not None and isinstance(value, str) and value in LIKERT_INDEX:
+                    matrix[row, col] = LIKERT_INDEX[value]
+        return matrix
+
+    def score(self, responses_list):
+        """(N, C) category scores on a 0-100 scale; NaN for categories with no answers."""
+        matrix = self.answer_matrix(responses_list)
+        matrix = np.where(self.reverse, 4 - matrix, matrix)
+        answered = ~np.isnan(matrix)
+        totals = np.nan_to_num(matrix) @ self.membership
+        counts = answered @ self.membership
+        with np.errstate(invalid='ignore', divide='ignore'):
+            return np.where(counts > 0, totals / (counts * 4) * 100, np.nan)
+
+
+APTITUDE_SCALE = Scale(APTITUDE_QUESTIONS)
+VALUES_SCALE = Scale(VALUES_QUESTIONS)
+FEATURES = APTITUDE_SCALE.categories + VALUES_SCALE.categories + SUBJECTS
+WEIGHT_MATRIX = np.array([STREAM_WEIGHTS[feature] for feature in FEATURES], dtype=float)
+WEIGHT_MATRIX /= WEIGHT_MATRIX.sum(axis=0)
+
+
+def subject_matrix(responses_list):
+    """(N, S) matrix with 100 for each enjoyed subject and a neutral 50 otherwise."""
+    matrix = np.full((len(responses_list), len(SUBJECTS)), 50.0)
+    for row, responses in enumerate(responses_list):
+        selected = responses.get(SUBJECTS_QUESTION) or []
+        for option in selected if isinstance(selected, list) else [selected]:
+            if option in SUBJECT_INDEX:
+                matrix[row, SUBJECT_INDEX[option]] = 100.0
+    return matrix
+
+
+def _category_dict(categories, row):
+    return {category: round(float(value), 2) for category, value in zip(categories, row) if not np.isnan(value)}
+
+
+def score_responses(aptitude, values, personal):
+    """
+    Score N assessments at once. Each argument is a list of N responses dicts for that test.
+    Returns a list of N dicts with the AssessmentResults fields.
+    """
+    aptitude_scores = APTITUDE_SCALE.score(aptitude)
+    values_scores = VALUES_SCALE.score(values)
+    subjects = subject_matrix(personal)
+    features = np.hstack([aptitude_scores, values_scores, subjects])
+    stream_scores = np.nan_to_num(features, nan=50.0) @ WEIGHT_MATRIX
+    rankings = np.argsort(-stream_scores, axis=1)
+
+    results = []
+    for i in range(len(aptitude)):
+        recommended_streams = [
+            {'stream': STREAMS[j], 'score': round(float(stream_scores[i, j]), 2)} for j in rankings[i]]
+        strength_order = np.argsort(-np.nan_to_num(aptitude_scores[i], nan=-1))
+        strengths = [APTITUDE_SCALE.categories[j] for j in strength_order[:3]
+                     if aptitude_scores[i, j] >= STRENGTH_THRESHOLD]
+        college = personal[i].get(COLLEGE_QUESTION)
+        results.append({
+            'aptitude_score': _category_dict(APTITUDE_SCALE.categories, aptitude_scores[i]),
+            'values_score': _category_dict(VALUES_SCALE.categories, values_scores[i]),
+            'personal_score': {
+                'subjects': [SUBJECTS[j] for j in np.flatnonzero(subjects[i] == 100.0)],
+                'career_interest': personal[i].get(CAREER_FIELD_QUESTION, ''),
+                'plans_college': YES_NO_INDEX[college] == 0 if isinstance(college, str) and college in YES_NO_INDEX else None,
+            },
+            'recommended_streams': recommended_streams,
+            'strengths': strengths,
+            'career_paths': CAREER_PATHS[recommended_streams[0]['stream']],
+        })
+    return results
+
+
+def score_assessments(assessment_ids, batch_size=1000, on_scored=None):
+    """
+    Score and persist results for the given assessments in batches; returns the number scored.
+    `on_scored(batch)` is called after each batch is scored and before its results are saved.
+    """
+    assessment_ids = list(assessment_ids)
+    scored = 0
+    for start in range(0, len(assessment_ids), batch_size):
+        batch = assessment_ids[start:start + batch_size]
+        responses = {assessment_id: {} for assessment_id in batch}
+        rows = TestResponse.objects.filter(assessment_id__in=batch).values_list(
+            'assessment_id', 'test_type', 'responses')
+        for assessment_id, test_type, answers in rows:
+            responses[assessment_id][test_type] = answers or {}
+        scores = score_responses(*[
+            [responses[assessment_id].get(test_type, {}) for assessment_id in batch] for test_type in TEST_TYPES])
+        if on_scored:
+            on_scored(batch)
+        AssessmentResults.objects.bulk_create(
+            [AssessmentResults(assessment_id=assessment_id, **result) for assessment_id, result in zip(batch, scores)],
+            update_conflicts=True,
+            unique_fields=['assessment'],
+            update_fields=AssessmentResults.SCORE_FIELDS + ['generated_at'],
+        )
+        scored += len(batch)
+    return scored
@@ -1,8 +1,16 @@
 from rest_framework import serializers
+from .metrics import serializer_timer
 from .models import CustomUser, Assessment, TestResponse, ChatMessage
 
 
-class UserSerializer(serializers.ModelSerializer):
+class TimedModelSerializer(serializers.ModelSerializer):
+    """Reports its serialization time to the request metrics."""
+    def to_representation(self, instance):
+        with serializer_timer():
+            return super().to_representation(instance)
+
+
+class UserSerializer(TimedModelSerializer):
     class Meta:
         model = CustomUser
         fields = ['id', 'username', 'name', 'grade', 'age', 
@@ -10,21 +18,21 @@ class UserSerializer(serializers.ModelSerializer):
         read_only_fields = ['id', 'created_at']
 
 
-class TestResponseSerializer(serializers.ModelSerializer):
+class TestResponseSerializer(TimedModelSerializer):
     progress_percentage = serializers.SerializerMethodField()
     
     class Meta:
         model = TestResponse
         fields = ['id', 'test_type', 'responses', 'started_at', 
                   'submitted_at', 'is_completed', 'current_question_index', 
-                  'total_questions', 'last_saved_at', 'progress_percentage']
-        read_only_fields = ['started_at', 'last_saved_at']
+                  'total_questions', 'revision', 'last_saved_at', 'progress_percentage']
+        read_only_fields = ['started_at', 'revision', 'last_saved_at']
     
     def get_progress_percentage(self, obj):
         return obj.get_progress_percentage()
 
 
-class AssessmentSerializer(serializers.ModelSerializer):
+class AssessmentSerializer(TimedModelSerializer):
     test_responses = TestResponseSerializer(many=True, read_only=True)
     is_fully_completed = serializers.SerializerMethodField()
     
@@ -38,7 +46,7 @@ class AssessmentSerializer(serializers.ModelSerializer):
         return obj.is_fully_completed()
 
 
-class ChatMessageSerializer(serializers.ModelSerializer):
+class ChatMessageSerializer(TimedModelSerializer):
     class Meta:
         model = ChatMessage
         fields = ['id', 'message_text', 'sender', 'created_at', 'is_results_chat']
@@ -0,0 +1,64 @@
+from django.db.models.signals import post_save, post_delete
+from django.dispatch import receiver
+from rest_framework_simplejwt.token_blacklist.models import BlacklistedToken
+
+from .analytics import record_assessment_started, record_test_started
+from .authentication import forget_user
+from .cache import invalidate_user
+from .catalog import invalidate_catalogs
+from .models import CustomUser, Assessment, TestResponse, Question
+from .tokens import bump_blacklist_version
+
+
+def _is_cascade(instance, kwargs):
+    # Cascades from a deleted user/assessment are covered by the origin's own signal.
+    origin = kwargs.get('origin')
+    return isinstance(origin, (CustomUser, Assessment)) and origin is not instance
+
+
+@receiver([post_save, post_delete], sender=CustomUser)
+def invalidate_user_cache(sender, instance, **kwargs):
+    invalidate_user(instance.pk)
+    forget_user(instance.pk)
+
+
+@receiver([post_save, post_delete], sender=Assessment)
+def invalidate_assessment_cache(sender, instance, **kwargs):
+    if not _is_cascade(instance, kwargs):
+        invalidate_user(instance.user_id)
+
+
+@receiver([post_save, post_delete], sender=TestResponse)
+def invalidate_test_response_cache(sender, instance, **kwargs):
+    if _is_cascade(instance, kwargs):
+        return
+    if TestResponse.assessment.is_cached(instance):
+        user_id = instance.assessment.user_id
+    else:
+        user_id = Assessment.objects.filter(
+            pk=instance.assessment_id).values_list('user_id', flat=True).first()
+    if user_id is not None:
+        invalidate_user(user_id)
+
+
+@receiver(post_save, sender=Assessment)
+def count_assessment_started(sender, instance, created, raw=False, **kwargs):
+    if created and not raw:
+        record_assessment_started(instance)
+
+
+@receiver(post_save, sender=TestResponse)
+def count_test_started(sender, instance, created, raw=False, **kwargs):
+    if created and not raw:
+        record_test_started(instance)
+
+
+@receiver([post_save, post_delete], sender=Question)
+def invalidate_question_catalogs(sender, instance, **kwargs):
+    invalidate_catalogs()
+
+
+@receiver(post_save, sender=BlacklistedToken)
+def invalidate_blacklist_filters(sender, instance, created, **kwargs):
+    if created:
+        bump_blacklist_version()
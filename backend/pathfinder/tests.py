@@ -1,3 +1,1064 @@
-from django.test import TestCase
+import asyncio
+import csv
+import gzip
+import json
+import os
+import tempfile
+from datetime import timedelta, timezone as dt_timezone
+from io import StringIO
+from unittest import mock
 
-# Create your tests here.
+from asgiref.sync import sync_to_async
+from django.core.cache import cache
+from django.core.management import call_command
+from django.db import connection
+from django.test import TestCase, TransactionTestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+from rest_framework.renderers import JSONRenderer
+from rest_framework.test import APIClient
+from rest_framework_simplejwt.token_blacklist.models import BlacklistedToken, OutstandingToken
+from rest_framework_simplejwt.tokens import RefreshToken
+
+from .analytics import compact_rollups
+from .autosave import autosave_buffer
+from .benchmark import effective_status, run_autosave_benchmark
+from .catalog import catalogs
+from .deletion import PURGE_STEPS, claim_deletion, purge_account, purge_batch
+from .events import get_broker, issue_ticket
+from .jobs import claim_jobs, enqueue_processing, requeue_stale_jobs
+from .management.commands.load_questions import QUESTIONS_FILE
+from .metrics import HISTOGRAMS
+from .models import (
+    CustomUser, Assessment, TestResponse, QuestionAnswer, AssessmentResults, ChatMessage, CohortRollup,
+    IdempotencyKey, Question, AccountDeletion, ProcessingJob, CohortRollupDelta,
+)
+from .renderers import FastJSONRenderer
+from .scoring import score_responses
+from .tokens import blacklist_filter
+from .urls import urlpatterns
+
+
+def create_completed_assessment(user, number):
+    assessment = Assessment.objects.create(
+        user=user, assessment_number=number, status='completed', completed_at=timezone.now())
+    for test_type in ['aptitude', 'values', 'personal']:
+        TestResponse.objects.create(
+            assessment=assessment, test_type=test_type, is_completed=True,
+            responses={'q1': 'a'}, total_questions=10, current_question_index=10)
+    return assessment
+
+
+NO_CACHE = {'default': {'BACKEND': 'django.core.cache.backends.dummy.DummyCache'}}
+
+
+@override_settings(CACHES=NO_CACHE)
+class AssessmentQueryCountTests(TestCase):
+    def setUp(self):
+        self.user = CustomUser.objects.create_user(
+            username='student', password='pass', name='Student', grade='10th')
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+
+    def count_queries(self, url):
+        with CaptureQueriesContext(connection) as ctx:
+            response = self.client.get(url)
+        self.assertEqual(response.status_code, 200)
+        return len(ctx.captured_queries)
+
+    def assert_constant_queries(self, url):
+        create_completed_assessment(self.user, 1)
+        baseline = self.count_queries(url)
+        for number in range(2, 12):
+            create_completed_assessment(self.user, number)
+        self.assertEqual(self.count_queries(url), baseline)
+
+    def test_home_query_count_is_constant(self):
+        self.assert_constant_queries('/api/home/')
+
+    def test_history_query_count_is_constant(self):
+        self.assert_constant_queries('/api/assessment/history/')
+
+    def test_history_reports_completion_flag(self):
+        create_completed_assessment(self.user, 1)
+        response = self.client.get('/api/assessment/history/')
+        assessment = response.json()['completed_assessments'][0]
+        self.assertTrue(assessment['is_fully_completed'])
+        self.assertEqual(len(assessment['test_responses']), 3)
+
+
+@override_settings(CACHES=NO_CACHE)
+class CompletionStatsTests(TestCase):
+    def setUp(self):
+        self.user = CustomUser.objects.create_user(
+            username='student', password='pass', name='Student', grade='10th')
+        create_completed_assessment(self.user, 1)
+        Assessment.objects.create(user=self.user, assessment_number=2, status='abandoned')
+        Assessment.objects.create(user=self.user, assessment_number=3, status='in_progress')
+
+    def test_completion_stats_single_query(self):
+        with self.assertNumQueries(1):
+            stats = self.user.assessments.completion_stats()
+        self.assertEqual(stats['total_assessments'], 3)
+        self.assertEqual(stats['completed_assessments'], 1)
+        self.assertAlmostEqual(self.user.get_progress_percentage(), 100 / 3)
+
+    def test_home_completion_stats(self):
+        client = APIClient()
+        client.force_authenticate(self.user)
+        data = client.get('/api/home/').json()
+        self.assertEqual(data['completion_stats'], {'total_assessments': 3, 'completed_percentage': 33.33})
+        self.assertEqual(data['saved_assessment']['assessment_number'], 3)
+        self.assertEqual(len(data['completed_assessments']), 1)
+
+
+class DashboardCacheTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.user = CustomUser.objects.create_user(
+            username='student', password='pass', name='Student', grade='10th')
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+
+    def test_unchanged_dashboard_returns_304(self):
+        response = self.client.get('/api/home/')
+        etag = response['ETag']
+        with self.assertNumQueries(0):
+            response = self.client.get('/api/home/', HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 304)
+
+    def test_cached_payload_skips_database(self):
+        first = self.client.get('/api/assessment/history/').json()
+        with self.assertNumQueries(0):
+            second = self.client.get('/api/assessment/history/').json()
+        self.assertEqual(first, second)
+
+    def test_writes_invalidate_cached_payload(self):
+        etag = self.client.get('/api/assessment/history/')['ETag']
+        with self.captureOnCommitCallbacks(execute=True):
+            create_completed_assessment(self.user, 1)
+        response = self.client.get('/api/assessment/history/', HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(len(response.json()['completed_assessments']), 1)
+
+
+class DeltaAutosaveTests(TestCase):
+    def setUp(self):
+        self.user = CustomUser.objects.create_user(
+            username='student', password='pass', name='Student', grade='10th')
+        assessment = Assessment.objects.create(user=self.user, assessment_number=1)
+        self.test_response = TestResponse.objects.create(
+            assessment=assessment, test_type='aptitude', responses={'q1': 'a', 'q2': 'b'})
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+
+    def patch(self, **data):
+        data.setdefault('test_response_id', self.test_response.id)
+        return self.client.patch('/api/assessment/save-progress/', data, format='json')
+
+    def test_delta_is_merged(self):
+        response = self.patch(changes={'q2': 'c', 'q3': 'd'}, removed=['q1'], revision=0, current_question_index=3)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json()['revision'], 1)
+        self.test_response.refresh_from_db()
+        self.assertEqual(self.test_response.responses, {'q2': 'c', 'q3': 'd'})
+        self.assertEqual(self.test_response.current_question_index, 3)
+
+    def test_stale_revision_is_rejected(self):
+        self.patch(changes={'q2': 'c'}, revision=0)
+        response = self.patch(changes={'q2': 'x'}, revision=0)
+        self.assertEqual(response.status_code, 409)
+        self.assertEqual(response.json()['revision'], 1)
+        self.test_response.refresh_from_db()
+        self.assertEqual(self.test_response.responses['q2'], 'c')
+
+    def test_full_save_bumps_revision_and_validates_answers(self):
+        response = self.client.post('/api/assessment/save-progress/', {
+            'test_response_id': self.test_response.id, 'answers': {'q1': 'z'}}, format='json')
+        self.assertEqual(response.json()['revision'], 1)
+        self.assertEqual(self.patch(changes={'q2': 'x'}, revision=0).status_code, 409)
+        response = self.client.post('/api/assessment/save-progress/', {
+            'test_response_id': self.test_response.id, 'answers': ['q1']}, format='json')
+        self.assertEqual(response.status_code, 400)
+
+        TestResponse.objects.filter(pk=self.test_response.pk).update(responses=['legacy'])
+        self.assertEqual(self.patch(changes={'q2': 'x'}, revision=1).status_code, 409)
+
+
+@override_settings(PATHFINDER_AUTOSAVE_BUFFER={'ENABLED': True, 'SINGLE_PROCESS': True, 'FLUSH_INTERVAL': 0})
+class AutosaveBufferTests(TestCase):
+    def setUp(self):
+        self.user = CustomUser.objects.create_user(
+            username='student', password='pass', name='Student', grade='10th')
+        assessment = Assessment.objects.create(user=self.user, assessment_number=1)
+        self.test_response = TestResponse.objects.create(assessment=assessment, test_type='aptitude')
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+
+    def tearDown(self):
+        autosave_buffer.flush()
+
+    def save(self, answers, index):
+        return self.client.post('/api/assessment/save-progress/', {
+            'test_response_id': self.test_response.id, 'answers': answers, 'current_question_index': index,
+        }, format='json')
+
+    def test_saves_are_coalesced_and_flushed_in_bulk(self):
+        self.save({'q1': 'a'}, 1)
+        self.save({'q1': 'a', 'q2': 'b'}, 2)
+        self.assertEqual(autosave_buffer.depth(), 1)
+        self.test_response.refresh_from_db()
+        self.assertEqual(self.test_response.responses, {})
+        self.assertEqual(autosave_buffer.flush(), 1)
+        self.test_response.refresh_from_db()
+        self.assertEqual(self.test_response.responses, {'q1': 'a', 'q2': 'b'})
+        self.assertEqual(self.test_response.current_question_index, 2)
+
+    def test_submit_flushes_pending_state_first(self):
+        self.save({'q1': 'a'}, 1)
+        self.client.post('/api/assessment/submit-test/', {
+            'test_response_id': self.test_response.id, 'answers': {'q1': 'b'},
+        }, format='json')
+        self.assertEqual(autosave_buffer.depth(), 0)
+        self.test_response.refresh_from_db()
+        self.assertEqual(self.test_response.responses, {'q1': 'b'})
+        self.assertTrue(self.test_response.is_completed)
+
+    def test_state_buffered_by_another_process_is_flushed(self):
+        self.save({'q1': 'a'}, 1)
+        autosave_buffer._pending.clear()  # as if the save had been handled by a different process
+        response = self.client.get(f'/api/assessment/{self.test_response.assessment_id}/test/aptitude/')
+        self.assertEqual(response.json()['responses'], {'q1': 'a'})
+        self.assertEqual(autosave_buffer.flush([self.test_response.pk]), 0)  # already written
+
+    @override_settings(PATHFINDER_AUTOSAVE_BUFFER={'ENABLED': True, 'FLUSH_INTERVAL': 0})
+    def test_needs_shared_cache_or_single_process(self):
+        self.assertEqual(self.save({'q1': 'a'}, 1).json().get('buffered'), None)
+
+
+class QuestionAnswerTests(TestCase):
+    def setUp(self):
+        self.user = CustomUser.objects.create_user(
+            username='student', password='pass', name='Student', grade='10th')
+        self.assessment = Assessment.objects.create(user=self.user, assessment_number=1)
+
+    def test_submit_writes_normalized_answers(self):
+        test_response = TestResponse.objects.create(assessment=self.assessment, test_type='aptitude')
+        client = APIClient()
+        client.force_authenticate(self.user)
+        client.post('/api/assessment/submit-test/', {
+            'test_response_id': test_response.id, 'answers': {'1': 'Agree', '53': ['Math', 'Music']},
+        }, format='json')
+        answers = {a.question_id: a for a in test_response.answers.all()}
+        self.assertEqual(answers['1'].answer_index, 3)
+        self.assertIsNone(answers['53'].answer_index)
+        self.assertEqual(answers['53'].answer_value, '["Math", "Music"]')
+
+    def test_submit_rejects_answers_that_are_not_an_object(self):
+        test_response = TestResponse.objects.create(assessment=self.assessment, test_type='aptitude')
+        client = APIClient()
+        client.force_authenticate(self.user)
+        response = client.post('/api/assessment/submit-test/', {
+            'test_response_id': test_response.id, 'answers': ['Agree'],
+        }, format='json')
+        self.assertEqual(response.status_code, 400)
+        test_response.refresh_from_db()
+        self.assertFalse(test_response.is_completed)
+
+    def test_backfill_command(self):
+        create_completed_assessment(self.user, 2)
+        TestResponse.objects.create(
+            assessment=self.assessment, test_type='aptitude', is_completed=True, responses=['Agree'])
+        out = StringIO()
+        call_command('backfill_question_answers', chunk_size=2, stdout=out)
+        self.assertIn('Skipped 1', out.getvalue())
+        self.assertEqual(QuestionAnswer.objects.count(), 3)
+        call_command('backfill_question_answers', stdout=StringIO())
+        self.assertEqual(QuestionAnswer.objects.count(), 3)
+
+
+class ScoringTests(TestCase):
+    def test_batch_scores_rank_streams(self):
+        analytical = {'1': 'Strongly Agree', '2': 'Strongly Disagree', '6': 'Strongly Agree', '15': 'Agree'}
+        creative = {'8': 'Strongly Disagree', '35': 'Strongly Agree', '32': 'सहमत', '2': 'Agree'}
+        results = score_responses(
+            [analytical, creative], [{}, {}], [{'53': ['Math'], '55': 'Yes'}, {'53': ['Art / Design', 'Drama']}])
+        self.assertEqual(results[0]['aptitude_score']['analytical'], 100.0)
+        self.assertEqual(results[0]['recommended_streams'][0]['stream'], 'Science (PCM)')
+        self.assertTrue(results[0]['personal_score']['plans_college'])
+        self.assertEqual(results[1]['aptitude_score']['creative'], 91.67)
+        self.assertEqual(results[1]['recommended_streams'][0]['stream'], 'Arts & Humanities')
+        self.assertIn('creative', results[1]['strengths'])
+
+    def test_final_submit_queues_processing(self):
+        user = CustomUser.objects.create_user(username='student', password='pass', name='Student', grade='10th')
+        assessment = Assessment.objects.create(user=user, assessment_number=1)
+        test_response = TestResponse.objects.create(assessment=assessment, test_type='personal')
+        client = APIClient()
+        client.force_authenticate(user)
+        client.post('/api/assessment/submit-test/', {
+            'test_response_id': test_response.id, 'answers': {'53': ['Economics']},
+        }, format='json')
+        status_url = f'/api/assessment/processing-status/{assessment.id}/'
+        self.assertEqual(client.get(status_url).json()['status'], 'processing')
+        self.assertFalse(AssessmentResults.objects.filter(assessment=assessment).exists())
+        call_command('process_jobs', workers=0, once=True, stdout=StringIO())
+        data = client.get(status_url).json()
+        self.assertEqual(data['status'], 'completed')
+        self.assertEqual(data['progress'], 100)
+        self.assertEqual(AssessmentResults.objects.get(assessment=assessment).get_top_stream(), 'Commerce')
+
+    def test_failing_assessment_does_not_fail_its_batch(self):
+        user = CustomUser.objects.create_user(username='student', password='pass', name='Student', grade='10th')
+        healthy, broken = create_completed_assessment(user, 1), create_completed_assessment(user, 2)
+        TestResponse.objects.filter(assessment=broken, test_type='values').update(responses={'poison': 'x'})
+        for assessment in [healthy, broken]:
+            enqueue_processing(assessment)
+
+        def score(aptitude, values, personal):
+            if any('poison' in answers for answers in values):
+                raise ValueError('unscorable')
+            return score_responses(aptitude, values, personal)
+
+        with mock.patch('pathfinder.scoring.score_responses', side_effect=score), self.assertLogs('pathfinder.jobs'):
+            call_command('process_jobs', workers=0, once=True, batch_size=10, stdout=StringIO())
+        self.assertEqual(ProcessingJob.objects.get(assessment=healthy).status, 'completed')
+        job = ProcessingJob.objects.get(assessment=broken)
+        self.assertEqual((job.status, job.attempts), ('error', 3))  # --once retries until MAX_ATTEMPTS
+
+    def test_jobs_that_keep_killing_their_worker_stop_being_requeued(self):
+        user = CustomUser.objects.create_user(username='student', password='pass', name='Student', grade='10th')
+        job = enqueue_processing(create_completed_assessment(user, 1))
+        for attempt in range(1, 4):
+            claim_jobs(1)
+            ProcessingJob.objects.update(started_at=timezone.now() - timedelta(hours=1))  # worker died
+            requeue_stale_jobs(60)
+            job.refresh_from_db()
+            self.assertEqual((job.status, job.attempts), ('queued' if attempt < 3 else 'error', attempt))
+
+
+class ChatbotMessageTests(TestCase):
+    def setUp(self):
+        self.user = CustomUser.objects.create_user(
+            username='student', password='pass', name='Asha', grade='10th')
+        self.assessment = create_completed_assessment(self.user, 1)
+        AssessmentResults.objects.create(
+            assessment=self.assessment, strengths=['analytical'], career_paths=['Engineering'],
+            recommended_streams=[{'stream': 'Science (PCM)', 'score': 80}, {'stream': 'Commerce', 'score': 60}])
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+
+    def test_reply_uses_results_and_persists_both_messages(self):
+        response = self.client.post('/api/chatbot/message/', {
+            'message': 'Which stream should I pick?', 'assessment_id': self.assessment.id}, format='json')
+        self.assertIn('Science (PCM)', response.json()['bot_message'])
+        self.assertEqual(list(ChatMessage.objects.values_list('sender', flat=True)), ['user', 'bot'])
+
+    def test_streamed_reply(self):
+        response = self.client.post('/api/chatbot/message/', {'message': 'hello', 'stream': True}, format='json')
+        self.assertEqual(response['Content-Type'], 'text/event-stream')
+        body = b''.join(response.streaming_content).decode()
+        self.assertIn('event: done', body)
+        self.assertIn('Hello Asha!', ChatMessage.objects.get(sender='bot').message_text)
+
+
+class ChatHistoryPaginationTests(TestCase):
+    def setUp(self):
+        self.user = CustomUser.objects.create_user(
+            username='student', password='pass', name='Student', grade='10th')
+        ChatMessage.objects.bulk_create([
+            ChatMessage(user=self.user, message_text=f'm{i}', sender='user') for i in range(7)])
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+
+    def get(self, **params):
+        return self.client.get('/api/chatbot/history/', params).json()
+
+    def texts(self, data):
+        return [m['message_text'] for m in data['messages']]
+
+    def test_pages_backwards_from_newest(self):
+        page = self.get(limit=3)
+        self.assertEqual(self.texts(page), ['m4', 'm5', 'm6'])
+        self.assertTrue(page['has_more'])
+        page = self.get(limit=3, before=page['before'])
+        self.assertEqual(self.texts(page), ['m1', 'm2', 'm3'])
+        page = self.get(limit=3, before=page['before'])
+        self.assertEqual(self.texts(page), ['m0'])
+        self.assertFalse(page['has_more'])
+
+    def test_after_cursor_and_since_return_only_new_messages(self):
+        page = self.get()
+        ChatMessage.objects.create(user=self.user, message_text='new', sender='bot')
+        self.assertEqual(self.texts(self.get(after=page['after'])), ['new'])
+        self.assertEqual(self.texts(self.get(since=page['latest_id'])), ['new'])
+
+    def test_invalid_cursor(self):
+        response = self.client.get('/api/chatbot/history/', {'before': 'garbage'})
+        self.assertEqual(response.status_code, 400)
+
+    def test_wait_must_be_finite(self):
+        for wait in ['nan', 'inf', 'soon']:
+            response = self.client.get('/api/chatbot/history/', {'since': 0, 'wait': wait})
+            self.assertEqual(response.status_code, 400)
+        self.assertEqual(self.client.get('/api/chatbot/history/', {'since': 0, 'wait': '-5'}).status_code, 200)
+
+
+@override_settings(CACHES=NO_CACHE)
+class AsyncViewTests(TestCase):
+    def setUp(self):
+        self.user = CustomUser.objects.create_user(
+            username='student', password='pass', name='Student', grade='10th')
+        create_completed_assessment(self.user, 1)
+        token = str(RefreshToken.for_user(self.user).access_token)
+        self.auth = {'headers': {'Authorization': f'Bearer {token}'}}
+
+    async def test_body_must_be_a_json_object(self):
+        for body in ['[]', '"text"', 'not json']:
+            response = await self.async_client.post(
+                '/api/async/chatbot/message/', body, content_type='application/json', **self.auth)
+            self.assertEqual(response.status_code, 400)
+
+    async def test_async_home_matches_sync_home(self):
+        response = await self.async_client.get('/api/async/home/', **self.auth)
+        self.assertEqual(response.status_code, 200)
+        sync_response = await sync_to_async(self.client.get)('/api/home/', **self.auth)
+        self.assertEqual(response.json(), sync_response.json())
+
+    async def test_requires_authentication(self):
+        response = await self.async_client.get('/api/async/chatbot/history/')
+        self.assertEqual(response.status_code, 401)
+
+    async def test_async_chat_and_history(self):
+        response = await self.async_client.post(
+            '/api/async/chatbot/message/', {'message': 'hello'}, content_type='application/json', **self.auth)
+        self.assertIn('Hello Student!', response.json()['bot_message'])
+        history = (await self.async_client.get('/api/async/chatbot/history/', **self.auth)).json()
+        self.assertEqual([m['sender'] for m in history['messages']], ['user', 'bot'])
+        response = await self.async_client.get('/api/async/chatbot/history/', {'since': 0, 'wait': 'nan'}, **self.auth)
+        self.assertEqual(response.status_code, 400)
+
+    async def test_async_save_progress(self):
+        assessment = await Assessment.objects.acreate(user=self.user, assessment_number=2)
+        test_response = await TestResponse.objects.acreate(
+            assessment=assessment, test_type='aptitude', responses={'q1': 'a'})
+        response = await self.async_client.patch(
+            '/api/async/assessment/save-progress/',
+            {'test_response_id': test_response.id, 'changes': {'q2': 'b'}, 'revision': 0},
+            content_type='application/json', **self.auth)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json()['responses'], {'q1': 'a', 'q2': 'b'})
+
+
+class EventStreamTests(TestCase):
+    def setUp(self):
+        self.user = CustomUser.objects.create_user(
+            username='student', password='pass', name='Student', grade='10th')
+        self.token = str(RefreshToken.for_user(self.user).access_token)
+
+    async def open_stream(self):
+        ticket = await self.async_client.post(
+            '/api/async/events/ticket/', content_type='application/json',
+            headers={'Authorization': f'Bearer {self.token}'})
+        return await self.async_client.get(f'/api/async/events/?ticket={ticket.json()["ticket"]}')
+
+    async def test_stream_delivers_published_events(self):
+        response = await self.open_stream()
+        self.assertEqual(response['Content-Type'], 'text/event-stream')
+        stream = aiter(response.streaming_content)
+        self.assertEqual(await anext(stream), b'retry: 3000\n\n')
+        pending = asyncio.ensure_future(anext(stream))
+        while get_broker().subscriber_count(self.user.pk) == 0:
+            await asyncio.sleep(0)
+        get_broker().publish(self.user.pk, 'results_ready', {'assessment_id': 7})
+        chunk = await asyncio.wait_for(pending, 5)
+        self.assertEqual(chunk, b'event: results_ready\ndata: {"assessment_id": 7}\n\n')
+        await stream.aclose()
+
+    async def test_stream_needs_a_valid_ticket_not_a_token(self):
+        response = await self.async_client.get(f'/api/async/events/?token={self.token}')
+        self.assertEqual(response.status_code, 401)
+        ticket = issue_ticket(self.user.pk)
+        self.assertEqual((await self.async_client.get(f'/api/async/events/?ticket={ticket}x')).status_code, 401)
+        with mock.patch('pathfinder.events.TICKET_MAX_AGE', -1):
+            self.assertEqual((await self.async_client.get(f'/api/async/events/?ticket={ticket}')).status_code, 401)
+
+    @mock.patch('pathfinder.events.HEARTBEAT_SECONDS', 0.01)
+    async def test_in_process_broker_polls_for_results(self):
+        assessment = await Assessment.objects.acreate(user=self.user, assessment_number=1)
+        await AssessmentResults.objects.acreate(assessment=assessment)  # scored by another process
+        response = await self.open_stream()
+        stream = aiter(response.streaming_content)
+        chunks = [await anext(stream) for _ in range(4)]
+        await stream.aclose()
+        ready = [chunk for chunk in chunks if chunk.startswith(b'event: results_ready')]
+        self.assertEqual(len(ready), 1)
+        self.assertIn(f'"assessment_id": {assessment.id}'.encode(), ready[0])
+
+    def test_submit_publishes_after_commit(self):
+        assessment = Assessment.objects.create(user=self.user, assessment_number=1)
+        test_response = TestResponse.objects.create(assessment=assessment, test_type='aptitude')
+        with mock.patch.object(get_broker(), 'publish') as publish:
+            with self.captureOnCommitCallbacks(execute=True):
+                self.client.post('/api/assessment/submit-test/', {
+                    'test_response_id': test_response.id, 'answers': {'1': 'Agree'},
+                }, content_type='application/json', HTTP_AUTHORIZATION=f'Bearer {self.token}')
+        publish.assert_called_once_with(self.user.pk, 'test_submitted', {
+            'assessment_id': assessment.id, 'test_type': 'aptitude',
+            'next_test_type': 'values', 'assessment_completed': False,
+        })
+
+
+class BenchmarkCommandTests(TestCase):
+    def test_every_url_is_benchmarked_without_errors(self):
+        out = StringIO()
+        call_command('benchmark', users=3, requests=2, sample_users=3, stdout=out, stderr=StringIO())
+        report = json.loads(out.getvalue())
+        rows = {row['name']: row for row in report['endpoints']}
+        self.assertLessEqual({p.name for p in urlpatterns}, set(rows))
+        self.assertEqual({name: row['status_codes'] for name, row in rows.items() if row['errors']}, {})
+        self.assertIsNotNone(rows['home']['queries'])
+        self.assertEqual(CustomUser.objects.filter(username__startswith='bench_').count(), 3)
+
+    def test_failed_batch_sub_requests_count_as_errors(self):
+        body = json.dumps({'responses': [{'status': 200}, {'status': 500}]}).encode()
+        self.assertEqual(effective_status('/api/batch/', 200, body), 500)
+        self.assertEqual(effective_status('/api/home/', 200, body), 200)
+
+    def test_fast_path_matches_drf_serializers_byte_for_byte(self):
+        out = StringIO()
+        call_command('benchmark_serialization', users=3, sample=3, repeat=1, stdout=out, stderr=StringIO())
+        self.assertEqual(json.loads(out.getvalue())['mismatches'], [])
+
+    def test_fast_renderer_falls_back_for_float_formats(self):
+        drf, fast = JSONRenderer(), FastJSONRenderer()
+        for payload in [{'a': 1e16, 'b': 66.67}, {'tiny': 0.00001}, {'big': 2 ** 70}, {'text': 'line\u2028sep é'}]:
+            self.assertEqual(fast.render(payload), drf.render(payload))
+
+
+@override_settings(PATHFINDER_METRICS={'SAMPLE_RATE': 1.0, 'HEADERS': True, 'LOG': True})
+class RequestMetricsTests(TestCase):
+    def setUp(self):
+        self.user = CustomUser.objects.create_user(
+            username='student', password='pass', name='Student', grade='10th')
+        create_completed_assessment(self.user, 1)
+        self.auth = {'HTTP_AUTHORIZATION': f'Bearer {RefreshToken.for_user(self.user).access_token}'}
+        staff = CustomUser.objects.create_user(
+            username='staff', password='pass', name='Staff', grade='-', is_staff=True)
+        self.staff_auth = {'HTTP_AUTHORIZATION': f'Bearer {RefreshToken.for_user(staff).access_token}'}
+        for histogram in HISTOGRAMS.values():
+            histogram.reset()
+
+    def test_headers_logs_and_prometheus_output(self):
+        with self.assertLogs('pathfinder.metrics') as logs:
+            with CaptureQueriesContext(connection) as queries:
+                response = self.client.get('/api/assessment/history/', **self.auth)
+            self.assertEqual(response['X-Query-Count'], str(len(queries)))
+            metrics = self.client.get('/api/metrics/', **self.staff_auth).content.decode()
+        self.assertIn('serializer;dur=', response['Server-Timing'])
+        line = json.loads(logs.records[0].getMessage())
+        self.assertEqual(line['view'], 'assessment-history')
+        self.assertEqual(line['response_bytes'], len(response.content))
+        self.assertGreater(line['serializer_ms'], 0)
+        self.assertIn('pathfinder_request_queries_count{view="assessment-history",method="GET",status="200"} 1',
+                      metrics)
+        self.assertIn('pathfinder_autosave_buffer_depth 0', metrics)
+
+    def test_scrapes_need_the_metrics_token_or_staff(self):
+        with self.assertLogs('pathfinder.metrics') as logs:
+            self.assertEqual(self.client.get('/api/metrics/').status_code, 403)
+            self.assertEqual(self.client.get('/api/metrics/', **self.auth).status_code, 403)
+            self.assertEqual(self.client.get('/api/metrics/', HTTP_AUTHORIZATION='Bearer junk').status_code, 403)
+            with self.settings(PATHFINDER_METRICS={'TOKEN': 'scrape-secret'}):
+                response = self.client.get('/api/metrics/', HTTP_AUTHORIZATION='Bearer scrape-secret')
+                self.assertEqual(response.status_code, 200)
+            with self.settings(PATHFINDER_METRICS={'PUBLIC': True}):
+                self.assertEqual(self.client.get('/api/metrics/').status_code, 200)
+        self.assertEqual([json.loads(record.getMessage())['status'] for record in logs.records],
+                         [403, 403, 403, 200, 200])
+
+    @override_settings(PATHFINDER_METRICS={'SAMPLE_RATE': 0.0, 'HEADERS': True})
+    def test_unsampled_requests_are_not_recorded(self):
+        response = self.client.get('/api/home/', **self.auth)
+        self.assertNotIn('X-Query-Count', response)
+        self.assertEqual(HISTOGRAMS['duration'].series, {})
+
+
+class AutosaveBenchmarkTests(TransactionTestCase):
+    # The in-memory test database uses shared-cache table locks, so concurrency itself is only
+    # meaningful against a file database: `manage.py benchmark_autosave --profiles sqlite,sqlite-wal`.
+    def test_writer_applies_every_revisioned_save(self):
+        report = run_autosave_benchmark(writers=1, saves_per_writer=5, mode='delta')
+        self.assertEqual(report['status_codes'], {'200': 5})
+        self.assertEqual(TestResponse.objects.get().revision, 5)
+        self.assertEqual(report['database']['transaction_mode'], 'IMMEDIATE')
+
+
+class CachedJWTAuthenticationTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.user = CustomUser.objects.create_user(
+            username='student', password='pass', name='Student', grade='10th')
+        self.auth = {'HTTP_AUTHORIZATION': f'Bearer {RefreshToken.for_user(self.user).access_token}'}
+
+    def test_user_lookup_is_cached(self):
+        self.client.get('/api/chatbot/history/', **self.auth)
+        with self.assertNumQueries(1):
+            response = self.client.get('/api/chatbot/history/', **self.auth)
+        self.assertEqual(response.status_code, 200)
+
+    def test_profile_update_evicts_cached_user(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            response = self.client.patch(
+                '/api/profile/update/', {'name': 'Renamed'}, content_type='application/json', **self.auth)
+        self.assertEqual(response.json()['user']['name'], 'Renamed')
+        self.user.refresh_from_db()
+        self.assertTrue(self.user.check_password('pass'))
+        response = self.client.get('/api/home/', **self.auth)
+        self.assertEqual(response.json()['user_profile']['name'], 'Renamed')
+
+    def test_deactivated_user_is_rejected(self):
+        self.client.get('/api/chatbot/history/', **self.auth)
+        with self.captureOnCommitCallbacks(execute=True):
+            self.user.is_active = False
+            self.user.save()
+        response = self.client.get('/api/chatbot/history/', **self.auth)
+        self.assertEqual(response.status_code, 401)
+
+
+class ImportStudentsTests(TestCase):
+    def test_imports_valid_rows_and_reports_the_rest(self):
+        CustomUser.objects.create_user(username='taken', password='pass', name='Existing', grade='10th')
+        with tempfile.NamedTemporaryFile('w', suffix='.jsonl', delete=False) as roster:
+            for row in [
+                {'username': 'asha', 'password': 'secret-1', 'name': 'Asha', 'grade': '10th', 'age': 15},
+                {'username': 'ravi', 'name': 'Ravi', 'grade': '9th'},
+                {'username': 'asha', 'name': 'Asha Again', 'grade': '10th'},
+                {'username': 'taken', 'name': 'Clash', 'grade': '10th'},
+                {'username': 'meena', 'name': 'Meena', 'grade': '10th', 'age': 'fifteen'},
+                {'username': 'nogrades', 'name': 'No Grade'},
+                {'username': 'bad name!', 'name': 'Spaces', 'grade': '10th'},
+                {'username': 'longphone', 'name': 'Long', 'grade': '10th', 'phone': '9' * 40},
+            ]:
+                roster.write(json.dumps(row) + '\n')
+            roster.write('not json\n')
+        self.addCleanup(os.remove, roster.name)
+        err = StringIO()
+        call_command('import_students', roster.name, workers=0, stdout=StringIO(), stderr=err)
+
+        self.assertTrue(CustomUser.objects.get(username='asha').check_password('secret-1'))
+        self.assertFalse(CustomUser.objects.get(username='ravi').has_usable_password())
+        self.assertEqual(CustomUser.objects.count(), 3)
+        errors = err.getvalue()
+        for expected in ['line 3 (asha): Duplicate username', 'line 4 (taken): Username already exists',
+                         "line 5 (meena): Invalid age 'fifteen'", 'line 6 (nogrades): Missing grade',
+                         'line 7 (bad name!): username:', 'line 8 (longphone): phone: Ensure this value has at most 15',
+                         'line 9 (-)']:
+            self.assertIn(expected, errors)
+
+
+@mock.patch('pathfinder.export.SAFETY_LAG', 0)
+class ExportTests(TestCase):
+    def setUp(self):
+        self.student = CustomUser.objects.create_user(
+            username='student', password='pass', name='Student', grade='10th')
+        self.first = create_completed_assessment(self.student, 1)
+        admin = CustomUser.objects.create_user(
+            username='admin', password='pass', name='Admin', grade='-', is_staff=True)
+        self.client = APIClient()
+        self.client.force_authenticate(admin)
+
+    def test_incremental_ndjson_export(self):
+        response = self.client.get('/api/admin/export/assessments/')
+        rows = [json.loads(line) for line in b''.join(response.streaming_content).splitlines()]
+        self.assertEqual([row['id'] for row in rows], [self.first.id])
+        self.assertEqual(rows[0]['username'], 'student')
+
+        second = create_completed_assessment(self.student, 2)
+        response = self.client.get('/api/admin/export/assessments/', {'since': response['X-Export-Watermark']})
+        rows = [json.loads(line) for line in b''.join(response.streaming_content).splitlines()]
+        self.assertEqual([row['id'] for row in rows], [second.id])
+
+    def test_csv_command_with_state_file(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            output, state = os.path.join(tmp, 'out.csv'), os.path.join(tmp, 'state.json')
+            call_command('export_data', 'test_responses', format='csv', output=output, state_file=state,
+                         stderr=StringIO())
+            with open(output) as f:
+                rows = list(csv.DictReader(f))
+            self.assertEqual(sorted(row['test_type'] for row in rows), ['aptitude', 'personal', 'values'])
+            self.assertEqual(json.loads(rows[0]['responses']), {'q1': 'a'})
+            call_command('export_data', 'test_responses', format='csv', output=output, state_file=state,
+                         stderr=StringIO())
+            with open(output) as f:
+                self.assertEqual(list(csv.DictReader(f)), [])
+
+    def test_recent_rows_wait_for_the_safety_lag(self):
+        with mock.patch('pathfinder.export.SAFETY_LAG', 60):
+            response = self.client.get('/api/admin/export/assessments/')
+            self.assertEqual(b''.join(response.streaming_content), b'')
+            Assessment.objects.filter(pk=self.first.pk).update(completed_at=timezone.now() - timedelta(minutes=2))
+            response = self.client.get('/api/admin/export/assessments/')
+            self.assertEqual(len(b''.join(response.streaming_content).splitlines()), 1)
+
+    def test_naive_watermark_is_utc(self):
+        since = (self.first.completed_at - timedelta(seconds=1)).astimezone(dt_timezone.utc).replace(tzinfo=None)
+        response = self.client.get('/api/admin/export/assessments/', {'since': since.isoformat()})
+        self.assertEqual(response.status_code, 200)
+        rows = [json.loads(line) for line in b''.join(response.streaming_content).splitlines()]
+        self.assertEqual([row['id'] for row in rows], [self.first.id])
+        self.assertEqual(self.client.get('/api/admin/export/assessments/', {'since': 'yesterday'}).status_code, 400)
+
+    def test_requires_admin(self):
+        self.client.force_authenticate(self.student)
+        self.assertEqual(self.client.get('/api/admin/export/answers/').status_code, 403)
+
+
+class CohortAnalyticsTests(TestCase):
+    def setUp(self):
+        self.student = CustomUser.objects.create_user(
+            username='student', password='pass', name='Student', grade='10th')
+        admin = CustomUser.objects.create_user(
+            username='admin', password='pass', name='Admin', grade='-', is_staff=True)
+        self.client = APIClient()
+        self.client.force_authenticate(admin)
+
+    def snapshot(self):
+        compact_rollups()
+        return sorted(CohortRollup.objects.values_list(
+            'grade', 'bucket', 'test_type', 'started_count', 'completed_count', 'answer_counts'))
+
+    def test_incremental_rollups_match_rebuild(self):
+        client = APIClient()
+        client.force_authenticate(self.student)
+        assessment_id = client.post('/api/assessment/start/', {}, format='json').data['assessment_id']
+        test_response = TestResponse.objects.get(assessment_id=assessment_id, test_type='aptitude')
+        client.post('/api/assessment/submit-test/', {
+            'test_response_id': test_response.id, 'answers': {'q1': 'Agree', 'q2': 'सहमत'}}, format='json')
+        client.post('/api/assessment/submit-test/', {
+            'test_response_id': test_response.id, 'answers': {'q1': 'Agree', 'q2': 'सहमत'}}, format='json')
+
+        incremental = self.snapshot()
+        call_command('rebuild_rollups', stdout=StringIO())
+        self.assertEqual(self.snapshot(), incremental)
+        aptitude = CohortRollup.objects.get(test_type='aptitude')
+        self.assertEqual((aptitude.started_count, aptitude.completed_count), (1, 1))
+        self.assertEqual(aptitude.answer_counts, {'q1': {'3': 1}, 'q2': {'3': 1}})
+
+    def test_writes_append_increments_instead_of_locking_rollups(self):
+        with CaptureQueriesContext(connection) as queries:
+            create_completed_assessment(self.student, 1)
+        self.assertFalse(any('pathfinder_cohortrollup"' in q['sql'] for q in queries.captured_queries))
+        self.assertEqual(CohortRollupDelta.objects.count(), 4)
+        self.assertEqual(compact_rollups(), 4)
+        self.assertEqual(compact_rollups(), 0)
+        self.assertEqual(CohortRollup.objects.get(test_type='assessment').started_count, 1)
+
+    def test_stats_by_grade_and_week(self):
+        create_completed_assessment(self.student, 1)
+        Assessment.objects.create(user=self.student, assessment_number=2)
+        response = self.client.get('/api/analytics/cohorts/', {
+            'bucket': 'week', 'test_type': 'assessment', 'answers': '1'})
+        self.assertEqual(response.status_code, 200)
+        [cohort] = response.data['cohorts']
+        self.assertEqual((cohort['grade'], cohort['started'], cohort['completed']), ('10th', 2, 0))
+        self.assertEqual(cohort['completion_rate'], 0)
+
+        call_command('rebuild_rollups', stdout=StringIO())
+        [cohort] = self.client.get('/api/analytics/cohorts/', {'test_type': 'assessment'}).data['cohorts']
+        self.assertEqual((cohort['started'], cohort['completed'], cohort['completion_rate']), (2, 1, 50.0))
+        self.assertEqual(self.client.get('/api/analytics/cohorts/', {'since': 'soon'}).status_code, 400)
+
+
+class IdempotencyTests(TestCase):
+    def setUp(self):
+        self.user = CustomUser.objects.create_user(
+            username='student', password='pass', name='Student', grade='10th')
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+
+    def test_start_replays_and_numbers_after_gaps(self):
+        create_completed_assessment(self.user, 1)
+        create_completed_assessment(self.user, 3)
+        first = self.client.post('/api/assessment/start/', {}, format='json', HTTP_IDEMPOTENCY_KEY='start-1')
+        retry = self.client.post('/api/assessment/start/', {}, format='json', HTTP_IDEMPOTENCY_KEY='start-1')
+        self.assertEqual((first.status_code, retry.status_code), (201, 201))
+        self.assertEqual(retry.data, first.data)
+        self.assertEqual(retry['Idempotent-Replayed'], 'true')
+        self.assertEqual(Assessment.objects.get(pk=first.data['assessment_id']).assessment_number, 4)
+        self.assertEqual(Assessment.objects.filter(user=self.user, status='in_progress').count(), 1)
+
+    def test_submit_retry_is_a_no_op(self):
+        assessment_id = self.client.post('/api/assessment/start/', {}, format='json').data['assessment_id']
+        test_response = TestResponse.objects.get(assessment_id=assessment_id)
+        body = {'test_response_id': test_response.id, 'answers': {'q1': 'Agree'}}
+        first = self.client.post('/api/assessment/submit-test/', body, format='json', HTTP_IDEMPOTENCY_KEY='s1')
+        submitted_at = TestResponse.objects.get(pk=test_response.id).submitted_at
+        with CaptureQueriesContext(connection) as ctx:
+            retry = self.client.post('/api/assessment/submit-test/', body, format='json', HTTP_IDEMPOTENCY_KEY='s1')
+        self.assertEqual(retry.data, first.data)
+        self.assertFalse(any('pathfinder_questionanswer' in q['sql'] for q in ctx.captured_queries))
+        self.assertEqual(TestResponse.objects.get(pk=test_response.id).submitted_at, submitted_at)
+
+        reused = self.client.post('/api/assessment/submit-test/', {**body, 'answers': {'q1': 'Disagree'}},
+                                  format='json', HTTP_IDEMPOTENCY_KEY='s1')
+        self.assertEqual(reused.status_code, 422)
+
+    def test_expired_key_runs_again_and_failures_are_not_stored(self):
+        missing = {'test_response_id': 999999, 'answers': {'q1': 'a'}}
+        self.assertEqual(self.client.post('/api/assessment/submit-test/', missing, format='json',
+                                          HTTP_IDEMPOTENCY_KEY='k').status_code, 404)
+        self.assertFalse(IdempotencyKey.objects.exists())
+
+        self.client.post('/api/assessment/start/', {}, format='json', HTTP_IDEMPOTENCY_KEY='k')
+        IdempotencyKey.objects.update(expires_at=timezone.now())
+        Assessment.objects.update(status='abandoned')
+        again = self.client.post('/api/assessment/start/', {}, format='json', HTTP_IDEMPOTENCY_KEY='k')
+        self.assertFalse(again.has_header('Idempotent-Replayed'))
+        self.assertEqual(Assessment.objects.get(pk=again.data['assessment_id']).assessment_number, 2)
+        call_command('prune_idempotency_keys', stdout=StringIO())
+        self.assertEqual(IdempotencyKey.objects.count(), 1)
+
+
+class QuestionCatalogTests(TestCase):
+    def setUp(self):
+        call_command('load_questions', stdout=StringIO())
+        catalogs.clear()
+
+    def test_catalog_is_translated_gzipped_and_revalidated(self):
+        response = self.client.get('/api/questions/personal/gu/', HTTP_ACCEPT_ENCODING='gzip')
+        self.assertEqual(response['Content-Encoding'], 'gzip')
+        plain = self.client.get('/api/questions/personal/gu/')
+        questions = json.loads(plain.content)['questions']
+        self.assertEqual([q['type'] for q in questions], ['multiple', 'text', 'single'])
+        self.assertEqual(questions[2]['options'], ['Yes', 'No'])  # no Gujarati translation, falls back to English
+        self.assertEqual(gzip.decompress(response.content), plain.content)
+        self.assertEqual(response['ETag'], plain['ETag'][:-1] + '-gzip"')
+
+        self.assertEqual(self.client.get('/api/questions/personal/gu/', HTTP_IF_NONE_MATCH=plain['ETag']).status_code, 304)
+        immutable = self.client.get(plain['Content-Location'])
+        self.assertEqual(immutable.content, plain.content)
+        self.assertIn('immutable', immutable['Cache-Control'])
+
+    def test_deactivated_questions_leave_the_catalog(self):
+        self.assertEqual(len(json.loads(self.client.get('/api/questions/aptitude/en/').content)['questions']), 33)
+        with open(QUESTIONS_FILE, encoding='utf-8') as f:
+            entries = [entry for entry in json.load(f)
+                       if (entry['test_type'], entry['question_number']) != ('aptitude', 33)]
+        with tempfile.NamedTemporaryFile('w', suffix='.json', delete=False, encoding='utf-8') as f:
+            json.dump(entries, f)
+        self.addCleanup(os.remove, f.name)
+        with self.captureOnCommitCallbacks(execute=True):
+            call_command('load_questions', f.name, deactivate_missing=True, stdout=StringIO())
+        questions = json.loads(self.client.get('/api/questions/aptitude/en/').content)['questions']
+        self.assertEqual(len(questions), 32)
+
+    def test_question_edit_changes_hash(self):
+        aptitude = json.loads(self.client.get('/api/questions/aptitude/en/').content)['questions']
+        self.assertEqual(len(aptitude), 33)
+        self.assertEqual(aptitude[0]['options'][0], 'Strongly Disagree')
+        before = self.client.get('/api/questions/aptitude/en/')['ETag']
+        with self.captureOnCommitCallbacks(execute=True):
+            Question.objects.filter(test_type='aptitude', question_number=1).first().save()
+        self.assertEqual(self.client.get('/api/questions/aptitude/en/')['ETag'], before)
+        with self.captureOnCommitCallbacks(execute=True):
+            question = Question.objects.get(test_type='aptitude', question_number=1)
+            question.question_text_en = 'Reworded'
+            question.save()
+        response = self.client.get('/api/questions/aptitude/en/')
+        self.assertNotEqual(response['ETag'], before)
+        self.assertEqual(json.loads(response.content)['questions'][0]['text'], 'Reworded')
+        self.assertEqual(self.client.get('/api/questions/aptitude/xx/').status_code, 404)
+
+    def test_edit_from_another_process_is_seen(self):
+        before = self.client.get('/api/questions/values/en/')['ETag']
+        # A queryset update fires no signals, like an edit made through another process's local cache.
+        Question.objects.filter(test_type='values', question_number=36).update(
+            question_text_en='Edited elsewhere', updated_at=timezone.now())
+        response = self.client.get('/api/questions/values/en/')
+        self.assertNotEqual(response['ETag'], before)
+        self.assertEqual(json.loads(response.content)['questions'][0]['text'], 'Edited elsewhere')
+
+    def test_gzip_refused_by_q_value(self):
+        for header, gzipped in [('gzip;q=0', False), ('br, gzip;q=0.5', True), ('*;q=0.1', True),
+                                ('identity, *;q=0', False), ('GZIP', True)]:
+            response = self.client.get('/api/questions/personal/en/', HTTP_ACCEPT_ENCODING=header)
+            self.assertEqual(response.get('Content-Encoding') == 'gzip', gzipped, header)
+
+
+class BatchTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.user = CustomUser.objects.create_user(
+            username='student', password='pass', name='Student', grade='10th')
+        self.auth = {'HTTP_AUTHORIZATION': f'Bearer {RefreshToken.for_user(self.user).access_token}'}
+        create_completed_assessment(self.user, 1)
+
+    def batch(self, *requests, **extra):
+        return self.client.post('/api/batch/', {'requests': list(requests), **extra},
+                                content_type='application/json', **self.auth)
+
+    def test_sub_responses_match_individual_calls(self):
+        response = self.batch({'id': 'home', 'path': 'home/'}, {'id': 'history', 'path': '/api/assessment/history/'},
+                              {'id': 'missing', 'path': 'nope/'}, {'id': 'metrics', 'path': 'metrics/'})
+        self.assertEqual(response.status_code, 200)
+        home, history, missing, metrics = response.json()['responses']
+        self.assertEqual(home['id'], 'home')
+        self.assertEqual(home['body'], self.client.get('/api/home/', **self.auth).json())
+        self.assertEqual(history['body'], self.client.get('/api/assessment/history/', **self.auth).json())
+        self.assertEqual((missing['status'], metrics['status']), (404, 400))
+
+        etag = home['headers']['ETag']
+        revalidated = self.batch({'path': 'home/', 'headers': {'If-None-Match': etag}})
+        self.assertEqual(revalidated.json()['responses'][0]['status'], 304)
+
+    def test_writes_run_in_order_and_see_each_other(self):
+        response = self.batch({'method': 'PATCH', 'path': 'profile/update/', 'body': {'name': 'Renamed'}},
+                              {'path': 'home/'}, parallel=True)
+        update, home = response.json()['responses']
+        self.assertEqual(update['status'], 200)
+        self.assertEqual(home['body']['user_profile']['name'], 'Renamed')
+
+    def test_rejects_invalid_batches(self):
+        self.assertEqual(self.batch().status_code, 400)
+        self.assertEqual(self.batch(*[{'path': 'home/'}] * 11).status_code, 400)
+        self.assertEqual(self.batch({'path': 'home/', 'method': 'TRACE'}).status_code, 400)
+        nested = self.batch({'method': 'POST', 'path': 'batch/', 'body': {'requests': [{'path': 'home/'}]}})
+        self.assertEqual(nested.json()['responses'][0]['status'], 400)
+        self.assertEqual(self.client.post('/api/batch/', {'requests': [{'path': 'home/'}]},
+                                          content_type='application/json').status_code, 401)
+
+
+class ParallelBatchTests(TransactionTestCase):
+    def test_read_only_batch_runs_concurrently(self):
+        user = CustomUser.objects.create_user(username='student', password='pass', name='Student', grade='10th')
+        client = APIClient()
+        client.credentials(HTTP_AUTHORIZATION=f'Bearer {RefreshToken.for_user(user).access_token}')
+        response = client.post('/api/batch/', {'parallel': True, 'requests': [
+            {'path': 'home/'}, {'path': 'assessment/history/'}, {'path': 'chatbot/history/'}]}, format='json')
+        self.assertEqual([sub['status'] for sub in response.json()['responses']], [200, 200, 200])
+        self.assertEqual(response.json()['responses'][0]['body']['user_profile']['username'], 'student')
+
+
+class AccountDeletionTests(TestCase):
+    def setUp(self):
+        self.user = CustomUser.objects.create_user(
+            username='student', password='pass', name='Student', grade='10th')
+        self.auth = {'HTTP_AUTHORIZATION': f'Bearer {RefreshToken.for_user(self.user).access_token}'}
+        for number in [1, 2]:
+            assessment = create_completed_assessment(self.user, number)
+            for test_response in assessment.test_responses.all():
+                QuestionAnswer.objects.bulk_create(QuestionAnswer.from_test_response(test_response))
+            ChatMessage.objects.create(user=self.user, assessment=assessment, message_text='hi', sender='user')
+        self.other = CustomUser.objects.create_user(username='other', password='pass', name='Other', grade='9th')
+        create_completed_assessment(self.other, 1)
+
+    def test_delete_disables_account_immediately(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            response = self.client.delete('/api/profile/delete/', **self.auth)
+        self.assertEqual(response.status_code, 202)
+        self.assertEqual(self.client.get('/api/home/', **self.auth).status_code, 401)
+        self.assertEqual(self.client.post('/api/auth/login/', {'username': 'student', 'password': 'pass'},
+                                          content_type='application/json').status_code, 401)
+        self.assertEqual(Assessment.objects.filter(user=self.user).count(), 2)  # purged later, not inline
+        deletion = AccountDeletion.objects.get(user_id=self.user.pk)
+        self.assertEqual(deletion.status, 'queued')
+
+        self.assertEqual(self.client.post('/api/auth/setup/', {
+            'username': 'student', 'password': 'new', 'name': 'New', 'grade': '10th'},
+            content_type='application/json').status_code, 201)
+
+    def test_purge_is_batched_and_resumable(self):
+        self.client.delete('/api/profile/delete/', **self.auth)
+        deletion = claim_deletion('worker-1')
+        for _ in range(2):  # a worker that dies after a few batches
+            purge_batch(deletion, batch_size=2)
+        self.assertEqual(deletion.step, 0)
+        self.assertEqual(deletion.deleted, {'answers': 4})
+
+        deletion = AccountDeletion.objects.get(pk=deletion.pk)  # resumed from the saved progress
+        self.assertTrue(purge_account(deletion, batch_size=2))
+        deletion.refresh_from_db()
+        self.assertEqual((deletion.status, deletion.step, deletion.get_progress_percentage()),
+                         ('completed', len(PURGE_STEPS), 100))
+        self.assertEqual(deletion.deleted['answers'], 6)
+        self.assertEqual(deletion.deleted['assessments'], 2)
+        self.assertEqual(deletion.deleted['test_responses'], 6)
+        self.assertEqual(deletion.deleted['chat_messages'], 2)
+        self.assertEqual(deletion.deleted['users'], 1)
+        self.assertFalse(CustomUser.objects.filter(pk=self.user.pk).exists())
+        self.assertEqual(Assessment.objects.filter(user=self.other).count(), 1)
+
+    def test_rows_written_during_purge_are_swept(self):
+        self.client.delete('/api/profile/delete/', **self.auth)
+        deletion = claim_deletion('worker-1')
+        while deletion.step < [label for label, _, _ in PURGE_STEPS].index('assessments'):
+            purge_batch(deletion, batch_size=100)
+        assessment = Assessment.objects.filter(user=self.user).first()
+        ChatMessage.objects.create(user=self.user, assessment=assessment, message_text='late', sender='user')
+        late = TestResponse.objects.create(assessment=assessment, test_type='aptitude', responses={'q9': 'b'})
+        QuestionAnswer.objects.bulk_create(QuestionAnswer.from_test_response(late))
+        self.assertTrue(purge_account(deletion, batch_size=100))
+        self.assertFalse(TestResponse.objects.filter(assessment__user_id=self.user.pk).exists())
+        self.assertFalse(QuestionAnswer.objects.filter(test_response=late).exists())
+        self.assertEqual(deletion.deleted['chat_messages'], 3)
+        self.assertEqual(deletion.deleted['test_responses'], 7)
+
+    def test_command_drains_queue(self):
+        self.client.delete('/api/profile/delete/', **self.auth)
+        out = StringIO()
+        call_command('purge_accounts', '--once', '--pause', '0', stdout=out)
+        self.assertIn('Purged 1 accounts', out.getvalue())
+        self.assertEqual(TestResponse.objects.count(), 3)
+
+
+class TokenBlacklistTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        blacklist_filter.clear()
+        shared = mock.patch('pathfinder.tokens.is_shared_cache', return_value=True)
+        shared.start()
+        self.addCleanup(shared.stop)
+        self.user = CustomUser.objects.create_user(
+            username='student', password='pass', name='Student', grade='10th')
+
+    def refresh(self, token):
+        return self.client.post('/api/token/refresh/', {'refresh': token}, content_type='application/json')
+
+    def test_rotated_token_is_rejected_and_fresh_check_skips_db(self):
+        original = str(RefreshToken.for_user(self.user))
+        with self.captureOnCommitCallbacks(execute=True):
+            rotated = self.refresh(original).json()['refresh']
+        self.assertEqual(self.refresh(original).status_code, 401)
+
+        token = RefreshToken(rotated)  # builds the filter
+        with CaptureQueriesContext(connection) as queries:
+            with self.captureOnCommitCallbacks(execute=True):
+                self.assertEqual(self.refresh(rotated).status_code, 200)
+        self.assertFalse(any('token_blacklist_blacklistedtoken' in q['sql'] and 'SELECT' in q['sql']
+                             and token['jti'] in q['sql'] for q in queries.captured_queries))
+
+    def test_stamp_is_bumped_by_any_blacklisting(self):
+        token = RefreshToken.for_user(self.user)
+        self.assertEqual(self.refresh(str(RefreshToken.for_user(self.user))).status_code, 200)  # filter loaded
+        with self.captureOnCommitCallbacks(execute=True):
+            RefreshToken(str(token)).blacklist()  # plain simplejwt, as from another process or the admin
+        self.assertEqual(self.refresh(str(token)).status_code, 401)
+
+    def test_without_a_shared_cache_the_blacklist_is_queried(self):
+        token = RefreshToken.for_user(self.user)
+        self.assertEqual(self.refresh(str(RefreshToken.for_user(self.user))).status_code, 200)  # filter loaded
+        RefreshToken(str(token)).blacklist()  # no commit callbacks, so no stamp bump
+        with mock.patch('pathfinder.tokens.is_shared_cache', return_value=False):
+            self.assertEqual(self.refresh(str(token)).status_code, 401)
+
+    def test_prune_removes_only_expired_tokens(self):
+        token = RefreshToken.for_user(self.user)
+        RefreshToken(str(token)).blacklist()
+        RefreshToken.for_user(self.user)
+        OutstandingToken.objects.filter(jti=token['jti']).update(expires_at=timezone.now() - timedelta(days=1))
+        out = StringIO()
+        call_command('prune_tokens', '--batch-size', '1', '--pause', '0', stdout=out)
+        self.assertIn('Deleted 1 expired tokens', out.getvalue())
+        self.assertEqual(OutstandingToken.objects.count(), 1)
+        self.assertFalse(BlacklistedToken.objects.exists())
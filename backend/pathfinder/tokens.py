@@ -0,0 +1,138 @@
+"""
+Refresh-token blacklist checks served from an in-process filter, plus batched pruning of expired tokens.
+
+Every process keeps the 64-bit hashes of blacklisted JTIs in a sorted array (recent additions in a small
+set), loaded at a version stamp: a counter in the shared cache bumped after each blacklisting commits. While
+the stamp is unchanged a miss is authoritative and the blacklist itself is not queried. A hit is confirmed
+against the DB, so hash collisions cost a query, never a false rejection. Without a shared cache there is no
+stamp every process sees, so the plain simplejwt check is used.
+"""
+import hashlib
+import threading
+import time
+from array import array
+from bisect import bisect_left
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import transaction
+from django.utils import timezone
+from django.utils.translation import gettext_lazy as _
+from rest_framework_simplejwt.exceptions import TokenError
+from rest_framework_simplejwt.serializers import TokenRefreshSerializer
+from rest_framework_simplejwt.settings import api_settings
+from rest_framework_simplejwt.token_blacklist.models import BlacklistedToken, OutstandingToken
+from rest_framework_simplejwt.tokens import RefreshToken
+
+from .cache import get_cache, is_shared_cache
+
+FILTER_REBUILD_INTERVAL = getattr(settings, 'PATHFINDER_TOKEN_FILTER_REBUILD', 300)
+VERSION_KEY = 'pathfinder:blacklist:version'
+# Incremental loads re-read this far back, covering blacklist rows whose transaction committed late.
+LOAD_OVERLAP = timedelta(seconds=60)
+MAX_RECENT = 10000
+
+
+def jti_hash(jti):
+    return int.from_bytes(hashlib.blake2b(jti.encode(), digest_size=8).digest(), 'big')
+
+
+def get_blacklist_version():
+    cache = get_cache()
+    version = cache.get(VERSION_KEY)
+    if version is None:
+        version = time.time_ns()
+        if not cache.add(VERSION_KEY, version, None):
+            version = cache.get(VERSION_KEY, version)
+    return version
+
+
+def bump_blacklist_version():
+    """Called for every new BlacklistedToken (see signals), however it was blacklisted."""
+    transaction.on_commit(lambda: get_cache().set(VERSION_KEY, time.time_ns(), None))
+
+
+class BlacklistFilter:
+    def __init__(self):
+        self._hashes = array('Q')
+        self._recent = set()
+        self._version = None
+        self._loaded_at = None
+        self._built_at = 0.0
+        self._lock = threading.Lock()
+
+    def __len__(self):
+        return len(self._hashes) + len(self._recent)
+
+    def _contains(self, value):
+        index = bisect_left(self._hashes, value)
+        return (index < len(self._hashes) and self._hashes[index] == value) or value in self._recent
+
+    def rebuild(self):
+        """Reload every unexpired blacklisted JTI; expired tokens fail verification before the blacklist check."""
+        version = get_blacklist_version()
+        now = timezone.now()
+        jtis = BlacklistedToken.objects.filter(token__expires_at__gt=now).values_list('token__jti', flat=True)
+        hashes = array('Q', sorted({jti_hash(jti) for jti in jtis.iterator(chunk_size=5000)}))
+        self._hashes, self._recent = hashes, set()
+        self._version, self._loaded_at, self._built_at = version, now, time.monotonic()
+
+    def update(self):
+        """Add what was blacklisted since the last load."""
+        version = get_blacklist_version()
+        now = timezone.now()
+        jtis = BlacklistedToken.objects.filter(
+            blacklisted_at__gte=self._loaded_at - LOAD_OVERLAP).values_list('token__jti', flat=True)
+        self._recent.update(jti_hash(jti) for jti in jtis)
+        self._version, self._loaded_at = version, now
+
+    def refresh(self):
+        with self._lock:
+            if (self._loaded_at is None or len(self._recent) > MAX_RECENT
+                    or time.monotonic() - self._built_at > FILTER_REBUILD_INTERVAL):
+                self.rebuild()
+            elif self._version != get_blacklist_version():
+                self.update()
+
+    def might_contain(self, jti):
+        """False only if `jti` is certainly not blacklisted as of the current version stamp."""
+        self.refresh()
+        return self._contains(jti_hash(jti))
+
+    def clear(self):
+        with self._lock:
+            self._loaded_at = None
+
+
+blacklist_filter = BlacklistFilter()
+
+
+class FilteredRefreshToken(RefreshToken):
+    """RefreshToken whose blacklist check only queries the DB when the in-process filter reports a hit."""
+
+    def check_blacklist(self):
+        if not is_shared_cache():
+            return super().check_blacklist()
+        jti = self.payload[api_settings.JTI_CLAIM]
+        if blacklist_filter.might_contain(jti) and BlacklistedToken.objects.filter(token__jti=jti).exists():
+            raise TokenError(_('Token is blacklisted'))
+
+
+class FilteredTokenRefreshSerializer(TokenRefreshSerializer):
+    token_class = FilteredRefreshToken
+
+
+def prune_expired_tokens(batch_size=1000, pause=0.0):
+    """Delete expired outstanding tokens and their blacklist entries, a batch per transaction."""
+    pruned = 0
+    while True:
+        with transaction.atomic():
+            ids = list(OutstandingToken.objects.filter(expires_at__lte=timezone.now()).order_by('pk')
+                       .values_list('pk', flat=True)[:batch_size])
+            if not ids:
+                return pruned
+            # The blacklist rows are deleted first, so neither delete needs the collector's cascade.
+            BlacklistedToken.objects.filter(token_id__in=ids)._raw_delete(BlacklistedToken.objects.db)
+            pruned += OutstandingToken.objects.filter(pk__in=ids)._raw_delete(OutstandingToken.objects.db)
+        if pause:
+            time.sleep(pause)
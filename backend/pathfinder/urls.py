@@ -1,5 +1,8 @@
 from django.urls import path
 from .views import *
+from . import async_views
+from .catalog import question_catalog, question_catalog_version
+from .metrics import metrics_endpoint
 
 urlpatterns = [
     # Authentication endpoints
@@ -15,14 +18,39 @@ urlpatterns = [
     path('chatbot/history/', ChatHistoryAPIView.as_view(), name='chatbot-history'),
     
     # Assessment endpoints
+    path('questions/<str:test_type>/<str:language>/', question_catalog, name='question-catalog'),
+    path('questions/<str:test_type>/<str:language>/<str:digest>/', question_catalog_version,
+         name='question-catalog-version'),
     path('assessment/start/', StartAssessmentAPIView.as_view(), name='start-assessment'),
     path('assessment/<int:assessment_id>/test/<str:test_type>/', GetTestResponseAPIView.as_view(), name='get-test'),
     path('assessment/save-progress/', SaveTestProgressAPIView.as_view(), name='save-progress'),
+    path('assessment/autosave-metrics/', AutosaveMetricsAPIView.as_view(), name='autosave-metrics'),
     path('assessment/submit-test/', SubmitTestAPIView.as_view(), name='submit-test'),
+    path('assessment/processing-status/<int:assessment_id>/', ProcessingStatusAPIView.as_view(), name='processing-status'),
     
     # History and profile endpoints
     path('assessment/history/', AssessmentHistoryAPIView.as_view(), name='assessment-history'),
     path('assessment/<int:assessment_id>/responses/', AssessmentResponsesAPIView.as_view(), name='assessment-responses'),
     path('profile/update/', UpdateProfileAPIView.as_view(), name='update-profile'),
     path('profile/delete/', DeleteAccountAPIView.as_view(), name='delete-account'),
+
+    # Admin data export
+    path('admin/export/<str:kind>/', ExportAPIView.as_view(), name='export'),
+
+    # Counselor analytics
+    path('analytics/cohorts/', CohortAnalyticsAPIView.as_view(), name='cohort-analytics'),
+
+    # Several calls in one round trip
+    path('batch/', BatchAPIView.as_view(), name='batch'),
+
+    # Prometheus metrics
+    path('metrics/', metrics_endpoint, name='metrics'),
+
+    # Async (ASGI) variants of the hot endpoints
+    path('async/home/', async_views.home, name='async-home'),
+    path('async/chatbot/message/', async_views.chatbot_message, name='async-chatbot-message'),
+    path('async/chatbot/history/', async_views.chat_history, name='async-chatbot-history'),
+    path('async/assessment/save-progress/', async_views.save_test_progress, name='async-save-progress'),
+    path('async/events/ticket/', async_views.events_ticket, name='async-events-ticket'),
+    path('async/events/', async_views.events, name='async-events'),
 ]
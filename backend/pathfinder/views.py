@@ -1,15 +1,40 @@
+import json
+
 from rest_framework.views import APIView
 from rest_framework.response import Response
 from rest_framework import status
-from rest_framework.permissions import AllowAny, IsAuthenticated
+from rest_framework.permissions import AllowAny, IsAuthenticated, IsAdminUser
+from rest_framework.renderers import BrowsableAPIRenderer
 from rest_framework_simplejwt.tokens import RefreshToken
 from django.contrib.auth import authenticate
+from django.db import transaction
+from django.db.models import Max
+from django.http import Http404, StreamingHttpResponse
 from django.shortcuts import get_object_or_404
 from django.utils import timezone
+from django.utils.dateparse import parse_date
+
+from .models import CustomUser, Assessment, TestResponse, AssessmentResults, ChatMessage, ProcessingJob
+from .serializers import UserSerializer, TestResponseSerializer, ChatMessageSerializer
+from .cache import cached_user_response
+from .projections import CHAT_MESSAGE, USER, assessment_data
+from .renderers import FastJSONRenderer
+from .autosave import autosave_buffer, buffer_enabled, flush_pending
+from .jobs import enqueue_processing
+from .chatbot import generate_bot_response, stream_bot_response
+from .events import publish_event
+from .idempotency import idempotent_response
+from .deletion import request_deletion
+from .tokens import FilteredRefreshToken
+from .batch import BatchError, parse_batch, run_batch
+from .analytics import BUCKETS, cohort_stats, record_assessment_completed, record_test_completed
+from .export import EXPORTS, FORMATS, export_stream, export_until, parse_watermark
+from .pagination import (
+    MAX_WAIT_SECONDS, InvalidCursor, encode_cursor, keyset_page, parse_limit, parse_wait, wait_for_new,
+)
 
-from .models import CustomUser, Assessment, TestResponse, ChatMessage
-from .serializers import UserSerializer, AssessmentSerializer, TestResponseSerializer, ChatMessageSerializer
-#from .utils import generate_bot_response
+# Read-only endpoints serialize through `projections` and render with orjson when available.
+FAST_RENDERERS = [FastJSONRenderer, BrowsableAPIRenderer]
 
 class SetupAPIView(APIView):
     permission_classes = [AllowAny]
@@ -60,7 +85,7 @@ class LogoutAPIView(APIView):
         try:
             refresh_token = request.data.get('refresh')
             if refresh_token:
-                token = RefreshToken(refresh_token)
+                token = FilteredRefreshToken(refresh_token)
                 token.blacklist()
             return Response({'success': True, 'message': 'Logged out successfully'})
         except Exception:
@@ -68,34 +93,37 @@ class LogoutAPIView(APIView):
 
 class HomeAPIView(APIView):
     permission_classes = [IsAuthenticated]
+    renderer_classes = FAST_RENDERERS
     def get(self, request):
-        user = request.user
-        user_serializer = UserSerializer(user)
-        saved_assessment = Assessment.objects.filter(user=user, status='in_progress').first()
-        saved_assessment_data = AssessmentSerializer(saved_assessment).data if saved_assessment else None
-        completed_assessments = Assessment.objects.filter(user=user, status='completed')
-        completed_serializer = AssessmentSerializer(completed_assessments, many=True)
-        total_assessments = Assessment.objects.filter(user=user).count()
-        completed_count = completed_assessments.count()
-        completion_percentage = (completed_count / total_assessments * 100) if total_assessments > 0 else 0
-        return Response({
-            'user_profile': user_serializer.data,
-            'saved_assessment': saved_assessment_data,
-            'completed_assessments': completed_serializer.data,
+        return cached_user_response(request, 'home', lambda: self.build_payload(request.user))
+
+    def build_payload(self, user):
+        assessments = assessment_data(Assessment.objects.filter(user=user, status__in=['in_progress', 'completed']))
+        stats = Assessment.objects.filter(user=user).completion_stats()
+        return self.serialize(user, assessments, stats)
+
+    @staticmethod
+    def serialize(user, assessments, stats):
+        """`assessments` are fast-path rows from `projections.assessment_data`."""
+        return {
+            'user_profile': USER.from_instance(user),
+            'saved_assessment': next((a for a in assessments if a['status'] == 'in_progress'), None),
+            'completed_assessments': [a for a in assessments if a['status'] == 'completed'],
             'completion_stats': {
-                'total_assessments': total_assessments,
-                'completed_percentage': round(completion_percentage, 2)
+                'total_assessments': stats['total_assessments'],
+                'completed_percentage': round(stats['completed_percentage'], 2)
             }
-        })
+        }
 
 class ChatbotMessageAPIView(APIView):
-    """Send message to chatbot and get response"""
+    """Send message to chatbot and get response (streamed as server-sent events when requested)"""
     permission_classes = [IsAuthenticated]
     
     def post(self, request):
         user = request.user
         message_text = request.data.get('message')
         assessment_id = request.data.get('assessment_id')
+        language = request.data.get('language', 'en')
         
         if not message_text:
             return Response(
@@ -110,75 +138,111 @@ class ChatbotMessageAPIView(APIView):
                 id=assessment_id, 
                 user=user
             ).first()
+        results = AssessmentResults.objects.filter(
+            assessment=assessment) if assessment else AssessmentResults.objects.filter(assessment__user=user)
+        context = {'assessment': assessment, 'user': user, 'results': results.first()}
         
-        # Save user message
-        user_message = ChatMessage.objects.create(
-            user=user,
-            assessment=assessment,
-            message_text=message_text,
-            sender='user',
-            is_results_chat=bool(assessment_id)
-        )
-        
-        # Generate bot response
-        # bot_response_text = generate_bot_response(
-        #     message=message_text,
-        #     language='en',
-        #     context={'assessment': assessment, 'user': user}
-        # )
-        
-        # Save bot message
-        bot_message = ChatMessage.objects.create(
-            user=user,
-            assessment=assessment,
-            message_text=bot_response_text,
-            sender='bot',
-            is_results_chat=bool(assessment_id)
-        )
+        if request.data.get('stream') or 'text/event-stream' in request.META.get('HTTP_ACCEPT', ''):
+            response = StreamingHttpResponse(
+                self.stream_events(user, assessment, message_text, language, context),
+                content_type='text/event-stream')
+            response['Cache-Control'] = 'no-cache'
+            response['X-Accel-Buffering'] = 'no'
+            return response
         
+        bot_response_text = generate_bot_response(message=message_text, language=language, context=context)
+        self.save_messages(user, assessment, message_text, bot_response_text)
         return Response({
             'bot_message': bot_response_text
         })
 
+    def stream_events(self, user, assessment, message_text, language, context):
+        chunks = []
+        for chunk in stream_bot_response(message=message_text, language=language, context=context):
+            chunks.append(chunk)
+            yield f'data: {json.dumps({"delta": chunk})}\n\n'
+        bot_response_text = ''.join(chunks)
+        self.save_messages(user, assessment, message_text, bot_response_text)
+        yield f'event: done\ndata: {json.dumps({"bot_message": bot_response_text})}\n\n'
+
+    def save_messages(self, user, assessment, message_text, bot_response_text):
+        """Persist the user message and bot reply together once the reply is complete."""
+        with transaction.atomic():
+            saved = ChatMessage.objects.bulk_create([
+                ChatMessage(user=user, assessment=assessment, message_text=message_text,
+                            sender='user', is_results_chat=assessment is not None),
+                ChatMessage(user=user, assessment=assessment, message_text=bot_response_text,
+                            sender='bot', is_results_chat=assessment is not None),
+            ])
+            publish_event(user.pk, 'chat_message', ChatMessageSerializer(saved, many=True).data)
+
 
 class ChatHistoryAPIView(APIView):
     permission_classes = [IsAuthenticated]
+    renderer_classes = FAST_RENDERERS
     def get(self, request):
         user = request.user
         assessment_id = request.query_params.get('assessment_id')
         messages = ChatMessage.objects.filter(user=user)
         if assessment_id:
             messages = messages.filter(assessment_id=assessment_id)
-        messages = messages.order_by('created_at')[:50]
-        serializer = ChatMessageSerializer(messages, many=True)
-        return Response({'messages': serializer.data})
+        messages = messages.values(*CHAT_MESSAGE.sources)
+        limit = parse_limit(request.query_params.get('limit'))
+        since = request.query_params.get('since')
+        try:
+            wait = parse_wait(request.query_params.get('wait'))
+        except ValueError:
+            return Response({'error': f'wait must be a number of seconds up to {MAX_WAIT_SECONDS}'},
+                            status=status.HTTP_400_BAD_REQUEST)
+        try:
+            if since is not None:
+                messages, has_more = wait_for_new(messages, int(since), limit, wait)
+            else:
+                messages, has_more = keyset_page(
+                    messages, request.query_params.get('before'), request.query_params.get('after'), limit)
+        except (InvalidCursor, ValueError):
+            return Response({'error': 'Invalid cursor'}, status=status.HTTP_400_BAD_REQUEST)
+        return Response({
+            'messages': CHAT_MESSAGE.many(messages),
+            'has_more': has_more,
+            'before': encode_cursor(messages[0]) if messages else None,
+            'after': encode_cursor(messages[-1]) if messages else None,
+            'latest_id': messages[-1]['id'] if messages else None,
+        })
 
-class StartAssessmentAPIView(APIView):
-    permission_classes = [IsAuthenticated]
-    def post(self, request):
-        user = request.user
+def start_assessment(user, data):
+    """Resume the user's in-progress assessment or number and create the next one; returns (status_code, payload)."""
+    with transaction.atomic():
+        # Lock the user row so concurrent starts queue up here instead of racing on assessment_number.
+        CustomUser.objects.select_for_update().filter(pk=user.pk).values_list('pk', flat=True).first()
         existing_assessment = Assessment.objects.filter(user=user, status='in_progress').first()
         if existing_assessment:
             first_test_type = existing_assessment.test_responses.order_by('test_type').first().test_type
-            return Response({
+            return status.HTTP_200_OK, {
                 'assessment_id': existing_assessment.id,
                 'first_test_type': first_test_type,
                 'redirect_url': f'/assessment/test/{first_test_type}/'
-            })
-        assessment_number = Assessment.objects.filter(user=user).count() + 1
+            }
+        last_number = Assessment.objects.filter(user=user).aggregate(last=Max('assessment_number'))['last']
         assessment = Assessment.objects.create(
-            user=user, assessment_number=assessment_number, status='in_progress'
+            user=user, assessment_number=(last_number or 0) + 1, status='in_progress'
         )
         TestResponse.objects.create(
             assessment=assessment,
             test_type='aptitude',
-            total_questions=request.data.get('aptitude_total_questions', 0)
+            total_questions=data.get('aptitude_total_questions', 0)
         )
-        return Response({
-            'assessment_id': assessment.id,
-            'first_test_type': 'aptitude',
-            'redirect_url': '/assessment/test/aptitude/'
-        }, status=status.HTTP_201_CREATED)
+    return status.HTTP_201_CREATED, {
+        'assessment_id': assessment.id,
+        'first_test_type': 'aptitude',
+        'redirect_url': '/assessment/test/aptitude/'
+    }
+
+class StartAssessmentAPIView(APIView):
+    """Start or resume an assessment; send an Idempotency-Key header to make retries safe"""
+    permission_classes = [IsAuthenticated]
+    def post(self, request):
+        return idempotent_response(request, 'start-assessment', start_assessment)
 
 class GetTestResponseAPIView(APIView):
     """Get user's answers and progress for a specific test section."""
@@ -190,39 +254,114 @@ class GetTestResponseAPIView(APIView):
         assessment = get_object_or_404(Assessment, id=assessment_id, user=user)
         test_response, _ = TestResponse.objects.get_or_create(
             assessment=assessment, test_type=test_type)
+        if flush_pending(test_response.pk):
+            test_response.refresh_from_db()
         serializer = TestResponseSerializer(test_response)
         return Response(serializer.data)
 
-class SaveTestProgressAPIView(APIView):
-    """Save test progress (auto-save)"""
-    permission_classes = [IsAuthenticated]
-    def post(self, request):
-        test_response_id = request.data.get('test_response_id')
-        answers = request.data.get('answers', {})
-        current_question_index = request.data.get('current_question_index', 0)
-        if not test_response_id:
-            return Response({'error': 'test_response_id is required'}, status=status.HTTP_400_BAD_REQUEST)
+def save_progress(user, data):
+    """Full-state autosave shared by the sync and async views; returns (status_code, payload)."""
+    test_response_id = data.get('test_response_id')
+    answers = data.get('answers', {})
+    current_question_index = data.get('current_question_index', 0)
+    if not test_response_id:
+        return status.HTTP_400_BAD_REQUEST, {'error': 'test_response_id is required'}
+    if not isinstance(answers, dict):
+        return status.HTTP_400_BAD_REQUEST, {'error': 'answers must be an object'}
+    if buffer_enabled():
+        test_response = get_object_or_404(
+            TestResponse.objects.only('id'), id=test_response_id, assessment__user=user)
+        saved_at = autosave_buffer.put(test_response.pk, answers, current_question_index)
+        return status.HTTP_200_OK, {'success': True, 'saved_at': saved_at, 'buffered': True}
+    with transaction.atomic():
+        # Locked like the delta path, so concurrent full and delta saves can't both claim the same revision.
         test_response = get_object_or_404(
-            TestResponse, id=test_response_id, assessment__user=request.user)
+            TestResponse.objects.select_for_update().select_related('assessment'),
+            id=test_response_id, assessment__user=user)
         test_response.responses = answers
         test_response.current_question_index = current_question_index
-        test_response.last_saved_at = timezone.now()
-        test_response.save()
-        return Response({'success': True, 'saved_at': test_response.last_saved_at})
+        test_response.revision += 1
+        test_response.save(update_fields=['responses', 'current_question_index', 'revision', 'last_saved_at'])
+    return status.HTTP_200_OK, {'success': True, 'saved_at': test_response.last_saved_at, 'revision': test_response.revision}
 
-class SubmitTestAPIView(APIView):
-    """Submit completed test and move to next test"""
+
+def save_progress_delta(user, data):
+    """Merge only the changed answers; `revision` must match the stored one or the write is rejected."""
+    test_response_id = data.get('test_response_id')
+    changes = data.get('changes', {})
+    removed = data.get('removed', [])
+    revision = data.get('revision')
+    if not test_response_id or revision is None:
+        return status.HTTP_400_BAD_REQUEST, {'error': 'test_response_id and revision are required'}
+    if not isinstance(changes, dict) or not isinstance(removed, list):
+        return status.HTTP_400_BAD_REQUEST, {'error': 'changes must be an object and removed a list'}
+    try:
+        revision = int(revision)
+    except (TypeError, ValueError):
+        return status.HTTP_400_BAD_REQUEST, {'error': 'revision must be an integer'}
+    flush_pending(test_response_id)
+    with transaction.atomic():
+        test_response = get_object_or_404(
+            TestResponse.objects.select_for_update().select_related('assessment'),
+            id=test_response_id, assessment__user=user)
+        if test_response.is_completed:
+            return status.HTTP_409_CONFLICT, {'error': 'Test already submitted'}
+        if test_response.revision != revision:
+            return status.HTTP_409_CONFLICT, {
+                'error': 'Stale revision',
+                'revision': test_response.revision,
+                'responses': test_response.responses,
+                'current_question_index': test_response.current_question_index,
+            }
+        if not isinstance(test_response.responses, dict):
+            return status.HTTP_409_CONFLICT, {
+                'error': 'Stored responses cannot be merged; send a full save', 'revision': test_response.revision}
+        test_response.apply_delta(changes, removed, data.get('current_question_index'))
+    return status.HTTP_200_OK, {
+        'success': True,
+        'saved_at': test_response.last_saved_at,
+        'revision': test_response.revision,
+        'responses': test_response.responses,
+    }
+
+
+class SaveTestProgressAPIView(APIView):
+    """Save test progress (auto-save)"""
     permission_classes = [IsAuthenticated]
     def post(self, request):
-        test_response_id = request.data.get('test_response_id')
-        answers = request.data.get('answers', {})
-        if not test_response_id or not answers:
-            return Response({'error': 'test_response_id and answers are required'}, status=status.HTTP_400_BAD_REQUEST)
-        test_response = get_object_or_404(TestResponse, id=test_response_id, assessment__user=request.user)
+        return idempotent_response(request, 'save-progress', save_progress)
+
+    def patch(self, request):
+        return idempotent_response(request, 'save-progress-delta', save_progress_delta)
+
+class AutosaveMetricsAPIView(APIView):
+    """Autosave buffer depth and flush latency for this process"""
+    permission_classes = [IsAdminUser]
+    def get(self, request):
+        return Response({'enabled': buffer_enabled(), **autosave_buffer.metrics()})
+
+def submit_test(user, data):
+    """Store a test's final answers and open the next test; returns (status_code, payload)."""
+    test_response_id = data.get('test_response_id')
+    answers = data.get('answers', {})
+    if not test_response_id or not answers:
+        return status.HTTP_400_BAD_REQUEST, {'error': 'test_response_id and answers are required'}
+    if not isinstance(answers, dict):
+        return status.HTTP_400_BAD_REQUEST, {'error': 'answers must be an object'}
+    flush_pending(test_response_id)
+    with transaction.atomic():
+        # Locks the test response and its assessment, so a duplicate submit waits and then sees this one.
+        test_response = get_object_or_404(
+            TestResponse.objects.select_for_update().select_related('assessment'),
+            id=test_response_id, assessment__user=user)
+        first_submit = not test_response.is_completed
         test_response.responses = answers
         test_response.is_completed = True
         test_response.submitted_at = timezone.now()
         test_response.save()
+        test_response.sync_answers()
+        if first_submit:
+            record_test_completed(test_response, user.grade)
         assessment = test_response.assessment
         test_order = ['aptitude', 'values', 'personal']
         current_index = test_order.index(test_response.test_type)
@@ -230,34 +369,78 @@ class SubmitTestAPIView(APIView):
             next_test_type = test_order[current_index + 1]
             TestResponse.objects.get_or_create(
                 assessment=assessment, test_type=next_test_type,
-                defaults={'total_questions': request.data.get('total_questions', 0)}
+                defaults={'total_questions': data.get('total_questions', 0)}
             )
-            return Response({'success': True, 'next_test_type': next_test_type, 'redirect_url': f'/assessment/test/{next_test_type}/'})
+            redirect_url = f'/assessment/test/{next_test_type}/'
         else:
+            next_test_type = None
+            redirect_url = f'/assessment/processing/{assessment.id}/'
+            first_completion = assessment.status != 'completed'
             assessment.mark_as_completed()
-            return Response({'success': True, 'next_test_type': None, 'redirect_url': f'/assessment/processing/{assessment.id}/'})
+            enqueue_processing(assessment)
+            if first_completion:
+                record_assessment_completed(assessment, user.grade)
+        publish_event(user.pk, 'test_submitted', {
+            'assessment_id': assessment.id, 'test_type': test_response.test_type,
+            'next_test_type': next_test_type, 'assessment_completed': next_test_type is None,
+        })
+    return status.HTTP_200_OK, {'success': True, 'next_test_type': next_test_type, 'redirect_url': redirect_url}
+
+class SubmitTestAPIView(APIView):
+    """Submit completed test and move to next test"""
+    permission_classes = [IsAuthenticated]
+    def post(self, request):
+        return idempotent_response(request, 'submit-test', submit_test)
+
+class ProcessingStatusAPIView(APIView):
+    """Poll the result-processing job for a completed assessment"""
+    permission_classes = [IsAuthenticated]
+    def get(self, request, assessment_id):
+        assessment = get_object_or_404(Assessment, id=assessment_id, user=request.user)
+        job = ProcessingJob.objects.filter(assessment=assessment).first()
+        if job is None:
+            has_results = hasattr(assessment, 'results')
+            job = ProcessingJob(
+                status='completed' if has_results else 'queued',
+                current_stage=ProcessingJob.STAGE_COUNT if has_results else 1)
+        job_status = {'queued': 'processing'}.get(job.status, job.status)
+        return Response({
+            'status': job_status,
+            'current_stage': job.current_stage,
+            'total_stages': ProcessingJob.STAGE_COUNT,
+            'progress': job.get_progress_percentage(),
+            'error': job.error or None,
+            'redirect_url': f'/chatbot/?show_results=true&assessment_id={assessment.id}'
+                            if job_status == 'completed' else None,
+        })
 
 class AssessmentHistoryAPIView(APIView):
     permission_classes = [IsAuthenticated]
+    renderer_classes = FAST_RENDERERS
     def get(self, request):
-        user = request.user
+        return cached_user_response(request, 'history', lambda: self.build_payload(request.user))
+
+    def build_payload(self, user):
         assessments = Assessment.objects.filter(user=user, status='completed').order_by('-completed_at')
-        assessments_data = AssessmentSerializer(assessments, many=True).data
-        return Response({'completed_assessments': assessments_data})
+        return {'completed_assessments': assessment_data(assessments)}
 
 class AssessmentResponsesAPIView(APIView):
     permission_classes = [IsAuthenticated]
+    renderer_classes = FAST_RENDERERS
     def get(self, request, assessment_id):
-        assessment = get_object_or_404(Assessment, id=assessment_id, user=request.user)
-        test_responses = TestResponse.objects.filter(assessment=assessment, is_completed=True)
+        assessments = assessment_data(Assessment.objects.filter(id=assessment_id, user=request.user))
+        if not assessments:
+            raise Http404
+        assessment = assessments[0]
         responses_data = []
-        for test_response in test_responses:
-            responses_data.append({
-                'test_type': test_response.test_type,
-                'answers': test_response.responses
-            })
+        for test_response in assessment['test_responses']:
+            if test_response['is_completed']:
+                responses_data.append({
+                    'test_type': test_response['test_type'],
+                    'answers': test_response['responses']
+                })
         return Response({
-            'assessment': AssessmentSerializer(assessment).data,
+            'assessment': assessment,
             'test_responses': responses_data
         })
 
@@ -276,6 +459,58 @@ class UpdateProfileAPIView(APIView):
 class DeleteAccountAPIView(APIView):
     permission_classes = [IsAuthenticated]
     def delete(self, request):
-        user = request.user
-        user.delete()
-        return Response({'success': True, 'message': 'Account deleted successfully'})
+        # The account is disabled now; `purge_accounts` removes its data in the background.
+        request_deletion(request.user)
+        return Response({'success': True, 'message': 'Account deleted successfully'},
+                        status=status.HTTP_202_ACCEPTED)
+
+class ExportAPIView(APIView):
+    """Admin-only streaming export; pass X-Export-Watermark back as ?since= for the next increment"""
+    permission_classes = [IsAdminUser]
+    def get(self, request, kind):
+        output = request.query_params.get('output', 'ndjson')
+        if kind not in EXPORTS or output not in FORMATS:
+            return Response({'error': f'kind must be one of {list(EXPORTS)} and output one of {list(FORMATS)}'},
+                            status=status.HTTP_400_BAD_REQUEST)
+        try:
+            since = parse_watermark(request.query_params['since']) if request.query_params.get('since') else None
+        except ValueError as exc:
+            return Response({'error': str(exc)}, status=status.HTTP_400_BAD_REQUEST)
+        until = export_until()
+        response = StreamingHttpResponse(export_stream(kind, output, since, until), content_type=FORMATS[output])
+        response['Content-Disposition'] = f'attachment; filename="{kind}.{output}"'
+        response['X-Export-Watermark'] = until.isoformat()
+        return response
+
+class CohortAnalyticsAPIView(APIView):
+    """Admin-only cohort stats by grade and day/week/month, served from the precomputed rollups"""
+    permission_classes = [IsAdminUser]
+    def get(self, request):
+        params = request.query_params
+        bucket = params.get('bucket', 'day')
+        if bucket not in BUCKETS:
+            return Response({'error': f'bucket must be one of {list(BUCKETS)}'}, status=status.HTTP_400_BAD_REQUEST)
+        dates = {}
+        for name in ['since', 'until']:
+            if params.get(name):
+                try:
+                    dates[name] = parse_date(params[name])
+                except ValueError:
+                    dates[name] = None
+                if dates[name] is None:
+                    return Response({'error': f'{name} must be a YYYY-MM-DD date'}, status=status.HTTP_400_BAD_REQUEST)
+        stats = cohort_stats(
+            bucket=bucket, grade=params.get('grade'), test_type=params.get('test_type'),
+            answers=params.get('answers') in ('1', 'true'), **dates)
+        return Response({'bucket': bucket, 'cohorts': stats})
+
+class BatchAPIView(APIView):
+    """Run several API calls in one round trip, e.g. the app-start home + history + chat fetches"""
+    permission_classes = [IsAuthenticated]
+    renderer_classes = FAST_RENDERERS
+    def post(self, request):
+        try:
+            items, parallel = parse_batch(request.data)
+        except BatchError as exc:
+            return Response({'error': str(exc)}, status=status.HTTP_400_BAD_REQUEST)
+        return Response({'responses': run_batch(request, items, parallel)})
@@ -2,9 +2,13 @@
 Django settings for webapp project.
 """
 
+import os
+from urllib.parse import unquote, urlsplit
 from pathlib import Path
 from datetime import timedelta
 
+from corsheaders.defaults import default_headers
+
 # Build paths inside the project like this: BASE_DIR / 'subdir'.
 BASE_DIR = Path(__file__).resolve().parent.parent
 
@@ -37,6 +41,7 @@ INSTALLED_APPS = [
 ]
 
 MIDDLEWARE = [
+    'pathfinder.metrics.RequestMetricsMiddleware',
     'django.middleware.security.SecurityMiddleware',
     'corsheaders.middleware.CorsMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
@@ -69,13 +74,129 @@ WSGI_APPLICATION = 'webapp.wsgi.application'
 
 
 # Database
-DATABASES = {
-    'default': {
-        'ENGINE': 'django.db.backends.sqlite3',
-        'NAME': BASE_DIR / 'db.sqlite3',
+# Database: SQLite tuned for concurrent autosaves by default, PostgreSQL when DATABASE_URL is set
+DATABASE_URL = os.environ.get('DATABASE_URL')
+DB_CONN_MAX_AGE = int(os.environ.get('DB_CONN_MAX_AGE', 60))
+if DATABASE_URL and DATABASE_URL.startswith(('postgres://', 'postgresql://')):
+    db_url = urlsplit(DATABASE_URL)
+    DATABASES = {
+        'default': {
+            'ENGINE': 'django.db.backends.postgresql',
+            'NAME': db_url.path.lstrip('/'),
+            'USER': unquote(db_url.username or ''),
+            'PASSWORD': unquote(db_url.password or ''),
+            'HOST': db_url.hostname or '',
+            'PORT': db_url.port or '',
+            'CONN_HEALTH_CHECKS': True,
+        }
+    }
+    DB_POOL_MAX_SIZE = int(os.environ.get('DB_POOL_MAX_SIZE', 0))
+    if DB_POOL_MAX_SIZE:
+        # psycopg 3 connection pool (pip install "psycopg[pool]"); replaces persistent connections
+        DATABASES['default']['OPTIONS'] = {'pool': {
+            'min_size': int(os.environ.get('DB_POOL_MIN_SIZE', 2)),
+            'max_size': DB_POOL_MAX_SIZE,
+            'timeout': int(os.environ.get('DB_POOL_TIMEOUT', 10)),
+        }}
+    else:
+        DATABASES['default']['CONN_MAX_AGE'] = DB_CONN_MAX_AGE
+else:
+    DATABASES = {
+        'default': {
+            'ENGINE': 'django.db.backends.sqlite3',
+            'NAME': os.environ.get('SQLITE_PATH', BASE_DIR / 'db.sqlite3'),
+            'CONN_MAX_AGE': DB_CONN_MAX_AGE,
+        }
+    }
+    if os.environ.get('SQLITE_TUNING', '1') == '1':
+        DATABASES['default']['OPTIONS'] = {
+            # WAL lets readers run alongside the single writer; NORMAL sync is durable across app crashes in WAL mode
+            'init_command': (
+                'PRAGMA journal_mode=WAL;'
+                'PRAGMA synchronous=NORMAL;'
+                f"PRAGMA mmap_size={int(os.environ.get('SQLITE_MMAP_SIZE', 256 * 1024 * 1024))};"
+                'PRAGMA temp_store=MEMORY;'
+            ),
+            # Seconds to wait on the writer lock (busy_timeout) instead of failing with "database is locked"
+            'timeout': float(os.environ.get('SQLITE_BUSY_TIMEOUT', 20)),
+            # Take the write lock when a transaction starts, so read-then-write blocks can't deadlock on upgrade
+            'transaction_mode': 'IMMEDIATE',
+        }
+
+
+# Cache: per-process locmem by default, Redis-compatible when CACHE_URL is set
+CACHE_URL = os.environ.get('CACHE_URL')
+if CACHE_URL and CACHE_URL.startswith(('redis://', 'rediss://')):
+    CACHES = {
+        'default': {
+            'BACKEND': 'django.core.cache.backends.redis.RedisCache',
+            'LOCATION': CACHE_URL,
+        }
     }
+elif CACHE_URL and CACHE_URL.startswith('file://'):
+    CACHES = {
+        'default': {
+            'BACKEND': 'django.core.cache.backends.filebased.FileBasedCache',
+            'LOCATION': CACHE_URL[len('file://'):],
+        }
+    }
+else:
+    CACHES = {
+        'default': {
+            'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+            'LOCATION': 'pathfinder',
+        }
+    }
+
+PATHFINDER_CACHE_ALIAS = 'default'
+PATHFINDER_PAYLOAD_CACHE_TIMEOUT = int(os.environ.get('PATHFINDER_PAYLOAD_CACHE_TIMEOUT', 300))
+# Seconds a JWT-authenticated user is served from cache before being re-read from the DB
+PATHFINDER_AUTH_USER_CACHE_TIMEOUT = int(os.environ.get('PATHFINDER_AUTH_USER_CACHE_TIMEOUT', 60))
+
+# Seconds a stored Idempotency-Key response is replayed to retries of start/submit/save
+PATHFINDER_IDEMPOTENCY_TTL = int(os.environ.get('PATHFINDER_IDEMPOTENCY_TTL', 24 * 60 * 60))
+
+# Seconds between full rebuilds of the in-process refresh-token blacklist filter
+PATHFINDER_TOKEN_FILTER_REBUILD = int(os.environ.get('PATHFINDER_TOKEN_FILTER_REBUILD', 300))
+
+# Seconds exports stay behind now(), so rows from still-open transactions are not skipped by the next ?since=
+PATHFINDER_EXPORT_SAFETY_LAG = int(os.environ.get('PATHFINDER_EXPORT_SAFETY_LAG', 60))
+
+# Autosave write coalescing (opt-in): saves are acknowledged immediately and flushed in bulk. Pending state
+# lives in the cache, so with several server processes CACHE_URL must point at a shared cache (Redis);
+# with the per-process locmem cache buffering stays off unless the server is declared single-process.
+PATHFINDER_AUTOSAVE_BUFFER = {
+    'ENABLED': os.environ.get('PATHFINDER_AUTOSAVE_BUFFER') == '1',
+    'SINGLE_PROCESS': os.environ.get('PATHFINDER_AUTOSAVE_SINGLE_PROCESS') == '1',
+    'FLUSH_INTERVAL': float(os.environ.get('PATHFINDER_AUTOSAVE_FLUSH_INTERVAL', 2.0)),
+    'BATCH_SIZE': 500,
+}
+
+# Request metrics: debug headers, JSON log lines and /api/metrics/ for a sampled fraction of requests
+PATHFINDER_METRICS = {
+    'ENABLED': os.environ.get('PATHFINDER_METRICS', '1') == '1',
+    'SAMPLE_RATE': float(os.environ.get('PATHFINDER_METRICS_SAMPLE_RATE', 1.0 if DEBUG else 0.05)),
+    'HEADERS': DEBUG,
+    'LOG': os.environ.get('PATHFINDER_METRICS_LOG') == '1',
+    'TOKEN': os.environ.get('PATHFINDER_METRICS_TOKEN'),
+    # Without PUBLIC, scrapes need the TOKEN above or a staff user's access token
+    'PUBLIC': os.environ.get('PATHFINDER_METRICS_PUBLIC') == '1',
+}
+
+LOGGING = {
+    'version': 1,
+    'disable_existing_loggers': False,
+    'handlers': {'console': {'class': 'logging.StreamHandler'}},
+    'loggers': {'pathfinder.metrics': {'handlers': ['console'], 'level': 'INFO', 'propagate': False}},
 }
 
+# Per-user SSE push: in-process by default, which cannot push results_ready from the process_jobs worker
+# (streams poll for it every heartbeat instead); use pathfinder.events.RedisBroker in production
+PATHFINDER_EVENT_BROKER = os.environ.get('PATHFINDER_EVENT_BROKER', 'pathfinder.events.InMemoryBroker')
+PATHFINDER_EVENT_REDIS_URL = os.environ.get('PATHFINDER_EVENT_REDIS_URL', CACHE_URL)
+# Seconds an /api/async/events/ticket/ ticket can be used to open the event stream
+PATHFINDER_EVENT_TICKET_MAX_AGE = int(os.environ.get('PATHFINDER_EVENT_TICKET_MAX_AGE', 30))
+
 
 # Custom User Model - CRITICAL: Must be set before any migrations
 AUTH_USER_MODEL = 'pathfinder.CustomUser'
@@ -123,11 +244,13 @@ CORS_ALLOWED_ORIGINS = [
     "http://localhost:5173",
 ]
 CORS_ALLOW_CREDENTIALS = True
+CORS_ALLOW_HEADERS = (*default_headers, 'idempotency-key')
+CORS_EXPOSE_HEADERS = ['Idempotent-Replayed']
 
 # REST Framework
 REST_FRAMEWORK = {
     'DEFAULT_AUTHENTICATION_CLASSES': [
-        'rest_framework_simplejwt.authentication.JWTAuthentication',
+        'pathfinder.authentication.CachedJWTAuthentication',
     ],
     'DEFAULT_PERMISSION_CLASSES': [
         'rest_framework.permissions.IsAuthenticatedOrReadOnly',
@@ -140,6 +263,7 @@ SIMPLE_JWT = {
     'REFRESH_TOKEN_LIFETIME': timedelta(days=7),
     'ROTATE_REFRESH_TOKENS': True,
     'BLACKLIST_AFTER_ROTATION': True,
+    'TOKEN_REFRESH_SERIALIZER': 'pathfinder.tokens.FilteredTokenRefreshSerializer',
     'AUTH_HEADER_TYPES': ('Bearer',),
 }
 
@@ -9,7 +9,9 @@ export const assessmentService = {
   getTestResponse: (assessmentId: number, testType: string) => 
     apiClient.get(`/assessment/${assessmentId}/test/${testType}/`),
   saveProgress: (data: any) => apiClient.post('/assessment/save-progress/', data),
+  saveProgressDelta: (data: any) => apiClient.patch('/assessment/save-progress/', data),
   submitTest: (data: any) => apiClient.post('/assessment/submit-test/', data),
+  getProcessingStatus: (assessmentId: number) => apiClient.get(`/assessment/processing-status/${assessmentId}/`),
   getHistory: () => apiClient.get('/assessment/history/'),
   getResponses: (assessmentId: number) => apiClient.get(`/assessment/${assessmentId}/responses/`),
   // Chatbot